@@ -0,0 +1,101 @@
+# arret_solveur.py
+# ============================================================
+# Critères d'arrêt adaptatifs pour CP-SAT (au lieu d'un budget fixe)
+# Écart relatif/absolu, stagnation, seuil d'objectif, annulation externe.
+# max_time_in_seconds reste le plafond dur.
+# ============================================================
+
+from __future__ import annotations
+import threading
+import time
+from typing import Optional
+from ortools.sat.python import cp_model
+
+# Valeurs par défaut (None = critère désactivé)
+STOP_REL_GAP   = None     # ex. 0.01  -> arrêt à 1 % de la borne
+STOP_ABS_GAP   = None     # ex. 500
+STOP_STALL_S   = None     # ex. 20    -> pas d'amélioration depuis 20 s
+STOP_OBJECTIVE = None     # ex. 0     -> zéro manque en phase 1
+
+def default_criteria(cancel: Optional[threading.Event] = None) -> dict:
+    return {"rel_gap": STOP_REL_GAP, "abs_gap": STOP_ABS_GAP, "stall": STOP_STALL_S,
+            "objective": STOP_OBJECTIVE, "cancel": cancel}
+
+class StopCallback(cp_model.CpSolverSolutionCallback):
+    """Vérifie les critères à chaque solution ; un thread de veille gère la stagnation
+    et l'annulation (qui doivent pouvoir arrêter la recherche sans nouvelle solution)."""
+
+    POLL_S = 0.2
+
+    def __init__(self, solver: cp_model.CpSolver, criteria: Optional[dict] = None):
+        super().__init__()
+        self._solver = solver
+        self.criteria = criteria or {}
+        self.t0 = time.time()
+        self.best = None
+        self.last_improve = None
+        self.first_solution_time = None
+        self.n_solutions = 0
+        self.trajectory = []          # (temps depuis le départ, objectif) à chaque amélioration
+        self.reason = None
+        self._done = threading.Event()
+
+    # --- appelé par CP-SAT à chaque solution ---
+    def on_solution_callback(self):
+        now = time.time()
+        obj, bound = self.ObjectiveValue(), self.BestObjectiveBound()
+        self.n_solutions += 1
+        if self.first_solution_time is None:
+            self.first_solution_time = now - self.t0
+        if self.best is None or obj < self.best - 1e-9:
+            self.best = obj
+            self.last_improve = now
+            self.trajectory.append((now - self.t0, obj))
+
+        c = self.criteria
+        gap = abs(obj - bound)
+        if c.get("objective") is not None and obj <= c["objective"]:
+            self._stop("objective")
+        elif c.get("abs_gap") is not None and gap <= c["abs_gap"]:
+            self._stop("abs_gap")
+        elif c.get("rel_gap") is not None and gap / max(1.0, abs(obj)) <= c["rel_gap"]:
+            self._stop("rel_gap")
+
+    def _stop(self, reason: str):
+        if self.reason is None:
+            self.reason = reason
+        self._solver.StopSearch()
+
+    def _watch(self):
+        c = self.criteria
+        while True:
+            cancel = c.get("cancel")
+            if cancel is not None and cancel.is_set():
+                self._stop("cancel")
+                return
+            # La stagnation ne compte qu'à partir de la première solution (le presolve peut être long)
+            if (c.get("stall") is not None and self.last_improve is not None
+                    and time.time() - self.last_improve > c["stall"]):
+                self._stop("stall")
+                return
+            if self._done.wait(self.POLL_S):
+                return
+
+    def solve(self, mdl: cp_model.CpModel):
+        """Lance la résolution sous surveillance ; renvoie le status CP-SAT."""
+        self.t0 = time.time()
+        watcher = threading.Thread(target=self._watch, daemon=True)
+        watcher.start()
+        try:
+            status = self._solver.Solve(mdl, self)
+        finally:
+            self._done.set()
+            watcher.join()
+        if self.reason is None:
+            if status == cp_model.OPTIMAL:
+                self.reason = "optimal"
+            elif status == cp_model.INFEASIBLE:
+                self.reason = "infeasible"
+            else:
+                self.reason = "time_limit"
+        return status
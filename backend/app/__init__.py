@@ -32,8 +32,15 @@ def create_app():
     db.init_app(app)
     migrate.init_app(app, db)
     session.init_app(app)
+    # Optional in-memory / SQLite session store (SESSION_BACKEND=memoire|sqlite)
+    from app import sessions
+    sessions.init_app(app, os.environ.get('SESSION_BACKEND', 'filesystem'))
     CORS(app, supports_credentials=True)  # Enable CORS for all routes with credentials
     
+    # Per-route latency / size metrics (/metrics) and opt-in slow-request profiler
+    from app import metrics
+    metrics.init_app(app)
+    
     # Register blueprints
     from app.routes.main import bp as main_bp
     app.register_blueprint(main_bp)
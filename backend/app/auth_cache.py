@@ -0,0 +1,88 @@
+"""Identité et rôle de l'utilisateur connecté, mis en cache dans sa session
+
+- la session garde {id, role, pompier, checked_at, version} : pas de requête SQL par appel
+- relecture en base au plus toutes les AUTH_TTL_S secondes
+- invalidation immédiate : chaque modification d'un compte (rôle, email, mot de passe,
+  suppression) incrémente sa version dans instance/auth_versions.json, relu par tous les
+  workers dès que le fichier change (un stat par requête)
+"""
+import fcntl
+import json
+import os
+import time
+
+from flask import current_app, session
+
+from app import db
+from app.models import Pompier
+
+AUTH_TTL_S = 60
+VERSIONS_FILE = 'auth_versions.json'
+
+_versions = {'stamp': None, 'data': {}}
+
+def _versions_path():
+    return os.path.join(current_app.instance_path, VERSIONS_FILE)
+
+def auth_versions():
+    """{id du pompier (str): version}, relu seulement si le fichier a changé"""
+    path = _versions_path()
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return {}
+    stamp = (st.st_size, st.st_mtime_ns)
+    if _versions['stamp'] != stamp:
+        with open(path, encoding='utf-8') as f:
+            _versions['data'] = json.load(f)
+        _versions['stamp'] = stamp
+    return _versions['data']
+
+def invalidate(pompier_id):
+    """Forcer la relecture en base du compte dans toutes les sessions (tous workers)"""
+    path = _versions_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f'{path}.lock', 'w') as verrou:
+        fcntl.flock(verrou, fcntl.LOCK_EX)
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            data = {}
+        data[str(pompier_id)] = data.get(str(pompier_id), 0) + 1
+        with open(f'{path}.tmp', 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(f'{path}.tmp', path)
+
+def remember(pompier):
+    """Mettre l'identité en session (connexion, ou relecture après expiration)"""
+    auth = {
+        'id': pompier.id,
+        'role': pompier.role,
+        'pompier': pompier.to_dict(),
+        'checked_at': time.time(),
+        'version': auth_versions().get(str(pompier.id), 0)
+    }
+    session['pompier_id'] = pompier.id
+    session['auth'] = auth
+    return auth
+
+def forget():
+    session.pop('pompier_id', None)
+    session.pop('auth', None)
+
+def current_user():
+    """Identité en cache de la session ; None si non connecté ou compte supprimé"""
+    pompier_id = session.get('pompier_id')
+    if pompier_id is None:
+        return None
+    auth = session.get('auth')
+    if (auth and auth['id'] == pompier_id
+            and time.time() - auth['checked_at'] < AUTH_TTL_S
+            and auth['version'] == auth_versions().get(str(pompier_id), 0)):
+        return auth
+    pompier = db.session.get(Pompier, pompier_id)
+    if not pompier:
+        forget()
+        return None
+    return remember(pompier)
@@ -0,0 +1,108 @@
+"""Import en masse des comptes pompiers (routes admin et scripts d'import)
+
+- une seule requête pour retrouver les comptes existants (par email)
+- hachage des mots de passe en parallèle (le hachage PBKDF2 libère le GIL)
+- insertions / mises à jour groupées dans une seule transaction
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import generate_password_hash
+
+from app import db
+from app.models import Pompier, colonnes_recherche
+
+HASH_WORKERS = os.cpu_count() or 1
+PREFETCH_CHUNK = 500        # emails par requête IN (limite de variables SQLite)
+UPDATE_FIELDS = ('nom', 'prenom', 'grade')
+
+def comptes_existants(emails):
+    """{email: id} des comptes déjà en base, en une requête par paquet de PREFETCH_CHUNK emails"""
+    emails = list(emails)
+    existants = {}
+    for i in range(0, len(emails), PREFETCH_CHUNK):
+        paquet = emails[i:i + PREFETCH_CHUNK]
+        for id_, email in db.session.query(Pompier.id, Pompier.email).filter(Pompier.email.in_(paquet)):
+            existants[email] = id_
+    return existants
+
+def hacher_mots_de_passe(passwords, workers=HASH_WORKERS):
+    """Hachages dans l'ordre des mots de passe fournis"""
+    if workers <= 1 or len(passwords) < 2:
+        return [generate_password_hash(p) for p in passwords]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(generate_password_hash, passwords))
+
+def importer_comptes(rows, password_factory, update_existing=True, workers=HASH_WORKERS):
+    """Créer ou mettre à jour des comptes à partir de lignes {nom, prenom, grade, email, ...}
+
+    Les champs optionnels (type_pompier, role, adresse, password) ne servent qu'à la création.
+    Renvoie les compteurs, le débit (lignes/s) et une entrée par ligne dans l'ordre fourni.
+    """
+    t0 = time.time()
+    errors = []
+    valides, vus = [], set()
+    for row in rows:
+        email = row.get('email')
+        if not email:
+            errors.append(f"{row.get('ligne', '?')}: email manquant")
+        elif email in vus:
+            errors.append(f"{row.get('ligne', '?')}: email en double ({email})")
+        else:
+            vus.add(email)
+            valides.append(row)
+
+    existants = comptes_existants(vus)
+    nouveaux = [r for r in valides if r['email'] not in existants]
+    passwords = [r.get('password') or password_factory() for r in nouveaux]
+    t_hash = time.time()
+    hashes = hacher_mots_de_passe(passwords, workers)
+    t_hash = time.time() - t_hash
+
+    # Opérations groupées : pas d'événements ORM, colonnes de recherche calculées ici
+    inserts = [dict({
+        'nom': r['nom'],
+        'prenom': r['prenom'],
+        'grade': r['grade'],
+        'email': r['email'],
+        'adresse': r.get('adresse'),
+        'type_pompier': r.get('type_pompier', 'volontaire'),
+        'role': r.get('role', 'pompier'),
+        'password_hash': h
+    }, **colonnes_recherche(r)) for r, h in zip(nouveaux, hashes)]
+    updates = [dict({'id': existants[r['email']]}, **{k: r[k] for k in UPDATE_FIELDS},
+                    **colonnes_recherche({k: r[k] for k in UPDATE_FIELDS}))
+               for r in valides if r['email'] in existants] if update_existing else []
+
+    try:
+        if inserts:
+            db.session.bulk_insert_mappings(Pompier, inserts)
+        if updates:
+            db.session.bulk_update_mappings(Pompier, updates)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    password_of = {r['email']: p for r, p in zip(nouveaux, passwords)}
+    comptes = []
+    for r in valides:
+        cree = r['email'] in password_of
+        if not cree and not update_existing:
+            statut = 'ignored'
+        else:
+            statut = 'created' if cree else 'updated'
+        comptes.append(dict(r, password=password_of.get(r['email'], 'Mot de passe existant'), status=statut))
+
+    duree = time.time() - t0
+    return {
+        'created': len(inserts),
+        'updated': len(updates),
+        'ignored': len(valides) - len(inserts) - len(updates),
+        'errors': errors,
+        'comptes': comptes,
+        'duree_s': round(duree, 3),
+        'hachage_s': round(t_hash, 3),
+        'lignes_par_s': round(len(rows) / duree, 1) if duree > 0 else None
+    }
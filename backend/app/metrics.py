@@ -0,0 +1,342 @@
+"""Métriques de l'API (format texte Prometheus, route /metrics) et profilage des requêtes lentes
+
+- latence par route (histogramme), tailles des requêtes et des réponses
+- taux de succès des caches du projet (classeurs Excel, disponibilités, planning optimisé)
+- temps de lecture des fichiers CSV / Excel dans les routes (cf. timed)
+- profileur par échantillonnage, activé par PROFILE_SLOW_MS : piles les plus fréquentes
+  des requêtes plus lentes que le seuil, écrites dans backend/profiles/
+- plusieurs processus (gunicorn, METRICS_DIR) : chaque processus écrit un instantané de ses
+  compteurs dans METRICS_DIR (au plus toutes les METRICS_FLUSH_S secondes), /metrics les somme ;
+  les workers terminés sont cumulés dans archive.json (cf. hooks de gunicorn.conf.py)
+"""
+import glob
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+from flask import g, request
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+
+PROFILE_SLOW_MS = float(os.environ.get('PROFILE_SLOW_MS', 0))     # 0 = profileur désactivé
+PROFILE_INTERVAL_S = 0.005
+PROFILE_TOP = 25            # piles conservées par requête lente
+PROFILE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'profiles')
+
+METRICS_DIR = os.environ.get('METRICS_DIR')      # None : un seul processus, rien n'est écrit
+METRICS_FLUSH_S = 1.0
+ARCHIVE = 'archive.json'
+
+# Modules du projet exposant STATS = {'hit': n, 'miss': n}
+CACHE_MODULES = {'excel': 'cache_excel', 'disponibilites': 'dispos_store', 'planning': 'cache_planning'}
+
+METRICS = {
+    'http_requests_total': ('counter', 'Requêtes traitées par route, méthode et code'),
+    'http_request_duration_seconds': ('histogram', 'Latence des requêtes par route'),
+    'http_request_size_bytes': ('histogram', 'Taille du corps des requêtes par route'),
+    'http_response_size_bytes': ('histogram', 'Taille des réponses par route'),
+    'http_slow_requests_total': ('counter', 'Requêtes au-delà de PROFILE_SLOW_MS (profilées)'),
+    'file_parse_seconds': ('histogram', 'Lecture des fichiers CSV / Excel dans les routes'),
+    'cache_requests_total': ('counter', 'Consultations des caches du projet, par résultat'),
+    'cache_hit_ratio': ('gauge', 'Part de succès des caches du projet'),
+}
+
+_lock = threading.Lock()
+_counters = defaultdict(float)      # (nom, labels) -> valeur
+_histograms = {}                    # (nom, labels) -> [compte par borne, somme, nombre]
+_process = {'id': f'{os.getpid()}-{time.time_ns()}', 'cache_base': {}, 'flushed': 0.0}
+
+def _labels(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def inc(name, value=1, **labels):
+    with _lock:
+        _counters[(name, _labels(labels))] += value
+
+def observe(name, value, buckets=LATENCY_BUCKETS, **labels):
+    key = (name, _labels(labels))
+    with _lock:
+        h = _histograms.get(key)
+        if h is None:
+            h = _histograms[key] = [[0] * len(buckets), 0.0, 0, buckets]
+        for i, b in enumerate(buckets):
+            if value <= b:
+                h[0][i] += 1
+        h[1] += value
+        h[2] += 1
+
+@contextmanager
+def timed(fichier):
+    """Chronométrer la lecture d'un fichier : with metrics.timed('effectif'): ..."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe('file_parse_seconds', time.perf_counter() - t0, fichier=fichier)
+
+# ---------- Export ----------
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _fmt(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+def _cache_counters():
+    """Consultations des caches depuis le démarrage du processus (ou son fork, cf. worker_started)"""
+    counters = {}
+    for cache, module in CACHE_MODULES.items():
+        stats = getattr(sys.modules.get(module), 'STATS', None)
+        if not stats:
+            continue
+        for result in ('hit', 'miss'):
+            counters[('cache_requests_total', _labels({'cache': cache, 'result': result}))] = (
+                stats[result] - _process['cache_base'].get((cache, result), 0))
+    return counters
+
+def _cache_ratios(counters):
+    ratios = {}
+    for cache in CACHE_MODULES:
+        hit, miss = (counters.get(('cache_requests_total', _labels({'cache': cache, 'result': r})), 0)
+                     for r in ('hit', 'miss'))
+        if hit + miss:
+            ratios[('cache_hit_ratio', _labels({'cache': cache}))] = hit / (hit + miss)
+    return ratios
+
+def _snapshot():
+    """(compteurs, histogrammes) du processus courant"""
+    with _lock:
+        counters = dict(_counters)
+        histograms = {k: (list(h[0]), h[1], h[2], h[3]) for k, h in _histograms.items()}
+    counters.update(_cache_counters())
+    return counters, histograms
+
+# ---------- Agrégation entre processus (METRICS_DIR) ----------
+def _dump(counters, histograms):
+    return {
+        'counters': [[n, list(labels), v] for (n, labels), v in counters.items()],
+        'histograms': [[n, list(labels), list(h[0]), h[1], h[2], list(h[3])]
+                       for (n, labels), h in histograms.items()],
+    }
+
+def _merge(counters, histograms, snapshot):
+    """Ajoute un instantané (cf. _dump) aux compteurs / histogrammes donnés"""
+    for n, labels, v in snapshot['counters']:
+        key = (n, tuple(map(tuple, labels)))
+        counters[key] = counters.get(key, 0) + v
+    for n, labels, counts, total, count, buckets in snapshot['histograms']:
+        key = (n, tuple(map(tuple, labels)))
+        h = histograms.get(key)
+        if h is None or list(h[3]) != buckets:
+            histograms[key] = (list(counts), total, count, tuple(buckets))
+        else:
+            histograms[key] = ([a + b for a, b in zip(h[0], counts)], h[1] + total, h[2] + count, h[3])
+
+def _read_json(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def _write_json(path, obj):
+    tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(obj, f)
+    os.replace(tmp, path)
+
+def _read_archive():
+    try:
+        return _read_json(os.path.join(METRICS_DIR, ARCHIVE))
+    except (OSError, ValueError):
+        return {'ids': [], 'counters': [], 'histograms': []}
+
+def flush():
+    """Écrire l'instantané du processus courant dans METRICS_DIR"""
+    if METRICS_DIR:
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        _write_json(os.path.join(METRICS_DIR, f"{_process['id']}.json"), _dump(*_snapshot()))
+        _process['flushed'] = time.monotonic()
+
+def _maybe_flush():
+    if METRICS_DIR and time.monotonic() - _process['flushed'] >= METRICS_FLUSH_S:
+        flush()
+
+def _aggregate():
+    """Somme de l'archive, des instantanés des autres processus et de l'état courant"""
+    for _ in range(3):
+        counters, histograms = {}, {}
+        # Liste avant l'archive : un worker archivé entre les deux y figure déjà (ids)
+        paths = [p for p in glob.glob(os.path.join(METRICS_DIR, '*.json'))
+                 if os.path.basename(p) != ARCHIVE]
+        archive = _read_archive()
+        _merge(counters, histograms, archive)
+        skip = set(archive['ids']) | {_process['id']}
+        try:
+            for path in paths:
+                if os.path.basename(path)[:-len('.json')] not in skip:
+                    _merge(counters, histograms, _read_json(path))
+        except FileNotFoundError:
+            # Worker archivé pendant la lecture : recommencer plutôt que de le perdre
+            continue
+        _merge(counters, histograms, _dump(*_snapshot()))
+        return counters, histograms
+    return _snapshot()
+
+def reset_dir():
+    """Maître gunicorn, au démarrage : instantanés d'une exécution précédente supprimés"""
+    if METRICS_DIR:
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        for path in glob.glob(os.path.join(METRICS_DIR, '*.json')):
+            os.remove(path)
+
+def worker_started():
+    """Worker forké : repartir de zéro (le maître compte déjà le préchargement, cf. flush)"""
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+    _process['cache_base'] = {}
+    base = {}
+    for (_n, labels), v in _cache_counters().items():
+        d = dict(labels)
+        base[(d['cache'], d['result'])] = v
+    _process.update(id=f'{os.getpid()}-{time.time_ns()}', cache_base=base, flushed=0.0)
+
+def archive(pid):
+    """Maître gunicorn, à la fin d'un worker : son dernier instantané rejoint archive.json"""
+    if not METRICS_DIR:
+        return
+    paths = glob.glob(os.path.join(METRICS_DIR, f'{pid}-*.json'))
+    if not paths:
+        return
+    old = _read_archive()
+    counters, histograms = {}, {}
+    _merge(counters, histograms, old)
+    ids = [i for i in old['ids'] if os.path.exists(os.path.join(METRICS_DIR, f'{i}.json'))]
+    for p in paths:
+        _merge(counters, histograms, _read_json(p))
+        ids.append(os.path.basename(p)[:-len('.json')])
+    # Archive écrite (avec les ids cumulés) avant la suppression : jamais compté deux fois
+    _write_json(os.path.join(METRICS_DIR, ARCHIVE), dict(_dump(counters, histograms), ids=ids))
+    for p in paths:
+        os.remove(p)
+
+def render():
+    """Toutes les métriques au format texte d'exposition Prometheus 0.0.4"""
+    counters, histograms = _aggregate() if METRICS_DIR else _snapshot()
+    gauges = _cache_ratios(counters)
+
+    lines = []
+    for name, (kind, help_) in METRICS.items():
+        lines += [f'# HELP {name} {help_}', f'# TYPE {name} {kind}']
+        for (n, labels), value in sorted({**counters, **gauges}.items()):
+            if n == name:
+                lines.append(f'{name}{_fmt(labels)} {value:g}')
+        for (n, labels), (counts, total, count, buckets) in sorted(histograms.items()):
+            if n != name:
+                continue
+            for b, c in zip(buckets, counts):
+                lines.append(f'{name}_bucket{_fmt(labels, [("le", f"{b:g}")])} {c}')
+            lines.append(f'{name}_bucket{_fmt(labels, [("le", "+Inf")])} {count}')
+            lines.append(f'{name}_sum{_fmt(labels)} {total:g}')
+            lines.append(f'{name}_count{_fmt(labels)} {count}')
+    return '\n'.join(lines) + '\n'
+
+# ---------- Profileur par échantillonnage ----------
+class SamplingProfiler:
+    """Un thread relève périodiquement la pile des threads qui servent une requête"""
+
+    def __init__(self, interval=PROFILE_INTERVAL_S):
+        self.interval = interval
+        self._active = {}           # id du thread -> Counter des piles
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self, thread_id):
+        with self._lock:
+            self._active[thread_id] = Counter()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='profileur', daemon=True)
+                self._thread.start()
+
+    def stop(self, thread_id):
+        with self._lock:
+            return self._active.pop(thread_id, Counter())
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, stacks in self._active.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        stacks[_stack(frame)] += 1
+
+def _stack(frame):
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+def _dump_profile(route, duration, stacks):
+    """Piles au format « pile repliée » (flamegraph.pl, speedscope), les plus fréquentes d'abord"""
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    slug = route.strip('/').replace('/', '_').replace('<', '').replace('>', '') or 'racine'
+    path = os.path.join(PROFILE_DIR, f"{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}_{slug}.txt")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f'# {route} {duration * 1000:.0f} ms, {sum(stacks.values())} échantillons '
+                f'toutes les {PROFILE_INTERVAL_S * 1000:g} ms\n')
+        for stack, n in stacks.most_common(PROFILE_TOP):
+            f.write(f'{stack} {n}\n')
+    return path
+
+_profiler = SamplingProfiler()
+
+# ---------- Intégration Flask ----------
+def _route():
+    return request.url_rule.rule if request.url_rule is not None else 'inconnue'
+
+def _before():
+    g.metrics_t0 = time.perf_counter()
+    if PROFILE_SLOW_MS > 0:
+        _profiler.start(threading.get_ident())
+
+def _after(response):
+    t0 = g.pop('metrics_t0', None)
+    if t0 is None:
+        return response
+    duration = time.perf_counter() - t0
+    route = _route()
+    inc('http_requests_total', route=route, method=request.method, status=response.status_code)
+    observe('http_request_duration_seconds', duration, route=route, method=request.method)
+    observe('http_request_size_bytes', request.content_length or 0, SIZE_BUCKETS, route=route)
+    if not response.is_streamed:
+        observe('http_response_size_bytes', response.calculate_content_length() or 0, SIZE_BUCKETS,
+                route=route)
+    if PROFILE_SLOW_MS > 0:
+        stacks = _profiler.stop(threading.get_ident())
+        if duration * 1000 >= PROFILE_SLOW_MS:
+            inc('http_slow_requests_total', route=route)
+            if stacks:
+                path = _dump_profile(route, duration, stacks)
+                print(f"🐢 {request.method} {route} : {duration * 1000:.0f} ms, profil -> {path}")
+    _maybe_flush()
+    return response
+
+def _teardown(exc):
+    # Requête interrompue avant after_request : ne pas laisser le thread sous échantillonnage
+    if PROFILE_SLOW_MS > 0:
+        _profiler.stop(threading.get_ident())
+
+def init_app(app):
+    app.before_request(_before)
+    app.after_request(_after)
+    app.teardown_request(_teardown)
@@ -1,6 +1,26 @@
 from app import db
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
+import unicodedata
+from sqlalchemy import bindparam, event, inspect, select, text
+from sqlalchemy.schema import CreateIndex
+
+# Champ -> colonne normalisée de la recherche par préfixe (cf. app/pompiers_liste.py)
+RECHERCHE = {
+    'nom': 'nom_recherche',
+    'prenom': 'prenom_recherche',
+    'grade': 'grade_recherche',
+    'email': 'email_recherche',
+}
+
+def normaliser(texte):
+    """Forme de recherche : accents retirés et casse repliée ('Éric' -> 'eric')"""
+    decompose = unicodedata.normalize('NFKD', texte or '')
+    return ''.join(c for c in decompose if not unicodedata.combining(c)).casefold()
+
+def colonnes_recherche(valeurs):
+    """Colonnes normalisées des champs présents dans valeurs (insertions / mises à jour groupées)"""
+    return {col: normaliser(valeurs[champ]) for champ, col in RECHERCHE.items() if champ in valeurs}
 
 class Pompier(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -13,6 +33,23 @@ class Pompier(db.Model):
     role = db.Column(db.String(50), default='pompier', nullable=False)  # 'admin' ou 'pompier'
     password_hash = db.Column(db.String(256), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Formes normalisées tenues à jour à l'écriture : lower() de SQLite ignore les accents
+    nom_recherche = db.Column(db.String(100), nullable=False, default='')
+    prenom_recherche = db.Column(db.String(100), nullable=False, default='')
+    grade_recherche = db.Column(db.String(100), nullable=False, default='')
+    email_recherche = db.Column(db.String(120), nullable=False, default='')
+    
+    __table_args__ = (
+        # Tri et pagination par curseur (clé, id) de la liste admin
+        db.Index('ix_pompier_nom_id', nom, id),
+        db.Index('ix_pompier_prenom_id', prenom, id),
+        db.Index('ix_pompier_grade_id', grade, id),
+        # Recherche par préfixe insensible à la casse et aux accents (cf. app/pompiers_liste.py)
+        db.Index('ix_pompier_nom_recherche', nom_recherche),
+        db.Index('ix_pompier_prenom_recherche', prenom_recherche),
+        db.Index('ix_pompier_grade_recherche', grade_recherche),
+        db.Index('ix_pompier_email_recherche', email_recherche),
+    )
     
     def set_password(self, password):
         """Hacher le mot de passe"""
@@ -37,3 +74,34 @@ class Pompier(db.Model):
     
     def __repr__(self):
         return f'<Pompier {self.prenom} {self.nom} - {self.grade}>'
+
+@event.listens_for(Pompier, 'before_insert')
+@event.listens_for(Pompier, 'before_update')
+def _maj_recherche(mapper, connection, pompier):
+    for champ, col in RECHERCHE.items():
+        setattr(pompier, col, normaliser(getattr(pompier, champ)))
+
+# Index sur lower(champ) des versions précédentes, remplacés par les colonnes normalisées
+ANCIENS_INDEX = ('ix_pompier_nom_lower', 'ix_pompier_prenom_lower',
+                 'ix_pompier_grade_lower', 'ix_pompier_email_lower')
+
+def ensure_schema():
+    """Mettre à niveau une base existante (db.create_all ne modifie pas une table existante) :
+    colonnes de recherche ajoutées et remplies, index créés"""
+    table = Pompier.__table__
+    with db.engine.begin() as conn:
+        existantes = {c['name'] for c in inspect(conn).get_columns(table.name)}
+        manquantes = [col for col in RECHERCHE.values() if col not in existantes]
+        for col in manquantes:
+            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {col} "
+                              f"VARCHAR({table.c[col].type.length}) NOT NULL DEFAULT ''"))
+        if manquantes:
+            lignes = conn.execute(select(table.c.id, *[table.c[champ] for champ in RECHERCHE])).mappings()
+            valeurs = [dict(colonnes_recherche(ligne), pid=ligne['id']) for ligne in lignes]
+            if valeurs:
+                conn.execute(table.update().where(table.c.id == bindparam('pid')), valeurs)
+        for nom in ANCIENS_INDEX:
+            conn.execute(text(f'DROP INDEX IF EXISTS {nom}'))
+        # IF NOT EXISTS : la réflexion (checkfirst) ne voit pas les index sur expression
+        for index in table.indexes:
+            conn.execute(CreateIndex(index, if_not_exists=True))
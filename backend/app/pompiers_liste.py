@@ -0,0 +1,114 @@
+"""Liste paginée et recherche des pompiers (écrans d'administration)
+
+- recherche par préfixe insensible à la casse et aux accents sur nom, prénom, grade et email :
+  chaque mot de la recherche doit être le début d'un de ces champs (intervalle sur la colonne
+  normalisée du champ, indexée ; mots normalisés de la même façon, cf. app.models.normaliser)
+- tri sur SORTABLE, départage par id : ordre total et stable
+- pagination par curseur (dernière clé de tri vue) : coût constant quelle que soit la page,
+  pas de doublon ni de trou si des comptes sont ajoutés entre deux pages
+- total et nombre d'admins renvoyés avec la première page seulement
+"""
+import base64
+import json
+
+from sqlalchemy import and_, func, or_
+
+from app import db
+from app.models import Pompier, normaliser
+
+SORTABLE = {
+    'nom': Pompier.nom,
+    'prenom': Pompier.prenom,
+    'grade': Pompier.grade,
+    'email': Pompier.email,
+    'id': Pompier.id,
+}
+SEARCHABLE = (Pompier.nom_recherche, Pompier.prenom_recherche, Pompier.grade_recherche,
+              Pompier.email_recherche)
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+def encoder_curseur(valeur, id_):
+    return base64.urlsafe_b64encode(json.dumps([valeur, id_]).encode()).decode()
+
+def decoder_curseur(curseur):
+    try:
+        valeur, id_ = json.loads(base64.urlsafe_b64decode(curseur.encode()))
+    except (ValueError, TypeError):
+        raise ValueError('Curseur invalide')
+    if not isinstance(id_, int):
+        raise ValueError('Curseur invalide')
+    return valeur, id_
+
+def _prefixe(colonne, mot):
+    """colonne commence par mot, en intervalle [mot, mot suivant[ pour utiliser l'index"""
+    fin = mot[:-1] + chr(ord(mot[-1]) + 1)
+    return and_(colonne >= mot, colonne < fin)
+
+def filtre_recherche(q):
+    """Chaque mot de q doit préfixer au moins un des champs SEARCHABLE ; None si q est vide"""
+    mots = normaliser(q).split()
+    if not mots:
+        return None
+    return and_(*[or_(*[_prefixe(col, mot) for col in SEARCHABLE]) for mot in mots])
+
+def lire_parametres(args):
+    """Valider q, sort, order, limit et after (query string) ; ValueError si invalide"""
+    sort = args.get('sort', 'nom')
+    if sort not in SORTABLE:
+        raise ValueError(f"Tri invalide : {sort} (attendu : {', '.join(SORTABLE)})")
+    order = args.get('order', 'asc')
+    if order not in ('asc', 'desc'):
+        raise ValueError(f"Ordre invalide : {order} (attendu : asc, desc)")
+    limit = args.get('limit')
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise ValueError('limit doit être un entier')
+        limit = max(1, min(limit, MAX_LIMIT))
+    after = args.get('after')
+    return {
+        'q': args.get('q', ''),
+        'sort': sort,
+        'order': order,
+        'limit': limit,
+        'after': decoder_curseur(after) if after else None,
+    }
+
+def requete(q='', sort='nom', order='asc', after=None, colonnes=None):
+    """Requête filtrée, triée et positionnée après le curseur (sans limite)"""
+    cle = SORTABLE[sort]
+    query = db.session.query(*colonnes) if colonnes else Pompier.query
+    filtre = filtre_recherche(q)
+    if filtre is not None:
+        query = query.filter(filtre)
+    if after is not None:
+        valeur, dernier_id = after
+        if order == 'asc':
+            query = query.filter(or_(cle > valeur, and_(cle == valeur, Pompier.id > dernier_id)))
+        else:
+            query = query.filter(or_(cle < valeur, and_(cle == valeur, Pompier.id < dernier_id)))
+    if order == 'asc':
+        return query.order_by(cle.asc(), Pompier.id.asc())
+    return query.order_by(cle.desc(), Pompier.id.desc())
+
+def lister_pompiers(q='', sort='nom', order='asc', limit=DEFAULT_LIMIT, after=None):
+    """Une page de pompiers : {'pompiers', 'next', et 'total' / 'admins' en première page}"""
+    limit = limit or DEFAULT_LIMIT
+    # Une ligne de plus que la page : indique s'il reste des résultats sans COUNT
+    pompiers = requete(q, sort, order, after).limit(limit + 1).all()
+    suivante = len(pompiers) > limit
+    pompiers = pompiers[:limit]
+    page = {
+        'pompiers': [p.to_dict() for p in pompiers],
+        'next': encoder_curseur(getattr(pompiers[-1], sort), pompiers[-1].id) if suivante else None,
+    }
+    if after is None:
+        query = db.session.query(func.count(Pompier.id))
+        filtre = filtre_recherche(q)
+        if filtre is not None:
+            query = query.filter(filtre)
+        page['total'] = query.scalar()
+        page['admins'] = query.filter(Pompier.role == 'admin').scalar()
+    return page
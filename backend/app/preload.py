@@ -0,0 +1,70 @@
+"""Préchargement des données de planning (mode production, cf. wsgi.py)
+
+Effectif (Excel), disponibilités (tableaux .npz par année) et partitions du planning optimisé
+sont lus une fois dans le processus maître, avant le fork des workers : ceux-ci les partagent
+en copie sur écriture et servent la première requête avec des caches chauds.
+L'état du préchargement est exposé par la sonde /ready.
+"""
+import gc
+import os
+import sys
+import time
+from datetime import datetime
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+EXCEL_EFFECTIF = os.path.join(PROJECT_ROOT, 'SPV Pibrac Hackathon.xlsx')
+CSV_DISPOS = os.path.join(PROJECT_ROOT, 'disponibilites_2026.csv')
+CSV_PLANNING = os.path.join(PROJECT_ROOT, 'planning_optimise.csv')
+
+# ready : None tant qu'aucun préchargement n'a été demandé (serveur de développement)
+STATUS = {'ready': None, 'started_at': None, 'duree_s': None, 'donnees': {}, 'erreurs': []}
+
+def _effectif():
+    import roster
+    if not os.path.exists(EXCEL_EFFECTIF):
+        return {'absent': True}
+    return {'volontaires': len(roster.load_roster(EXCEL_EFFECTIF).ids)}
+
+def _disponibilites():
+    import dispos_store
+    if not os.path.exists(CSV_DISPOS):
+        return {'absent': True}
+    manifest = dispos_store.ensure_store(CSV_DISPOS)
+    for year in manifest['years']:
+        dispos_store.load_year(manifest, year)
+    return {'personnes': len(manifest['persons']), 'annees': sorted(manifest['years'])}
+
+def _planning():
+    import planning_store
+    # Mêmes options de lecture que api.read_planning_optimise : mêmes entrées de cache
+    df = planning_store.read_planning(CSV_PLANNING, **planning_store.API_READ_KW)
+    if df is None:
+        return {'absent': True}
+    return {'version': df.attrs['version'], 'lignes': len(df)}
+
+STEPS = [('effectif', _effectif), ('disponibilites', _disponibilites), ('planning', _planning)]
+
+def preload():
+    """Charger toutes les données servies par l'API ; ready=False si une lecture a échoué"""
+    if PROJECT_ROOT not in sys.path:
+        sys.path.insert(0, PROJECT_ROOT)
+    t0 = time.perf_counter()
+    STATUS.update(ready=False, started_at=datetime.now().isoformat(timespec='seconds'),
+                  duree_s=None, donnees={}, erreurs=[])
+    for name, load in STEPS:
+        t = time.perf_counter()
+        try:
+            info = load()
+        except Exception as e:
+            STATUS['erreurs'].append(f'{name}: {e}')
+            continue
+        STATUS['donnees'][name] = dict(info, duree_s=round(time.perf_counter() - t, 3))
+    # Objets préchargés sortis du ramasse-miettes : ses passages ne recopient pas leurs pages
+    # dans chaque worker
+    gc.collect()
+    gc.freeze()
+    STATUS.update(ready=not STATUS['erreurs'], duree_s=round(time.perf_counter() - t0, 3))
+    etat = '✅' if STATUS['ready'] else '⚠️'
+    print(f"{etat} Données préchargées en {STATUS['duree_s']}s: {STATUS['donnees']}"
+          + (f" | erreurs: {STATUS['erreurs']}" if STATUS['erreurs'] else ''))
+    return STATUS
@@ -1,26 +1,41 @@
-from flask import Blueprint, jsonify, request, session
+from flask import Blueprint, jsonify, request
 from app import db
 from app.models import Pompier
+from app.import_comptes import importer_comptes
+from app import auth_cache, metrics, pompiers_liste
 import re
 import pandas as pd
 import os
-import subprocess
-from datetime import datetime, timedelta
-import json
-from typing import Dict, List
 import calendar
 import secrets
 import string
+import sys
+import threading
+import fcntl
+from contextlib import contextmanager
 
 bp = Blueprint('api', __name__)
 
+# Racine du projet : modules du solveur (main, planning_store, dispos_store…) et fichiers de données
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# Une seule optimisation à la fois : les clics concurrents attendent puis sortent du cache
+_optimisation_lock = threading.Lock()
+# Plafond du temps de résolution demandé par un client (s) : le créneau du solveur est unique
+OPTIMISATION_MAX_TIME_S = 300.0
+# Plafond des processus de calcul parallèles d'une comparaison de scénarios
+OPTIMISATION_MAX_JOBS = 4
+
+def racine_projet():
+    """Racine du projet, ajoutée au sys.path pour importer les modules du solveur"""
+    if PROJECT_ROOT not in sys.path:
+        sys.path.insert(0, PROJECT_ROOT)
+    return PROJECT_ROOT
+
 def is_admin():
-    """Vérifier si l'utilisateur connecté est un administrateur"""
-    if 'pompier_id' not in session:
-        return False
-    
-    pompier = Pompier.query.get(session['pompier_id'])
-    return pompier and pompier.role == 'admin'
+    """Vérifier si l'utilisateur connecté est un administrateur (rôle en cache de session)"""
+    auth = auth_cache.current_user()
+    return bool(auth) and auth['role'] == 'admin'
 
 def require_admin():
     """Décorateur pour vérifier les droits d'administration"""
@@ -179,8 +194,8 @@ def connexion():
     if not pompier or not pompier.check_password(data['password']):
         return jsonify({'error': 'Email ou mot de passe incorrect'}), 401
     
-    # Ici vous pourriez ajouter la gestion des sessions ou JWT
-    session['pompier_id'] = pompier.id
+    # Identité et rôle gardés en session : pas de relecture en base à chaque appel
+    auth_cache.remember(pompier)
     
     return jsonify({
         'message': 'Connexion réussie',
@@ -190,24 +205,20 @@ def connexion():
 @bp.route('/deconnexion', methods=['POST'])
 def deconnexion():
     """Déconnexion du pompier"""
-    session.pop('pompier_id', None)
+    auth_cache.forget()
     return jsonify({'message': 'Déconnexion réussie'}), 200
 
 @bp.route('/check-session', methods=['GET'])
 def check_session():
     """Vérifier si la session utilisateur est valide"""
-    if 'pompier_id' not in session:
-        return jsonify({'authenticated': False}), 200
-    
-    # Vérifier que le pompier existe toujours en base
-    pompier = Pompier.query.get(session['pompier_id'])
-    if not pompier:
-        session.pop('pompier_id', None)
+    # Existence du compte revérifiée en base au plus toutes les AUTH_TTL_S secondes
+    auth = auth_cache.current_user()
+    if not auth:
         return jsonify({'authenticated': False}), 200
     
     return jsonify({
         'authenticated': True,
-        'pompier': pompier.to_dict()
+        'pompier': auth['pompier']
     }), 200
 
 @bp.route('/grades', methods=['GET'])
@@ -233,16 +244,23 @@ def get_grades():
 
 @bp.route('/admin/pompiers', methods=['GET'])
 def get_all_pompiers():
-    """Récupérer la liste de tous les pompiers (admin seulement)"""
+    """Liste paginée des pompiers (admin seulement)
+
+    Paramètres : q (recherche par préfixe), sort (nom, prenom, grade, email, id),
+    order (asc, desc), limit (défaut 50, max 500), after (curseur 'next' de la page précédente)
+    """
     # Vérifier les droits d'admin
     admin_check = require_admin()
     if admin_check:
         return admin_check
     
     try:
-        pompiers = Pompier.query.all()
-        pompiers_data = [pompier.to_dict() for pompier in pompiers]
-        return jsonify({'pompiers': pompiers_data}), 200
+        params = pompiers_liste.lire_parametres(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        return jsonify(pompiers_liste.lister_pompiers(**params)), 200
     except Exception as e:
         return jsonify({'error': 'Erreur lors de la récupération des pompiers'}), 500
 
@@ -283,6 +301,12 @@ def update_pompier(pompier_id):
             pompier.adresse = data['adresse']
         if 'type_pompier' in data:
             pompier.type_pompier = data['type_pompier']
+        if 'role' in data and data['role'] != pompier.role:
+            if data['role'] not in ('admin', 'pompier'):
+                return jsonify({'error': 'Rôle invalide'}), 400
+            if pompier.role == 'admin' and Pompier.query.filter_by(role='admin').count() <= 1:
+                return jsonify({'error': 'Impossible de retirer le dernier administrateur'}), 400
+            pompier.role = data['role']
         
         # Changer le mot de passe si fourni
         if 'password' in data and data['password']:
@@ -292,6 +316,8 @@ def update_pompier(pompier_id):
             pompier.set_password(data['password'])
         
         db.session.commit()
+        # Rôle / identité en cache dans les sessions de ce compte : relecture forcée
+        auth_cache.invalidate(pompier_id)
         return jsonify({
             'message': 'Pompier modifié avec succès',
             'pompier': pompier.to_dict()
@@ -322,6 +348,7 @@ def delete_pompier(pompier_id):
         
         db.session.delete(pompier)
         db.session.commit()
+        auth_cache.invalidate(pompier_id)
         return jsonify({'message': 'Pompier supprimé avec succès'}), 200
         
     except Exception as e:
@@ -333,6 +360,32 @@ def check_admin_status():
     """Vérifier si l'utilisateur connecté est admin"""
     return jsonify({'is_admin': is_admin()}), 200
 
+def get_dispos_store(csv_path):
+    """Manifeste du stockage compact des disponibilités (ré-ingéré par blocs si le CSV a changé)"""
+    racine_projet()
+    import dispos_store
+    with metrics.timed('disponibilites'):
+        return dispos_store, dispos_store.ensure_store(csv_path)
+
+def get_registre():
+    """{clé: id entier} du registre des volontaires (cf. personnes.py)"""
+    racine_projet()
+    import personnes
+    return personnes.charger()
+
+def get_roles_c3():
+    """Rôles C3 à pourvoir chaque nuit (besoin > 0), dans l'ordre de eligibilite.json"""
+    racine_projet()
+    import eligibilite
+    return [role for role, besoin in eligibilite.besoins().items() if besoin > 0]
+
+def get_roster(excel_path):
+    """Effectif lu depuis l'Excel (même lecture que le solveur, cf. roster.py)"""
+    racine_projet()
+    import roster
+    with metrics.timed('effectif'):
+        return roster.load_roster(excel_path)
+
 @bp.route('/planning/disponibilites', methods=['GET'])
 def get_disponibilites():
     """Récupérer les disponibilités des pompiers avec filtrage possible"""
@@ -342,77 +395,44 @@ def get_disponibilites():
         mois = request.args.get('mois')
         
         # Lire le fichier CSV des disponibilités
-        project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-        csv_path = os.path.join(project_root, 'disponibilites_2026.csv')
+        csv_path = os.path.join(PROJECT_ROOT, 'disponibilites_2026.csv')
         
         if not os.path.exists(csv_path):
             return jsonify({'error': 'Fichier des disponibilités non trouvé'}), 404
         
-        df = pd.read_csv(csv_path)
-        id_col = df.columns[0]
+        dispos_store, manifest = get_dispos_store(csv_path)
+        registre = get_registre()
         
-        # Si un pompier spécifique est demandé
+        # Si un pompier spécifique est demandé (id entier du registre, ou clé du CSV)
         if pompier:
-            pompier_data = df[df[id_col] == pompier]
-            if pompier_data.empty:
+            if pompier.isdigit():
+                cle = next((c for c, pid in registre.items() if pid == int(pompier)), None)
+            else:
+                cle = pompier
+            disponibilites = dispos_store.person_dispos(manifest, cle, int(mois) if mois else None) if cle else None
+            if disponibilites is None:
                 return jsonify({'error': f'Pompier {pompier} non trouvé'}), 404
-                
-            pompier_row = pompier_data.iloc[0]
-            disponibilites = {}
-            
-            # Parcourir les colonnes de créneaux
-            for col in df.columns[1:]:  # Ignorer la première colonne 'personne'
-                if '_creneau' in col:
-                    try:
-                        # Parser la date du nom de colonne (format: 2025-01-01_creneau1)
-                        date_part = col.split('_creneau')[0]
-                        creneau_num = col.split('_creneau')[1]
-                        
-                        # Si un mois est spécifié, filtrer par mois
-                        if mois:
-                            date_obj = datetime.strptime(date_part, '%Y-%m-%d')
-                            if date_obj.month != int(mois):
-                                continue
-                        
-                        if date_part not in disponibilites:
-                            disponibilites[date_part] = {}
-                        
-                        is_available = str(pompier_row[col]).lower() in ['oui', 'yes', '1', 'x', 'true']
-                        disponibilites[date_part][f'creneau{creneau_num}'] = is_available
-                    except Exception as e:
-                        continue
             
             return jsonify({
-                'pompier': pompier,
+                'pompier': cle,
+                'person_id': registre.get(cle),
                 'disponibilites': disponibilites
             }), 200
         
         # Sinon, retourner toutes les disponibilités (format original pour compatibilité)
-        disponibilites = []
-        
-        for _, row in df.iterrows():
-            pompier_id = row[id_col]
-            pompier_dispos = []
-            
-            for col in df.columns[1:]:
-                try:
-                    date_str, creneau = col.split('_creneau')
-                    slot = int(creneau)
-                    is_available = str(row[col]).lower() in ['oui', 'yes', '1', 'x', 'true']
-                    
-                    pompier_dispos.append({
-                        'date': date_str,
-                        'slot': slot,
-                        'available': is_available
-                    })
-                except:
-                    continue
-            
-            disponibilites.append({
-                'pompier_id': pompier_id,
-                'disponibilites': pompier_dispos
+        par_pompier = {}
+        for d in dispos_store.iter_dispos(manifest):
+            par_pompier.setdefault(d['id'], []).append({
+                'date': d['jour'],
+                'slot': d['slot'],
+                'available': d['dispo']
             })
         
+        disponibilites = [
+            {'pompier_id': pompier_id, 'person_id': registre.get(pompier_id), 'disponibilites': pompier_dispos}
+            for pompier_id, pompier_dispos in par_pompier.items()
+        ]
+        
         return jsonify({'disponibilites': disponibilites}), 200
         
     except Exception as e:
@@ -422,35 +442,189 @@ def get_disponibilites():
 def get_list_pompiers():
     """Récupérer la liste de tous les pompiers"""
     try:
-        project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-        csv_path = os.path.join(project_root, 'disponibilites_2026.csv')
+        csv_path = os.path.join(PROJECT_ROOT, 'disponibilites_2026.csv')
         
         if not os.path.exists(csv_path):
             return jsonify({'error': 'Fichier des disponibilités non trouvé'}), 404
         
-        df = pd.read_csv(csv_path)
-        id_col = df.columns[0]
-        pompiers = df[id_col].tolist()
+        _, manifest = get_dispos_store(csv_path)
+        registre = get_registre()
+        # id : identifiant entier (person_id du planning), None si absent de l'effectif
+        pompiers = [{'id': registre.get(cle), 'cle': cle} for cle in manifest['persons']]
         
         return jsonify({'pompiers': pompiers}), 200
         
     except Exception as e:
         return jsonify({'error': f'Erreur lors de la lecture des pompiers: {str(e)}'}), 500
 
+def lire_parametres_optimisation(params, defaut_max_time):
+    """Valider lexico, lns et max_time (corps JSON) ; max_time plafonné ; ValueError si invalide"""
+    max_time = params.get('max_time', defaut_max_time)
+    try:
+        max_time = float(max_time)
+    except (TypeError, ValueError):
+        raise ValueError('max_time doit être un nombre de secondes')
+    if not max_time > 0:
+        raise ValueError('max_time doit être strictement positif')
+    return {
+        'lexico': bool(params.get('lexico', False)),
+        'lns': bool(params.get('lns', False)),
+        'max_time': min(max_time, OPTIMISATION_MAX_TIME_S),
+    }
+
+def lire_jobs(params, defaut_jobs):
+    """Valider jobs (corps JSON) ; plafonné à OPTIMISATION_MAX_JOBS ; ValueError si invalide"""
+    jobs = params.get('jobs', defaut_jobs)
+    if isinstance(jobs, bool) or not isinstance(jobs, int) or jobs < 1:
+        raise ValueError('jobs doit être un entier strictement positif')
+    return min(jobs, OPTIMISATION_MAX_JOBS)
+
+@contextmanager
+def verrou_optimisation():
+    """Un seul calcul à la fois (optimisation ou scénarios) : verrou de thread, et verrou fichier
+    entre workers (wsgi.py)"""
+    with _optimisation_lock, open(os.path.join(PROJECT_ROOT, '.optimisation.lock'), 'w') as verrou:
+        fcntl.flock(verrou, fcntl.LOCK_EX)
+        yield
+
+def run_optimisation(params):
+    """Lancer main.solve() ; si les données et paramètres n'ont pas changé, le résultat
+    est servi par le cache de main (cache_planning) sans relancer le solveur."""
+    racine_projet()
+    import main as planning_main
+    import trace_run
+    options = lire_parametres_optimisation(params, planning_main.MAX_TIME_S)
+    
+    with verrou_optimisation():
+        # État publié dans runs/dernier_run.json : lisible depuis n'importe quel worker
+        result = planning_main.solve(**options, status_path=trace_run.STATUS_PATH)
+    return {k: result.get(k) for k in ('status', 'shortage', 'quality', 'cache', 'version')}
+
+@bp.route('/planning/optimise/status', methods=['GET'])
+def get_optimisation_status():
+    """Suivi de l'optimisation en cours ou de la dernière terminée (phases chronométrées, stats CP-SAT),
+    quel que soit le worker qui l'a lancée"""
+    racine_projet()
+    import trace_run
+    status = trace_run.read_status()
+    if status is None:
+        return jsonify({'error': 'Aucune optimisation lancée depuis l\'API.'}), 404
+    return jsonify(status), 200
+
+@bp.route('/planning/scenarios', methods=['POST'])
+def compare_scenarios():
+    """Comparer des variantes de besoins/poids (admin) : {"scenarios": [{"nom", "params"}], "max_time", "jobs"}
+
+    max_time (global et par scénario) et jobs sont plafonnés ; le calcul prend le même verrou
+    qu'une optimisation"""
+    admin_check = require_admin()
+    if admin_check:
+        return admin_check
+    
+    try:
+        params = request.get_json(silent=True) or {}
+        scenarios = params.get('scenarios') or []
+        if not scenarios:
+            return jsonify({'error': 'Aucun scénario fourni'}), 400
+        if not isinstance(scenarios, list) or not all(isinstance(sc, dict) for sc in scenarios):
+            raise ValueError('scenarios doit être une liste d\'objets {"nom", "params"}')
+        
+        racine_projet()
+        import main as planning_main
+        import scenarios as planning_scenarios
+        
+        max_time = lire_parametres_optimisation(params, planning_main.MAX_TIME_S)['max_time']
+        # Budget propre à un scénario : même validation, même plafond
+        scenarios = [dict(sc, max_time=lire_parametres_optimisation(sc, max_time)['max_time'])
+                     for sc in scenarios]
+        jobs = lire_jobs(params, planning_scenarios.SCENARIOS_JOBS)
+        with verrou_optimisation():
+            df = planning_scenarios.run_scenarios(scenarios, max_time=max_time, jobs=jobs)
+        # NaN (scénario sans solution) -> null
+        rows = df.astype(object).where(df.notna(), None).to_dict('records')
+        return jsonify({'scenarios': rows}), 200
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'Erreur lors de la comparaison des scénarios: {str(e)}'}), 500
+
+def read_planning_optimise(month=None, day=None):
+    """Lire le planning optimisé par partitions mensuelles (seul le mois utile est chargé) ; None si absent"""
+    project_root = racine_projet()
+    import planning_store
+    # person_id : id entier du volontaire (cf. personnes.py), vide sur les lignes de manque
+    with metrics.timed('planning_optimise'):
+        return planning_store.read_planning(os.path.join(project_root, 'planning_optimise.csv'),
+                                            month=month, day=day, **planning_store.API_READ_KW)
+
+@bp.route('/planning/version', methods=['GET'])
+def get_planning_version():
+    """Version publiée du planning optimisé (croissante à chaque publication)"""
+    project_root = racine_projet()
+    import planning_store
+    manifest = planning_store.current(os.path.join(project_root, 'planning_optimise.csv'))
+    if manifest is None:
+        return jsonify({'error': 'Aucun planning optimisé publié.'}), 404
+    return jsonify({'version': manifest['version'], 'published_at': manifest['published_at']}), 200
+
+@bp.route('/planning/verification', methods=['GET', 'POST'])
+def verifier_planning():
+    """Vérifier un planning sans solveur : contraintes violées et objectif serré (cf. verification.py)
+
+    GET : planning publié. POST {"planning": [{day, slot, category, role, person_id, shortage_count}]} :
+    planning fourni (ex. modifié à la main avant publication).
+    """
+    try:
+        racine_projet()
+        import verification
+        
+        if request.method == 'POST':
+            lignes = (request.get_json(silent=True) or {}).get('planning')
+            if not lignes:
+                return jsonify({'error': 'Aucune ligne de planning fournie'}), 400
+            df_planning = pd.DataFrame(lignes)
+            manquantes = {'day', 'slot', 'category', 'role', 'person_id'} - set(df_planning.columns)
+            if manquantes:
+                return jsonify({'error': f"Colonnes manquantes: {', '.join(sorted(manquantes))}"}), 400
+            if 'shortage_count' not in df_planning:
+                df_planning['shortage_count'] = ''
+        else:
+            df_planning = read_planning_optimise()
+            if df_planning is None:
+                return jsonify({'error': 'Aucun planning optimisé disponible.'}), 404
+        
+        # Données du solveur relues seulement si un fichier d'entrée a changé
+        with metrics.timed('donnees_planning'):
+            data, tableaux = verification.donnees_courantes()
+        rapport = verification.verifier(df_planning, data, tableaux)
+        rapport['version'] = df_planning.attrs.get('version')
+        return jsonify(rapport), 200
+        
+    except Exception as e:
+        return jsonify({'error': f'Erreur lors de la vérification du planning: {str(e)}'}), 500
+
 @bp.route('/planning/optimise', methods=['POST'])
 def generate_planning_optimise():
-    """Générer et analyser le planning optimisé avec calcul de couverture par créneau"""
+    """Analyser le planning optimisé avec calcul de couverture par créneau ;
+    {"recalculer": true, "lexico", "lns", "max_time"} relance d'abord l'optimisation (admin)"""
     try:
-        # Chemin vers le fichier CSV de planning optimisé
-        project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-        output_path = os.path.join(project_root, 'planning_optimise.csv')
-        
-        if not os.path.exists(output_path):
+        params = request.get_json(silent=True) or {}
+        optimisation = None
+        if params.get('recalculer', False):
+            # Un seul solveur pour tout le serveur : réservé aux administrateurs
+            admin_check = require_admin()
+            if admin_check:
+                return admin_check
+            # Gratuit si déjà calculée (cache de main.solve)
+            optimisation = run_optimisation(params)
+        
+        # Lire le planning optimisé (toutes les partitions mensuelles)
+        df_planning = read_planning_optimise()
+        
+        if df_planning is None:
             return jsonify({'error': 'Fichier de planning optimisé non trouvé. Assurez-vous que planning_optimise.csv existe.'}), 404
         
-        # Lire le fichier CSV directement
-        df_planning = pd.read_csv(output_path)
-        
         # Organiser les données par jour et créneau
         planning_calendar = {}
         
@@ -476,10 +650,10 @@ def generate_planning_optimise():
                 if role not in planning_calendar[day][slot]['shortages']:
                     planning_calendar[day][slot]['shortages'][role] = 0
                 planning_calendar[day][slot]['shortages'][role] += int(shortage_count) if shortage_count else 1
-            elif person_id and str(person_id).strip() != '' and str(person_id).lower() != 'nan':
+            elif pd.notna(person_id):
                 # Ajouter le pompier au créneau
                 planning_calendar[day][slot]['pompiers'].append({
-                    'id': person_id,
+                    'id': int(person_id),
                     'name': person_name,
                     'role': role if role != '-' else None,
                     'category': category
@@ -514,7 +688,7 @@ def generate_planning_optimise():
             
             elif slot_number == 3:
                 # Créneau 3: Tous les rôles remplis (système complexe)
-                required_roles = ['AMB_CHEF', 'AMB_COND', 'AMB_EQUI_SUAP', 'FPT_CHEF', 'FPT_COND', 'FPT_EQUI_INC']
+                required_roles = get_roles_c3()
                 roles_present = set()
                 
                 for pompier in slot_data['pompiers']:
@@ -561,26 +735,26 @@ def generate_planning_optimise():
             'message': 'Planning optimisé généré avec succès',
             'calendar': formatted_calendar,
             'total_days': len(formatted_calendar),
-            'source': 'planning_optimise.csv'
+            'source': 'planning_optimise.csv',
+            'version': df_planning.attrs.get('version'),
+            'optimisation': optimisation
         }), 200
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': f'Erreur lors du chargement du planning: {str(e)}'}), 500
 
 @bp.route('/planning/optimise', methods=['GET'])
 def get_planning_optimise():
-    """Récupérer le planning optimisé existant avec calcul de couverture"""
+    """Récupérer le planning optimisé existant avec calcul de couverture (?mois=AAAA-MM pour un seul mois)"""
     try:
-        # Chemin vers le répertoire racine du projet (parent de backend)
-        project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-        output_path = os.path.join(project_root, 'planning_optimise.csv')
+        # Seule la partition du mois demandé est lue
+        df_planning = read_planning_optimise(month=request.args.get('mois'))
         
-        if not os.path.exists(output_path):
+        if df_planning is None:
             return jsonify({'error': 'Aucun planning optimisé disponible. Générez-en un d\'abord.'}), 404
         
-        # Lire le fichier CSV directement
-        df_planning = pd.read_csv(output_path)
-        
         # Organiser les données par jour et créneau
         planning_calendar = {}
         
@@ -606,10 +780,10 @@ def get_planning_optimise():
                 if role not in planning_calendar[day][slot]['shortages']:
                     planning_calendar[day][slot]['shortages'][role] = 0
                 planning_calendar[day][slot]['shortages'][role] += int(shortage_count) if shortage_count else 1
-            elif person_id and str(person_id).strip() != '' and str(person_id).lower() != 'nan':
+            elif pd.notna(person_id):
                 # Ajouter le pompier au créneau
                 planning_calendar[day][slot]['pompiers'].append({
-                    'id': person_id,
+                    'id': int(person_id),
                     'name': person_name,
                     'role': role if role != '-' else None,
                     'category': category
@@ -644,7 +818,7 @@ def get_planning_optimise():
             
             elif slot_number == 3:
                 # Créneau 3: Tous les rôles remplis (système complexe)
-                required_roles = ['AMB_CHEF', 'AMB_COND', 'AMB_EQUI_SUAP', 'FPT_CHEF', 'FPT_COND', 'FPT_EQUI_INC']
+                required_roles = get_roles_c3()
                 roles_present = set()
                 
                 for pompier in slot_data['pompiers']:
@@ -689,7 +863,8 @@ def get_planning_optimise():
         
         return jsonify({
             'calendar': formatted_calendar,
-            'total_days': len(formatted_calendar)
+            'total_days': len(formatted_calendar),
+            'version': df_planning.attrs.get('version')
         }), 200
         
     except Exception as e:
@@ -699,16 +874,13 @@ def get_planning_optimise():
 def get_creneau_details(date, creneau):
     """Récupérer les détails d'un créneau spécifique (pompiers assignés)"""
     try:
-        # Chemin vers le répertoire racine du projet (parent de backend)
-        project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-        output_path = os.path.join(project_root, 'planning_optimise.csv')
+        # Lire uniquement la partition du mois puis filtrer pour le jour/créneau spécifique
+        df_planning = read_planning_optimise(day=date)
         
-        if not os.path.exists(output_path):
+        if df_planning is None:
             return jsonify({'error': 'Aucun planning optimisé disponible.'}), 404
         
-        # Lire le fichier CSV et filtrer pour le jour/créneau spécifique
-        df_planning = pd.read_csv(output_path)
-        creneau_data = df_planning[(df_planning['day'] == date) & (df_planning['slot'] == creneau)]
+        creneau_data = df_planning[df_planning['slot'] == creneau]
         
         if creneau_data.empty:
             return jsonify({'error': 'Aucune donnée trouvée pour ce créneau.'}), 404
@@ -727,9 +899,9 @@ def get_creneau_details(date, creneau):
                 if role not in shortages:
                     shortages[role] = 0
                 shortages[role] += int(shortage_count) if shortage_count else 1
-            elif person_id and str(person_id).strip() != '' and str(person_id).lower() != 'nan':
+            elif pd.notna(person_id):
                 pompiers.append({
-                    'id': person_id,
+                    'id': int(person_id),
                     'name': person_name,
                     'role': role if role != '-' else None,
                     'category': category
@@ -745,7 +917,7 @@ def get_creneau_details(date, creneau):
             required = 8
             coverage_percent = min(100, (pompiers_count / required) * 100)
         elif creneau == 3:
-            required_roles = ['AMB_CHEF', 'AMB_COND', 'AMB_EQUI_SUAP', 'FPT_CHEF', 'FPT_COND', 'FPT_EQUI_INC']
+            required_roles = get_roles_c3()
             roles_present = set()
             
             for pompier in pompiers:
@@ -763,7 +935,8 @@ def get_creneau_details(date, creneau):
             'pompiers_count': pompiers_count,
             'shortages': shortages,
             'coverage_percent': round(coverage_percent, 1),
-            'missing_roles': list(missing_roles) if creneau == 3 else []
+            'missing_roles': list(missing_roles) if creneau == 3 else [],
+            'version': df_planning.attrs.get('version')
         }), 200
         
     except Exception as e:
@@ -773,57 +946,18 @@ def get_creneau_details(date, creneau):
 def get_pompiers_info():
     """Récupérer les informations des pompiers depuis le fichier Excel"""
     try:
-        excel_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'SPV Pibrac Hackathon.xlsx')
+        excel_path = os.path.join(PROJECT_ROOT, 'SPV Pibrac Hackathon.xlsx')
         
         if not os.path.exists(excel_path):
             return jsonify({'error': 'Fichier des pompiers non trouvé'}), 404
         
-        # Lire le fichier Excel
-        xl = pd.ExcelFile(excel_path)
-        df_raw = xl.parse("2026", header=None)
-        
-        # Traitement similaire au script planning_Optimal.py
-        top = df_raw.iloc[2].fillna('')
-        sub = df_raw.iloc[3].fillna('')
-        cols = [(str(a).strip() if str(b).strip()=="" else f"{str(a).strip()} - {str(b).strip()}") for a,b in zip(top,sub)]
-        
-        df = df_raw.iloc[4:].copy()
-        df.columns = cols
-        df = df.reset_index(drop=True)
-        
-        pompiers = []
-        col_grade = "Grade"
-        col_nom = "Nom"
-        
-        for _, row in df.iterrows():
-            nom = str(row.get(col_nom, "")).strip()
-            if not nom or nom.lower() == "nan":
-                continue
-            
-            grade = str(row.get(col_grade, "")).strip()
-            
-            # Récupération des habilitations
-            habs = []
-            suap_cols = [c for c in df.columns if "SUAP" in str(c).upper()]
-            inc_col = next((c for c in df.columns if "INC" in str(c).upper()), None)
-            cod0_col = next((c for c in df.columns if "COD 0" in str(c).upper() or "COD0" in str(c).upper()), None)
-            cod1_col = next((c for c in df.columns if "COD1" in str(c).upper() or "COD 1" in str(c).upper()), None)
-            pl_col = next((c for c in df.columns if "PERMIS C" in str(c).upper() or "PERMIS PL" in str(c).upper()), None)
-            b_col = next((c for c in df.columns if "PERMIS B" in str(c).upper() or str(c).upper() == "B"), None)
-            
-            if suap_cols and any(str(row[c]).strip().upper() == "X" for c in suap_cols): habs.append("SUAP")
-            if inc_col and str(row[inc_col]).strip().upper() == "X": habs.append("INC")
-            if cod0_col and str(row[cod0_col]).strip().upper() == "X": habs.append("COD0")
-            if cod1_col and str(row[cod1_col]).strip().upper() == "X": habs.append("COD1")
-            if pl_col and str(row[pl_col]).strip().upper() == "X": habs.append("PL")
-            if b_col and str(row[b_col]).strip().upper() == "X": habs.append("B")
-            
-            pompiers.append({
-                'id': nom,  # Utiliser le nom comme ID pour correspondre au CSV
-                'nom': nom,
-                'grade': grade,
-                'habilitations': habs
-            })
+        roster = get_roster(excel_path)
+        pompiers = [{
+            'id': int(roster.ids[i]),  # id stable du registre, comme person_id du planning
+            'nom': nom,
+            'grade': roster.grades[i],
+            'habilitations': roster.habilitations(i)
+        } for i, nom in enumerate(roster.noms)]
         
         return jsonify({'pompiers': pompiers}), 200
         
@@ -876,117 +1010,40 @@ def import_pompiers_from_excel():
         if not os.path.exists(excel_path):
             return jsonify({'error': 'Fichier Excel non trouvé'}), 404
         
-        # Lire le fichier Excel
-        xl = pd.ExcelFile(excel_path)
-        df_raw = xl.parse("2026", header=None)
+        roster = get_roster(excel_path)
         
-        # Traitement similaire au script planning_Optimal.py
-        top = df_raw.iloc[2].fillna('')
-        sub = df_raw.iloc[3].fillna('')
-        cols = [(str(a).strip() if str(b).strip()=="" else f"{str(a).strip()} - {str(b).strip()}") for a,b in zip(top,sub)]
-        
-        df = df_raw.iloc[4:].copy()
-        df.columns = cols
-        df = df.reset_index(drop=True)
-        
-        col_grade = "Grade"
-        col_nom = "Nom"
-        
-        # Collecter les habilitations disponibles
-        suap_cols = [c for c in df.columns if "SUAP" in str(c).upper()]
-        inc_col = next((c for c in df.columns if "INC" in str(c).upper()), None)
-        cod0_col = next((c for c in df.columns if "COD 0" in str(c).upper() or "COD0" in str(c).upper()), None)
-        cod1_col = next((c for c in df.columns if "COD1" in str(c).upper() or "COD 1" in str(c).upper()), None)
-        pl_col = next((c for c in df.columns if "PERMIS C" in str(c).upper() or "PERMIS PL" in str(c).upper()), None)
-        b_col = next((c for c in df.columns if "PERMIS B" in str(c).upper() or str(c).upper() == "B"), None)
-        
-        created_count = 0
-        updated_count = 0
+        rows = []
         errors = []
-        pompiers_data = []
-        
-        for index, row in df.iterrows():
+        for i, nom_complet in enumerate(roster.noms):
             try:
-                nom_complet = str(row.get(col_nom, "")).strip()
-                if not nom_complet or nom_complet.lower() == "nan":
-                    continue
-                
-                grade = str(row.get(col_grade, "")).strip()
-                if not grade or grade.lower() == "nan":
-                    grade = "Sapeur"
-                
-                # Parser le nom complet
                 prenom, nom = parse_nom_complet(nom_complet)
-                
-                # Générer l'email
-                email = generate_email(nom, prenom)
-                
-                # Récupération des habilitations
-                habs = []
-                if suap_cols and any(str(row[c]).strip().upper() == "X" for c in suap_cols): 
-                    habs.append("SUAP")
-                if inc_col and str(row[inc_col]).strip().upper() == "X": 
-                    habs.append("INC")
-                if cod0_col and str(row[cod0_col]).strip().upper() == "X": 
-                    habs.append("COD0")
-                if cod1_col and str(row[cod1_col]).strip().upper() == "X": 
-                    habs.append("COD1")
-                if pl_col and str(row[pl_col]).strip().upper() == "X": 
-                    habs.append("PL")
-                if b_col and str(row[b_col]).strip().upper() == "X": 
-                    habs.append("B")
-                
-                # Vérifier si le pompier existe déjà
-                existing_pompier = Pompier.query.filter_by(email=email).first()
-                
-                if existing_pompier:
-                    # Mettre à jour les informations
-                    existing_pompier.nom = nom
-                    existing_pompier.prenom = prenom
-                    existing_pompier.grade = grade
-                    updated_count += 1
-                    pompier = existing_pompier
-                else:
-                    # Créer un nouveau pompier
-                    password = generate_password()
-                    
-                    new_pompier = Pompier(
-                        nom=nom,
-                        prenom=prenom,
-                        grade=grade,
-                        email=email,
-                        type_pompier='volontaire'
-                    )
-                    new_pompier.set_password(password)
-                    
-                    db.session.add(new_pompier)
-                    created_count += 1
-                    pompier = new_pompier
-                
-                # Ajouter les données pour le retour
-                pompiers_data.append({
+                rows.append({
+                    'ligne': f"Ligne {roster.rows[i]}",
                     'nom': nom,
                     'prenom': prenom,
-                    'grade': grade,
-                    'email': email,
-                    'habilitations': habs,
-                    'password': password if not existing_pompier else 'Mot de passe existant',
-                    'status': 'created' if not existing_pompier else 'updated'
+                    'grade': roster.grades[i] or "Sapeur",
+                    'email': generate_email(nom, prenom),
+                    'habilitations': roster.habilitations(i),
+                    'type_pompier': 'volontaire'
                 })
-                
             except Exception as e:
-                errors.append(f"Ligne {index + 5}: {str(e)}")
+                errors.append(f"Ligne {roster.rows[i]}: {str(e)}")
                 continue
         
-        # Sauvegarder en base
-        db.session.commit()
+        # Une requête pour les comptes existants, hachage en parallèle, une transaction
+        result = importer_comptes(rows, generate_password)
+        errors += result['errors']
         
         return jsonify({
-            'message': f'Import terminé: {created_count} créés, {updated_count} mis à jour',
-            'created': created_count,
-            'updated': updated_count,
+            'message': f"Import terminé: {result['created']} créés, {result['updated']} mis à jour "
+                       f"({result['lignes_par_s']} lignes/s)",
+            'created': result['created'],
+            'updated': result['updated'],
             'errors': errors,
-            'pompiers': pompiers_data
+            'duree_s': result['duree_s'],
+            'lignes_par_s': result['lignes_par_s'],
+            'pompiers': [{k: c[k] for k in ('nom', 'prenom', 'grade', 'email', 'habilitations', 'password', 'status')}
+                         for c in result['comptes']]
         }), 200
         
     except Exception as e:
@@ -995,31 +1052,49 @@ def import_pompiers_from_excel():
 
 @bp.route('/admin/export-comptes', methods=['GET'])
 def export_comptes_pompiers():
-    """Exporter la liste des comptes créés avec leurs mots de passe"""
+    """Exporter la liste des comptes créés avec leurs mots de passe
+
+    Mêmes paramètres que /admin/pompiers (q, sort, order, limit, after) ; sans limit,
+    export complet. Colonnes lues en tuples : pas d'objet ORM par compte.
+    """
     # Vérifier les droits d'admin
     admin_check = require_admin()
     if admin_check:
         return admin_check
     
     try:
-        pompiers = Pompier.query.all()
-        
-        comptes_data = []
-        for pompier in pompiers:
-            comptes_data.append({
-                'id': pompier.id,
-                'nom': pompier.nom,
-                'prenom': pompier.prenom,
-                'grade': pompier.grade,
-                'email': pompier.email,
-                'role': pompier.role,
-                'type_pompier': pompier.type_pompier,
-                'created_at': pompier.created_at.strftime('%Y-%m-%d %H:%M:%S') if pompier.created_at else None
-            })
+        params = pompiers_liste.lire_parametres(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        colonnes = (Pompier.id, Pompier.nom, Pompier.prenom, Pompier.grade, Pompier.email,
+                    Pompier.role, Pompier.type_pompier, Pompier.created_at)
+        query = pompiers_liste.requete(params['q'], params['sort'], params['order'],
+                                       params['after'], colonnes=colonnes)
+        limit = params['limit']
+        lignes = query.limit(limit + 1).all() if limit else query.all()
+        suivante = None
+        if limit and len(lignes) > limit:
+            lignes = lignes[:limit]
+            dernier = lignes[-1]._mapping
+            suivante = pompiers_liste.encoder_curseur(dernier[params['sort']], dernier['id'])
+        
+        comptes_data = [{
+            'id': id_,
+            'nom': nom,
+            'prenom': prenom,
+            'grade': grade,
+            'email': email,
+            'role': role,
+            'type_pompier': type_pompier,
+            'created_at': created_at.strftime('%Y-%m-%d %H:%M:%S') if created_at else None
+        } for id_, nom, prenom, grade, email, role, type_pompier, created_at in lignes]
         
         return jsonify({
             'total': len(comptes_data),
-            'comptes': comptes_data
+            'comptes': comptes_data,
+            'next': suivante
         }), 200
         
     except Exception as e:
@@ -1041,6 +1116,7 @@ def reset_password_pompier(pompier_id):
         new_password = generate_password()
         pompier.set_password(new_password)
         db.session.commit()
+        auth_cache.invalidate(pompier_id)
         
         return jsonify({
             'message': f'Mot de passe réinitialisé pour {pompier.prenom} {pompier.nom}',
@@ -1,4 +1,8 @@
-from flask import Blueprint, jsonify, request
+from datetime import datetime
+
+from flask import Blueprint, Response, jsonify
+
+from app import metrics, preload
 
 bp = Blueprint('main', __name__)
 
@@ -14,5 +18,18 @@ def index():
 def health():
     return jsonify({
         'status': 'healthy',
-        'timestamp': '2025-09-26'
+        'timestamp': datetime.now().isoformat(timespec='seconds')
     })
+
+@bp.route('/ready')
+def ready():
+    """Sonde de disponibilité : 503 tant que les données préchargées ne sont pas prêtes"""
+    status = preload.STATUS
+    if status['ready'] is None:
+        # Serveur de développement : lecture à la demande, pas de préchargement
+        return jsonify({'ready': True, 'preload': False})
+    return jsonify(dict(status, preload=True)), 200 if status['ready'] else 503
+
+@bp.route('/metrics')
+def prometheus_metrics():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,153 @@
+"""Sessions côté serveur en mémoire ou en SQLite, avec purge des sessions expirées
+
+SESSION_BACKEND (variable d'environnement) :
+- 'filesystem' (défaut) : Flask-Session, un fichier lu et réécrit à chaque requête
+- 'memoire' : dictionnaire du processus (un seul processus : développement, serveur à threads)
+- 'sqlite' : instance/sessions.db, partagé entre les workers de production (cf. wsgi.py)
+
+Pour 'memoire' et 'sqlite' : identifiant signé dans le cookie (SESSION_USE_SIGNER), écriture
+seulement si la session a changé ou si plus de la moitié de sa durée de vie est écoulée
+(expiration glissante SESSION_LIFETIME_S), purge des sessions expirées toutes les SWEEP_INTERVAL_S.
+"""
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+
+from flask.sessions import SessionInterface
+from flask_session.sessions import ServerSideSession
+from itsdangerous import BadSignature, Signer, want_bytes
+
+SESSION_LIFETIME_S = int(os.environ.get('SESSION_LIFETIME_S', 12 * 3600))
+SWEEP_INTERVAL_S = 300
+
+class StoredSession(ServerSideSession):
+    pass
+
+class _StoreSessionInterface(SessionInterface):
+    """Logique commune ; les sous-classes fournissent load / store / delete / sweep"""
+    session_class = StoredSession
+
+    def __init__(self, lifetime=SESSION_LIFETIME_S):
+        self.lifetime = lifetime
+        self._next_sweep = 0.0
+
+    def _signer(self, app):
+        return Signer(app.secret_key, salt='flask-session', key_derivation='hmac')
+
+    def _maybe_sweep(self):
+        now = time.time()
+        if now >= self._next_sweep:
+            self._next_sweep = now + SWEEP_INTERVAL_S
+            self.sweep(now)
+
+    def open_session(self, app, request):
+        self._maybe_sweep()
+        cookie = request.cookies.get(app.config['SESSION_COOKIE_NAME'])
+        if cookie:
+            try:
+                sid = self._signer(app).unsign(cookie).decode()
+            except BadSignature:
+                sid = None
+            if sid:
+                found = self.load(sid, time.time())
+                if found is not None:
+                    data, expires = found
+                    session = self.session_class(data, sid=sid)
+                    session.expires = expires
+                    return session
+        session = self.session_class(sid=secrets.token_urlsafe(32))
+        session.expires = 0.0
+        return session
+
+    def save_session(self, app, session, response):
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        if not session:
+            if session.modified:
+                self.delete(session.sid)
+                response.delete_cookie(app.config['SESSION_COOKIE_NAME'], domain=domain, path=path)
+            return
+        now = time.time()
+        # Session inchangée et loin de l'expiration : aucune écriture
+        if not session.modified and session.expires - now > self.lifetime / 2:
+            return
+        self.store(session.sid, dict(session), now + self.lifetime)
+        response.set_cookie(app.config['SESSION_COOKIE_NAME'],
+                            self._signer(app).sign(want_bytes(session.sid)).decode(),
+                            httponly=self.get_cookie_httponly(app), domain=domain, path=path,
+                            secure=self.get_cookie_secure(app),
+                            samesite=self.get_cookie_samesite(app))
+
+class MemorySessionInterface(_StoreSessionInterface):
+    def __init__(self, lifetime=SESSION_LIFETIME_S):
+        super().__init__(lifetime)
+        self._data = {}             # sid -> (données JSON, expiration)
+        self._lock = threading.Lock()
+
+    def load(self, sid, now):
+        entry = self._data.get(sid)
+        if entry is None or entry[1] <= now:
+            return None
+        return json.loads(entry[0]), entry[1]
+
+    def store(self, sid, data, expires):
+        # Sérialisé : mêmes types qu'avec SQLite, pas d'objet partagé entre requêtes
+        entry = (json.dumps(data), expires)
+        # Sous verrou : sweep() parcourt le dictionnaire (serveur multi-thread)
+        with self._lock:
+            self._data[sid] = entry
+
+    def delete(self, sid):
+        with self._lock:
+            self._data.pop(sid, None)
+
+    def sweep(self, now):
+        with self._lock:
+            for sid in [s for s, (_, exp) in self._data.items() if exp <= now]:
+                self._data.pop(sid, None)
+
+class SQLiteSessionInterface(_StoreSessionInterface):
+    def __init__(self, path, lifetime=SESSION_LIFETIME_S):
+        super().__init__(lifetime)
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with sqlite3.connect(path) as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS sessions '
+                         '(sid TEXT PRIMARY KEY, data TEXT NOT NULL, expires REAL NOT NULL)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (expires)')
+
+    def _conn(self):
+        # Une connexion par thread (et par processus : ouverte après le fork)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def load(self, sid, now):
+        row = self._conn().execute('SELECT data, expires FROM sessions WHERE sid = ? AND expires > ?',
+                                   (sid, now)).fetchone()
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def store(self, sid, data, expires):
+        self._conn().execute('INSERT OR REPLACE INTO sessions (sid, data, expires) VALUES (?, ?, ?)',
+                             (sid, json.dumps(data), expires))
+
+    def delete(self, sid):
+        self._conn().execute('DELETE FROM sessions WHERE sid = ?', (sid,))
+
+    def sweep(self, now):
+        self._conn().execute('DELETE FROM sessions WHERE expires <= ?', (now,))
+
+def init_app(app, backend):
+    """Remplacer l'interface de Flask-Session si SESSION_BACKEND le demande"""
+    if backend == 'memoire':
+        app.session_interface = MemorySessionInterface()
+    elif backend == 'sqlite':
+        app.session_interface = SQLiteSessionInterface(os.path.join(app.instance_path, 'sessions.db'))
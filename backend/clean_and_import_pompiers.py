@@ -11,6 +11,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app import create_app, db
 from app.models import Pompier
+from app.import_comptes import importer_comptes
 
 # Créer l'application Flask
 app = create_app()
@@ -58,56 +59,41 @@ def import_pompiers_from_csv():
     with app.app_context():
         try:
             with open(csv_file_path, 'r', encoding='utf-8-sig') as file:
-                reader = csv.DictReader(file)
-                
-                imported_count = 0
-                
-                for row_index, row in enumerate(reader):
-                    if imported_count >= len(noms_pompiers):
-                        break
-                    
-                    nom_complet = noms_pompiers[imported_count].split()
-                    prenom = nom_complet[0]
-                    nom = nom_complet[1] if len(nom_complet) > 1 else "Pompier"
-                    
+                nb_lignes = sum(1 for _ in csv.DictReader(file))
+            
+            rows = []
+            for nom_complet in noms_pompiers[:nb_lignes]:
+                nom_complet = nom_complet.split()
+                prenom = nom_complet[0]
+                nom = nom_complet[1] if len(nom_complet) > 1 else "Pompier"
+                rows.append({
+                    'nom': nom,
+                    'prenom': prenom,
+                    'grade': 'Pompier 2ème classe',  # Grade par défaut
                     # Créer un email basé sur le nom et prénom
-                    email = f"{prenom.lower()}.{nom.lower()}@pompiers-pibrac.fr"
-                    
-                    # Vérifier si le pompier existe déjà
-                    existing_pompier = Pompier.query.filter_by(email=email).first()
-                    if existing_pompier:
-                        print(f"Pompier {email} existe déjà, on passe")
-                        continue
-                    
-                    # Générer un mot de passe sécurisé
-                    password = generate_secure_password()
-                    
-                    # Créer le nouveau pompier
-                    nouveau_pompier = Pompier(
-                        nom=nom,
-                        prenom=prenom,
-                        grade='Pompier 2ème classe',  # Grade par défaut
-                        email=email,
-                        role='pompier',
-                        type_pompier='volontaire'
-                    )
-                    
-                    # Définir le mot de passe (sera hashé automatiquement)
-                    nouveau_pompier.set_password(password)
-                    
-                    db.session.add(nouveau_pompier)
-                    imported_count += 1
-                    
-                    if imported_count % 50 == 0:
-                        print(f"Importé {imported_count} pompiers...")
-                
-                db.session.commit()
-                print(f"\n✅ Import terminé !")
-                print(f"Total des pompiers importés : {imported_count}")
-                
-                # Vérification
-                total_users = Pompier.query.count()
-                print(f"Nombre total d'utilisateurs dans la base : {total_users}")
+                    'email': f"{prenom.lower()}.{nom.lower()}@pompiers-pibrac.fr",
+                    'role': 'pompier',
+                    'type_pompier': 'volontaire',
+                    'ligne': f"{prenom} {nom}"
+                })
+            
+            # Comptes existants conservés tels quels ; mots de passe hachés en parallèle
+            result = importer_comptes(rows, generate_secure_password, update_existing=False)
+            for compte in result['comptes']:
+                if compte['status'] != 'created':
+                    print(f"Pompier {compte['email']} existe déjà, on passe")
+            for erreur in result['errors']:
+                print(f"❌ {erreur}")
+            
+            print(f"\n✅ Import terminé !")
+            print(f"Total des pompiers importés : {result['created']} "
+                  f"({result['duree_s']}s, {result['lignes_par_s']} lignes/s)")
+            if result['errors']:
+                print(f"Lignes en erreur (non importées) : {len(result['errors'])}")
+            
+            # Vérification
+            total_users = Pompier.query.count()
+            print(f"Nombre total d'utilisateurs dans la base : {total_users}")
                 
         except Exception as e:
             db.session.rollback()
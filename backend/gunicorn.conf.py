@@ -0,0 +1,56 @@
+"""
+Configuration gunicorn du mode production (cf. wsgi.py)
+
+Variables d'environnement : FLASK_HOST, FLASK_PORT, WEB_WORKERS, WEB_THREADS, WEB_TIMEOUT, METRICS_DIR
+"""
+import multiprocessing
+import os
+
+# Métriques agrégées entre workers (cf. app/metrics.py) : lu à l'import de l'application
+os.environ.setdefault('METRICS_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'metrics'))
+
+bind = f"{os.environ.get('FLASK_HOST', '0.0.0.0')}:{os.environ.get('FLASK_PORT', 5000)}"
+
+# Processus x threads : les lectures (planning, disponibilités) libèrent peu le GIL,
+# les processus servent le débit, les threads absorbent les requêtes lentes
+workers = int(os.environ.get('WEB_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('WEB_THREADS', 4))
+
+# Application (et données préchargées) créée avant le fork : mémoire partagée entre workers
+preload_app = True
+
+# POST /planning/optimise lance le solveur (plusieurs minutes sans cache)
+timeout = int(os.environ.get('WEB_TIMEOUT', 900))
+graceful_timeout = 30
+keepalive = 5
+
+# Workers recyclés régulièrement ; les nouveaux sont forkés du maître (données déjà chargées)
+max_requests = 2000
+max_requests_jitter = 200
+
+accesslog = '-'
+errorlog = '-'
+
+# ---------- Métriques (un instantané par processus dans METRICS_DIR) ----------
+def on_starting(server):
+    from app import metrics
+    metrics.reset_dir()
+
+def when_ready(server):
+    # Consultations des caches du préchargement : comptées une fois, par le maître
+    from app import metrics
+    metrics.flush()
+
+def post_fork(server, worker):
+    from app import metrics
+    metrics.worker_started()
+
+def worker_exit(server, worker):
+    from app import metrics
+    metrics.flush()
+
+def child_exit(server, worker):
+    # Workers recyclés (max_requests) : leurs compteurs sont conservés dans archive.json
+    from app import metrics
+    metrics.archive(worker.pid)
@@ -8,6 +8,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app import create_app, db
 from app.models import Pompier
+from app.import_comptes import importer_comptes
 import pandas as pd
 import secrets
 import string
@@ -72,59 +73,46 @@ def import_all_pompiers():
             print("❌ Aucun pompier trouvé dans les données de planning")
             return
         
-        # Récupérer les pompiers déjà existants en base
-        pompiers_existants = {p.nom for p in Pompier.query.all()}
-        
-        pompiers_ajoutes = 0
-        pompiers_ignores = 0
+        rows = [{
+            'nom': pompier_id,
+            'prenom': f"Pompier {pompier_id}",
+            'grade': "Sapeur de 2ème classe (2CL)",  # Grade par défaut
+            'email': f"pompier.{pompier_id.lower()}@pompiers-pibrac.fr",
+            'adresse': "",
+            'type_pompier': 'volontaire',
+            'role': 'user',
+            'ligne': f"Pompier {pompier_id}"
+        } for pompier_id in pompiers_planning]
         
         print("\n🔄 Import des pompiers en cours...")
         print("=" * 50)
         
-        for pompier_id in pompiers_planning:
-            if pompier_id in pompiers_existants:
-                print(f"⏭️  Pompier {pompier_id} existe déjà - ignoré")
-                pompiers_ignores += 1
-                continue
-            
-            # Générer un mot de passe sécurisé
-            password = generate_password(12)
-            
-            # Créer le nouveau pompier
-            nouveau_pompier = Pompier(
-                nom=pompier_id,
-                prenom=f"Pompier {pompier_id}",
-                grade="Sapeur de 2ème classe (2CL)",  # Grade par défaut
-                email=f"pompier.{pompier_id.lower()}@pompiers-pibrac.fr",
-                adresse="",
-                type_pompier='volontaire',
-                role='user'
-            )
-            nouveau_pompier.set_password(password)
-            
-            # Sauvegarder en base
-            db.session.add(nouveau_pompier)
-            
-            print(f"✅ Pompier {pompier_id} ajouté")
-            print(f"   📧 Email: {nouveau_pompier.email}")
-            print(f"   🔑 Mot de passe: {password}")
-            
-            pompiers_ajoutes += 1
-        
-        # Sauvegarder tous les changements
+        # Comptes existants (même email) ignorés ; mots de passe hachés en parallèle
         try:
-            db.session.commit()
-            print("\n" + "=" * 50)
-            print(f"🎉 Import terminé avec succès !")
-            print(f"✅ {pompiers_ajoutes} pompiers ajoutés")
-            print(f"⏭️  {pompiers_ignores} pompiers existants ignorés")
-            print(f"📊 Total en base: {Pompier.query.count()} pompiers")
-            print("\n📝 Note: Les mots de passe générés sont affichés ci-dessus.")
-            print("   Vous devriez les communiquer aux pompiers pour qu'ils puissent se connecter.")
-            
+            result = importer_comptes(rows, lambda: generate_password(12), update_existing=False)
         except Exception as e:
-            db.session.rollback()
             print(f"❌ Erreur lors de la sauvegarde: {e}")
+            return
+        
+        for compte in result['comptes']:
+            if compte['status'] == 'created':
+                print(f"✅ Pompier {compte['nom']} ajouté")
+                print(f"   📧 Email: {compte['email']}")
+                print(f"   🔑 Mot de passe: {compte['password']}")
+            else:
+                print(f"⏭️  Pompier {compte['nom']} existe déjà - ignoré")
+        for erreur in result['errors']:
+            print(f"❌ {erreur}")
+        
+        print("\n" + "=" * 50)
+        print(f"🎉 Import terminé ! ({result['duree_s']}s, {result['lignes_par_s']} lignes/s)")
+        print(f"✅ {result['created']} pompiers ajoutés")
+        print(f"⏭️  {result['ignored']} pompiers existants ignorés")
+        if result['errors']:
+            print(f"❌ {len(result['errors'])} lignes en erreur (non importées)")
+        print(f"📊 Total en base: {Pompier.query.count()} pompiers")
+        print("\n📝 Note: Les mots de passe générés sont affichés ci-dessus.")
+        print("   Vous devriez les communiquer aux pompiers pour qu'ils puissent se connecter.")
 
 if __name__ == '__main__':
     import_all_pompiers()
@@ -4,6 +4,7 @@ Script de démarrage pour l'application Flask
 """
 import os
 from app import create_app, db
+from app.models import ensure_schema
 
 # Créer l'application Flask
 app = create_app()
@@ -12,6 +13,7 @@ if __name__ == '__main__':
     # Créer les tables de base de données si elles n'existent pas
     with app.app_context():
         db.create_all()
+        ensure_schema()
         print("✅ Base de données initialisée")
     
     # Configuration pour le développement
@@ -0,0 +1,7 @@
+#!/bin/bash
+
+# Démarrage du backend en mode production (gunicorn, données préchargées)
+# Sondes : /health (vivant), /ready (données chargées)
+
+cd "$(dirname "$0")"
+exec gunicorn -c gunicorn.conf.py wsgi:app
@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+"""
+Point d'entrée production (WSGI)
+
+    gunicorn -c gunicorn.conf.py wsgi:app      (cf. start_prod.sh)
+
+L'application est créée et les données de planning préchargées dans le processus maître
+(preload_app) : les workers forkés partagent effectif, disponibilités et planning.
+"""
+from app import create_app, db
+from app.models import ensure_schema
+from app.preload import preload
+
+app = create_app()
+
+with app.app_context():
+    db.create_all()
+    ensure_schema()
+    # Pas de connexion SQLite ouverte héritée par les workers
+    db.engine.dispose()
+
+preload()
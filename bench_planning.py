@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# bench_planning.py
+# ============================================================
+# Banc de passage à l'échelle de la chaîne main.solve() sur des casernes synthétiques
+# reproductibles (effectif, horizon, mix d'habilitations, densité de disponibilités).
+# Chaque cas tourne dans un processus neuf : temps par phase (lecture, diagnostic,
+# modèle, résolution, export), pic mémoire et objectif -> bench_resultats.csv
+#
+#   python bench_planning.py --suite rapide --time 30
+#   python bench_planning.py --persons 50 200 --months 1 12 --density 0.5
+#   python bench_planning.py --suite rapide --save-baseline     (référence : bench_baseline.json)
+#   python bench_planning.py --suite rapide --compare           (code retour 1 si régression)
+# ============================================================
+
+from __future__ import annotations
+import argparse
+import contextlib
+import hashlib
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+BENCH_DIR     = "bench_planning"
+RESULTS_CSV   = "bench_resultats.csv"
+BASELINE_JSON = "bench_baseline.json"
+BENCH_START   = "2026-01-01"
+BENCH_SEED    = 0
+
+# Mix par défaut, proche de la caserne réelle
+GRADE_MIX = {"SAP": .30, "1CL": .20, "CPL": .20, "SGT": .15, "ADJ": .10, "LTN": .05}
+HAB_MIX   = {"SUAP": .90, "INC": .70, "COD0": .30, "COD1": .25, "PL": .30, "B": .85}
+# Colonnes de la feuille 2026 (titre de groupe, sous-titre) pour chaque habilitation
+HAB_HEADERS = {"SUAP": ("FORMATION", "SUAP 1ère semaine"), "INC": ("", "INC"),
+               "B": ("", "Permis B"), "PL": ("", "Permis C"), "COD0": ("", "COD 0"), "COD1": ("", "COD1")}
+
+SUITES = {
+    "rapide":  [{"persons": 50, "months": 1}, {"persons": 100, "months": 3},
+                {"persons": 200, "months": 6}],
+    "echelle": [{"persons": p, "months": m} for p, m in
+                [(50, 1), (200, 3), (200, 12), (500, 12), (1000, 12), (500, 36), (1000, 36)]],
+}
+
+# Seuils de régression (rapport au temps / pic mémoire / objectif de référence)
+TIME_TOL      = 1.25
+MEM_TOL       = 1.20
+OBJ_TOL       = 1.01
+TIMED_PHASES  = ["t_lecture", "t_diagnostic", "t_modele", "t_export"]
+
+def case_name(case: dict) -> str:
+    return f"p{case['persons']}_m{case['months']}_d{case['density']:.2f}"
+
+def station_id(case: dict) -> str:
+    """Dossier des fichiers générés : change avec la graine et les mix grades / habilitations."""
+    mix = json.dumps([case["seed"], case["grades"], case["habs"]], sort_keys=True)
+    return f"{case_name(case)}_{hashlib.sha256(mix.encode()).hexdigest()[:8]}"
+
+# ---------- Génération ----------
+def write_station(case: dict, workdir: str) -> Dict[str, str]:
+    """Classeur effectif (feuille 2026) + CSV large des disponibilités, générés une fois par cas."""
+    os.makedirs(workdir, exist_ok=True)
+    paths = {"xlsx": os.path.join(workdir, "effectif.xlsx"),
+             "csv": os.path.join(workdir, "disponibilites.csv")}
+    if all(os.path.exists(p) for p in paths.values()):
+        return paths
+    rng = np.random.default_rng([case["seed"], case["persons"], case["months"]])
+    n = case["persons"]
+    noms = [f"P{i:04d}" for i in range(n)]
+    grades = rng.choice(list(case["grades"]), size=n, p=np.array(list(case["grades"].values())) /
+                        sum(case["grades"].values()))
+    habs = {h: rng.random(n) < p for h, p in case["habs"].items()}
+
+    rows = [[""] * (2 + len(HAB_HEADERS)) for _ in range(2)]
+    rows.append(["Grade", "Nom"] + [top for top, _ in HAB_HEADERS.values()])
+    rows.append(["", ""] + [sub for _, sub in HAB_HEADERS.values()])
+    for i in range(n):
+        rows.append([grades[i], noms[i]] + ["X" if habs.get(h, np.zeros(n, bool))[i] else ""
+                                            for h in HAB_HEADERS])
+    pd.DataFrame(rows).to_excel(paths["xlsx"], sheet_name="2026", header=False, index=False)
+
+    start = pd.Timestamp(BENCH_START)
+    days = pd.date_range(start, start + pd.DateOffset(months=case["months"]) - pd.Timedelta(days=1))
+    cols = [f"{d}_creneau{s}" for d in days.strftime("%Y-%m-%d") for s in (1, 2, 3, 4)]
+    with open(paths["csv"], "w", encoding="utf-8", newline="") as f:
+        f.write(",".join(["personne"] + cols) + "\n")
+        for nom in noms:
+            ok = rng.random(len(cols)) < case["density"]
+            f.write(nom + "," + ",".join(np.where(ok, "oui", "non")) + "\n")
+    return paths
+
+# ---------- Exécution d'un cas (processus dédié) ----------
+def _peak_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def run_case(case: dict, max_time: float, workdir: str) -> dict:
+    import main
+    from arret_solveur import default_criteria
+    from ortools.sat.python import cp_model
+
+    paths = write_station(case, workdir)
+    row = {"cas": case_name(case), "personnes": case["persons"], "mois": case["months"],
+           "densite": case["density"], "rss_depart_mo": round(_peak_mb(), 1)}
+    T = {}
+    quiet = io.StringIO()
+
+    t0 = time.time()
+    with contextlib.redirect_stdout(quiet):
+        data = main.load_data(paths["xlsx"], main.XLSX_PRIORITES, paths["csv"],
+                              os.path.join(workdir, "dispos_store"),
+                              os.path.join(workdir, "personnes.json"))
+    T["t_lecture"] = time.time() - t0
+    row["jours"] = len(data["DAYS"])
+
+    t0 = time.time()
+    with contextlib.redirect_stdout(quiet):
+        main.diagnose(data["vols"], data["DISPO"], data["ELIG"], data["DAYS"],
+                      main.NEEDS_SIMPLE, main.NEEDS_C3)
+    T["t_diagnostic"] = time.time() - t0
+
+    t0 = time.time()
+    M = main.build_model(data)
+    main.set_objectives(M)
+    T["t_modele"] = time.time() - t0
+    proto = M["mdl"].Proto()
+    row.update(variables=len(proto.variables), contraintes=len(proto.constraints),
+               pic_modele_mo=round(_peak_mb(), 1))
+
+    t0 = time.time()
+    with contextlib.redirect_stdout(quiet):
+        solver, status, phases = main.solve_model(M, data["DAYS"], data["V"], False, False,
+                                                  max_time, None, default_criteria())
+    T["t_solve"] = time.time() - t0
+    row["status"] = solver.StatusName(status)
+    row["arret"] = phases[-1].get("stop_reason")
+
+    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        row["objective"] = solver.ObjectiveValue()
+        row["borne"] = solver.BestObjectiveBound()
+        row["manques"] = int(round(solver.Value(M["shortage"])))
+        t0 = time.time()
+        S = main.extract_solution(solver, M)
+        planning = main.planning_frame(S, data["vols"], main.SOFT_CONSTRAINTS)
+        planning.to_csv(os.path.join(workdir, "planning.csv"), index=False, encoding="utf-8")
+        T["t_export"] = time.time() - t0
+
+    row.update({k: round(v, 3) for k, v in T.items()})
+    row["t_total"] = round(sum(T.values()), 3)
+    row["rss_max_mo"] = round(_peak_mb(), 1)
+    return row
+
+def run_suite(cases: List[dict], max_time: float, workers: int) -> pd.DataFrame:
+    import ortools
+    rows = []
+    for case in cases:
+        name = case_name(case)
+        print(f"🧪 {name} …", flush=True)
+        # Processus neuf par cas : pic mémoire propre à ce cas
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_set_workers, initargs=(workers,)) as pool:
+            row = pool.submit(run_case, case, max_time, os.path.join(BENCH_DIR, station_id(case))).result()
+        print(f"   {row['status']} | obj={row.get('objective')} | total {row['t_total']:.1f}s "
+              f"(modèle {row['t_modele']:.1f}s, solve {row['t_solve']:.1f}s) | {row['rss_max_mo']:.0f} Mo")
+        rows.append(row)
+    df = pd.DataFrame(rows)
+    df["max_time"] = max_time
+    df["workers"] = workers
+    df["ortools"] = ortools.__version__
+    df["date"] = datetime.now().isoformat(timespec="seconds")
+    return df
+
+def _set_workers(workers: int) -> None:
+    import main
+    main.NUM_WORKERS = workers
+
+# ---------- Référence ----------
+def save_baseline(df: pd.DataFrame, path: str = BASELINE_JSON) -> None:
+    rows = df.astype(object).where(df.notna(), None).to_dict("records")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({r["cas"]: r for r in rows}, f, indent=2, ensure_ascii=False)
+    print(f"📌 Référence enregistrée: {path} ({len(rows)} cas)")
+
+def compare(df: pd.DataFrame, path: str = BASELINE_JSON) -> List[str]:
+    """Régressions par rapport à la référence (temps par phase, pic mémoire, objectif)."""
+    with open(path, encoding="utf-8") as f:
+        base = json.load(f)
+    found = []
+    for row in df.to_dict("records"):
+        ref = base.get(row["cas"])
+        if ref is None:
+            print(f"➕ {row['cas']}: absent de la référence")
+            continue
+        for col in TIMED_PHASES:
+            # Petits temps : écart absolu minimal de 0,1 s pour ignorer le bruit
+            if ref.get(col) and row.get(col) is not None and \
+                    row[col] > ref[col] * TIME_TOL and row[col] - ref[col] > 0.1:
+                found.append(f"{row['cas']}: {col} {ref[col]:.2f}s -> {row[col]:.2f}s")
+        if ref.get("rss_max_mo") and row["rss_max_mo"] > ref["rss_max_mo"] * MEM_TOL:
+            found.append(f"{row['cas']}: mémoire {ref['rss_max_mo']:.0f} -> {row['rss_max_mo']:.0f} Mo")
+        if ref.get("max_time") != row["max_time"] or ref.get("workers") != row["workers"]:
+            print(f"ℹ️  {row['cas']}: budget / workers différents de la référence, objectif non comparé")
+        elif ref.get("objective") is not None:
+            obj = row.get("objective")
+            if obj is None or obj != obj:
+                found.append(f"{row['cas']}: plus de solution ({row['status']})")
+            elif obj > ref["objective"] * OBJ_TOL + 1e-9:
+                found.append(f"{row['cas']}: objectif {ref['objective']:.0f} -> {obj:.0f}")
+    for msg in found:
+        print(f"⚠️  Régression {msg}")
+    if not found:
+        print("✅ Aucune régression par rapport à la référence.")
+    return found
+
+def build_cases(args) -> List[dict]:
+    if args.suite:
+        base = SUITES[args.suite]
+    else:
+        base = [{"persons": p, "months": m} for p, m in itertools.product(args.persons, args.months)]
+    grades = json.loads(args.grades) if args.grades else GRADE_MIX
+    habs = dict(HAB_MIX, **json.loads(args.habs)) if args.habs else HAB_MIX
+    return [dict(c, density=d, grades=grades, habs=habs, seed=args.seed)
+            for c in base for d in args.density]
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Banc de passage à l'échelle de la planification")
+    ap.add_argument("--suite", choices=sorted(SUITES), help="jeu de cas prédéfini")
+    ap.add_argument("--persons", type=int, nargs="+", default=[50], help="effectifs (50 à 1000)")
+    ap.add_argument("--months", type=int, nargs="+", default=[1], help="horizons en mois (1 à 36)")
+    ap.add_argument("--density", type=float, nargs="+", default=[0.5], help="part de créneaux disponibles")
+    ap.add_argument("--grades", help='mix de grades JSON, ex. {"SAP": 0.5, "SGT": 0.5}')
+    ap.add_argument("--habs", help='taux d\'habilitation JSON, ex. {"PL": 0.1}')
+    ap.add_argument("--seed", type=int, default=BENCH_SEED)
+    ap.add_argument("--time", type=float, default=30.0, help="budget de résolution par cas (s)")
+    ap.add_argument("--workers", type=int, default=8, help="workers CP-SAT")
+    ap.add_argument("--out", default=RESULTS_CSV)
+    ap.add_argument("--save-baseline", action="store_true", help="enregistrer comme référence")
+    ap.add_argument("--compare", action="store_true", help="comparer à la référence")
+    args = ap.parse_args()
+
+    df = run_suite(build_cases(args), args.time, args.workers)
+    df.to_csv(args.out, index=False, encoding="utf-8")
+    print(f"📄 Résultats: {args.out}")
+    if args.save_baseline:
+        save_baseline(df)
+    if args.compare:
+        sys.exit(1 if compare(df) else 0)
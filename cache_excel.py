@@ -0,0 +1,74 @@
+# cache_excel.py
+# ============================================================
+# Cache des classeurs Excel déjà interprétés (effectif, matrice de priorités)
+# Clé = SHA-256 du contenu du classeur + type de lecture : le classeur n'est relu
+# (openpyxl) que s'il change. Une entrée = cache_excel/<type>_<clé>.npz, gardée aussi
+# en mémoire pour les requêtes suivantes du même processus.
+# ============================================================
+
+from __future__ import annotations
+import glob
+import hashlib
+import os
+import threading
+from typing import Callable, Dict, Tuple
+
+import numpy as np
+
+EXCEL_CACHE_DIR         = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache_excel")
+EXCEL_CACHE_MAX_ENTRIES = 10
+EXCEL_CACHE_FORMAT      = 1        # à incrémenter si une lecture change de résultat
+
+_digests: Dict[str, Tuple[int, int, str]] = {}     # chemin -> (taille, mtime_ns, sha256)
+_memo: Dict[str, Dict[str, np.ndarray]] = {}       # nom d'entrée -> tableaux
+_lock = threading.Lock()
+STATS = {"hit": 0, "miss": 0}                      # consultations depuis le démarrage (métriques API)
+
+def file_digest(path: str) -> str:
+    """SHA-256 du contenu ; recalculé seulement si taille ou date de modification changent."""
+    st = os.stat(path)
+    known = _digests.get(os.path.abspath(path))
+    if known and known[:2] == (st.st_size, st.st_mtime_ns):
+        return known[2]
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    _digests[os.path.abspath(path)] = (st.st_size, st.st_mtime_ns, h.hexdigest())
+    return h.hexdigest()
+
+def cached(xlsx_path: str, kind: str, parse: Callable[[str], Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    """Tableaux produits par parse(xlsx_path), relus depuis le cache si le classeur n'a pas changé."""
+    name = f"{kind}_{file_digest(xlsx_path)[:24]}_v{EXCEL_CACHE_FORMAT}"
+    path = os.path.join(EXCEL_CACHE_DIR, f"{name}.npz")
+    base = os.path.basename(xlsx_path)
+    with _lock:
+        if name in _memo:
+            STATS["hit"] += 1
+            return _memo[name]
+        STATS["hit" if os.path.exists(path) else "miss"] += 1
+        if os.path.exists(path):
+            with np.load(path) as z:
+                arrays = {k: z[k] for k in z.files}
+            os.utime(path)
+            print(f"⚡ Cache Excel (hit) {kind}: {base}")
+        else:
+            print(f"📖 Cache Excel (miss) {kind}: lecture de {base}")
+            arrays = parse(xlsx_path)
+            os.makedirs(EXCEL_CACHE_DIR, exist_ok=True)
+            np.savez(f"{path}.tmp.npz", **arrays)
+            os.replace(f"{path}.tmp.npz", path)
+            _evict()
+        # Une seule version par type en mémoire (celle du classeur courant)
+        for k in [k for k in _memo if k.startswith(f"{kind}_")]:
+            del _memo[k]
+        for a in arrays.values():
+            a.setflags(write=False)          # partagés entre appels : lecture seule
+        _memo[name] = arrays
+        return arrays
+
+def _evict(max_entries: int = EXCEL_CACHE_MAX_ENTRIES) -> None:
+    entries = glob.glob(os.path.join(EXCEL_CACHE_DIR, "*.npz"))
+    entries.sort(key=os.path.getmtime, reverse=True)
+    for p in entries[max_entries:]:
+        os.remove(p)
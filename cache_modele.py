@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# cache_modele.py
+# ============================================================
+# Cache du CpModel construit par main.build_model, adressé par les fichiers d'entrée
+# Clé = SHA-256 du contenu des fichiers lus (classeurs, CSV des disponibilités, règles d'éligibilité,
+# registre des ids), du code qui construit le modèle, des constantes du modèle et de l'horizon figé :
+# calculable sans rien parser, un succès évite la lecture des données ET la construction.
+# Une entrée = <clé>.pbtxt (modèle) + <clé>.index.json (index proto des variables z/x/y/h,
+# des manques et des termes d'objectif) + <clé>.json (effectif, jours, empreinte des données pour
+# cache_planning), relisible directement dans un nouveau CpSolver.
+#
+#   python cache_modele.py --list
+#   python cache_modele.py --solve <clé|préfixe|latest> --time 30 --param num_search_workers=4
+# ============================================================
+
+from __future__ import annotations
+import argparse
+import glob
+import hashlib
+import json
+import os
+import time
+from typing import Dict, List, Optional
+from ortools.sat.python import cp_model
+
+import cache_excel
+
+MODEL_CACHE_DIR         = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache_modeles")
+MODEL_CACHE_MAX_ENTRIES = 5        # ~30 Mo par modèle annuel
+
+# ---------- Sérialisation modèle ----------
+# Format texte : seul format relisible avec toutes les versions d'OR-Tools
+# (le proto pybind des versions récentes n'expose pas de parsing binaire).
+def export_model(mdl: cp_model.CpModel, path: str) -> None:
+    if not path.endswith("txt"):
+        raise ValueError("Le modèle doit être exporté en format texte (.pbtxt).")
+    if not mdl.ExportToFile(path):
+        raise IOError(f"Échec de l'export du modèle vers {path}")
+
+def load_model(path: str) -> cp_model.CpModel:
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    mdl = cp_model.CpModel()
+    proto = mdl.Proto()
+    if hasattr(proto, "parse_text_format"):
+        proto.parse_text_format(text)
+        if hasattr(mdl, "rebuild_constant_map"):
+            mdl.rebuild_constant_map()
+    else:
+        from google.protobuf import text_format
+        text_format.Parse(text, proto)
+    return mdl
+
+# ---------- Clé ----------
+def model_key(paths: List[str], params: dict) -> str:
+    """Empreinte des fichiers (contenu, mémorisé sur taille + mtime) et des paramètres."""
+    h = hashlib.sha256()
+    for p in paths:
+        # Registre des ids absent au premier lancement : créé par load_data
+        digest = cache_excel.file_digest(p) if os.path.exists(p) else "-"
+        h.update(f"{os.path.basename(p)}={digest}\n".encode("utf-8"))
+    h.update(json.dumps(params, sort_keys=True, default=str).encode("utf-8"))
+    return h.hexdigest()
+
+# ---------- Index des variables ----------
+def _index(M: dict) -> dict:
+    return {
+        "z": [[v, d, s, var.Index()] for (v, d, s), var in M["z"].items()],
+        "x": [[v, d, r, var.Index()] for (v, d, r), var in M["x"].items()],
+        "y": [[v, d, var.Index()] for (v, d), var in M["y"].items()],
+        "h": [[v, var.Index()] for v, var in M["h"].items()],
+        "spread": M["spread"].Index(),
+        "short_simple": [[d, s, var.Index()] for (d, s), var in M["short_simple"].items()],
+        "short_c3": [[d, r, var.Index()] for (d, r), var in M["short_c3"].items()],
+        "shortage_terms": [[var.Index(), c] for var, c in M["shortage_terms"]],
+        "quality_terms": [[var.Index(), c] for var, c in M["quality_terms"]],
+        "stats": M.get("stats"),
+    }
+
+def _rebuild(mdl: cp_model.CpModel, idx: dict) -> dict:
+    b = mdl.GetBoolVarFromProtoIndex
+    i = mdl.GetIntVarFromProtoIndex
+    M = {
+        "mdl": mdl,
+        "z": {(v, d, s): b(k) for v, d, s, k in idx["z"]},
+        "x": {(v, d, r): b(k) for v, d, r, k in idx["x"]},
+        "y": {(v, d): b(k) for v, d, k in idx["y"]},
+        "h": {v: i(k) for v, k in idx["h"]},
+        "spread": i(idx["spread"]),
+        "short_simple": {(d, s): i(k) for d, s, k in idx["short_simple"]},
+        "short_c3": {(d, r): i(k) for d, r, k in idx["short_c3"]},
+        "stats": idx.get("stats"),
+    }
+    # Termes d'objectif : mêmes objets que les variables déjà relues (~100k termes)
+    known = {var.Index(): var for fam in ("z", "x", "y", "h", "short_simple", "short_c3")
+             for var in M[fam].values()}
+    for terms in ("shortage_terms", "quality_terms"):
+        M[terms] = [(known[k] if k in known else i(k), c) for k, c in idx[terms]]
+    return M
+
+# ---------- Effectif (JSON : ids en texte, habilitations en liste) ----------
+def _vols_json(vols: Dict[int, dict]) -> dict:
+    return {str(v): dict(p, habs=sorted(p["habs"])) for v, p in vols.items()}
+
+def _vols_from_json(vols: dict) -> Dict[int, dict]:
+    return {int(v): dict(p, habs=set(p["habs"])) for v, p in vols.items()}
+
+# ---------- Entrées ----------
+def _paths(key: str):
+    return (os.path.join(MODEL_CACHE_DIR, f"{key}.pbtxt"),
+            os.path.join(MODEL_CACHE_DIR, f"{key}.index.json"),
+            os.path.join(MODEL_CACHE_DIR, f"{key}.json"))
+
+def _write_json(path: str, obj) -> None:
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(f"{path}.tmp", path)
+
+def save(key: str, M: dict, meta: dict) -> None:
+    """Enregistre le modèle (avant résolution : ni hint ni contraintes lexicographiques)
+    et `meta` (cf. lookup) ; le fichier meta, écrit en dernier, valide l'entrée."""
+    os.makedirs(MODEL_CACHE_DIR, exist_ok=True)
+    model_path, index_path, meta_path = _paths(key)
+    export_model(M["mdl"], f"{model_path}.tmp.pbtxt")
+    os.replace(f"{model_path}.tmp.pbtxt", model_path)
+    _write_json(index_path, _index(M))
+    _write_json(meta_path, dict(meta, vols=_vols_json(meta["vols"])))
+    _evict()
+
+def lookup(key: str) -> Optional[dict]:
+    """Données de l'entrée sans relire le modèle (vols, DAYS, V, ...), ou None."""
+    model_path, index_path, meta_path = _paths(key)
+    if not all(os.path.exists(p) for p in (model_path, index_path, meta_path)):
+        return None
+    with open(meta_path, encoding="utf-8") as f:
+        meta = json.load(f)
+    for p in (model_path, index_path, meta_path):
+        os.utime(p)
+    return dict(meta, vols=_vols_from_json(meta["vols"]))
+
+def load(key: str) -> Optional[dict]:
+    """Modèle + variables indexées (sans les expressions d'objectif : cf. main.objective_exprs)."""
+    model_path, index_path, _meta_path = _paths(key)
+    if not (os.path.exists(model_path) and os.path.exists(index_path)):
+        return None
+    mdl = load_model(model_path)
+    with open(index_path, encoding="utf-8") as f:
+        idx = json.load(f)
+    return _rebuild(mdl, idx)
+
+def _evict(max_entries: int = MODEL_CACHE_MAX_ENTRIES) -> None:
+    entries = [p for p in glob.glob(os.path.join(MODEL_CACHE_DIR, "*.json"))
+               if not p.endswith(".index.json")]
+    entries.sort(key=os.path.getmtime, reverse=True)
+    for meta_path in entries[max_entries:]:
+        for p in _paths(os.path.basename(meta_path)[:-len(".json")]):
+            if os.path.exists(p):
+                os.remove(p)
+
+def _keys() -> List[str]:
+    entries = sorted(glob.glob(os.path.join(MODEL_CACHE_DIR, "*.index.json")),
+                     key=os.path.getmtime, reverse=True)
+    return [os.path.basename(p)[:-len(".index.json")] for p in entries]
+
+def _resolve(ref: str) -> str:
+    keys = _keys()
+    if ref == "latest" and keys:
+        return keys[0]
+    match = [k for k in keys if k.startswith(ref)]
+    if len(match) != 1:
+        raise SystemExit(f"Référence de modèle introuvable ou ambiguë: {ref}")
+    return match[0]
+
+if __name__ == "__main__":
+    import main
+    ap = argparse.ArgumentParser(description="Modèles CP-SAT en cache (benchmark hors ligne)")
+    ap.add_argument("--list", action="store_true", help="lister les modèles en cache")
+    ap.add_argument("--solve", metavar="CLE", help="résoudre un modèle en cache (clé, préfixe ou latest)")
+    ap.add_argument("--time", type=float, default=60.0, help="budget (s)")
+    ap.add_argument("--param", action="append", default=[],
+                    help="paramètre CP-SAT nom=valeur (répétable), appliqué après solver_profile.json")
+    args = ap.parse_args()
+
+    if args.list:
+        for key in _keys():
+            size = os.path.getsize(_paths(key)[0]) / 1e6
+            meta = lookup(key) or {}
+            print(f"{key}  {size:.1f} Mo  {len(meta.get('V', []))} volontaires x "
+                  f"{len(meta.get('DAYS', []))} jours  {time.ctime(os.path.getmtime(_paths(key)[1]))}")
+
+    if args.solve:
+        key = _resolve(args.solve)
+        t0 = time.time()
+        M = load(key)
+        main.objective_exprs(M)
+        print(f"📦 Modèle {key[:12]} relu en {time.time() - t0:.2f}s "
+              f"({len(M['z']) + len(M['x'])} variables z/x)")
+        solver = main._new_solver(args.time)
+        values = {}
+        for kv in args.param:
+            k, v = kv.split("=", 1)
+            # Entiers / flottants / booléens ; sinon nom d'énumération (cf. main.apply_params)
+            val = {"true": True, "false": False}.get(v.lower(), v)
+            if isinstance(val, str):
+                for cast in (int, float):
+                    try:
+                        val = cast(v)
+                        break
+                    except ValueError:
+                        pass
+            values[k] = val
+        main.apply_params(solver.parameters, values)
+        t0 = time.time()
+        status = solver.Solve(M["mdl"])
+        print(f"Status: {solver.StatusName(status)} | Objective: {solver.ObjectiveValue()} "
+              f"| Bound: {solver.BestObjectiveBound()} | Temps: {time.time() - t0:.1f}s")
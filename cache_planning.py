@@ -0,0 +1,87 @@
+# cache_planning.py
+# ============================================================
+# Cache des résultats de solve(), adressé par contenu
+# Clé = SHA-256 de l'empreinte des données lues (volontaires, éligibilité, priorités, dispos,
+#       lignes figées du planning) + paramètres du modèle et du solveur. Une entrée = <clé>.csv (planning) + <clé>.json (stats).
+# Éviction LRU sur disque (mtime rafraîchi à chaque lecture).
+# ============================================================
+
+from __future__ import annotations
+import hashlib
+import json
+import os
+import shutil
+from typing import Optional, Tuple
+import pandas as pd
+
+CACHE_DIR         = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache_planning")
+CACHE_MAX_ENTRIES = 20
+STATS             = {"hit": 0, "miss": 0}    # consultations depuis le démarrage (métriques API)
+
+def _canonical(data: dict) -> dict:
+    """Représentation stable (triée, sérialisable) des données lues."""
+    vols = {v: [p["nom"], p["grade"], sorted(p["habs"])] for v, p in data["vols"].items()}
+    prio = sorted([g, r, s] for (g, r), s in data["priorites"].items())
+    dispo = sorted([v, d, s, ok, pref] for (v, d, s), (ok, pref) in data["DISPO"].items())
+    # Éligibilité : dépend aussi des règles (eligibilite.json), pas seulement de l'effectif
+    out = {"vols": vols, "priorites": prio, "dispo": dispo, "elig": data["ELIG"].astype(int).tolist()}
+    if data.get("FROZEN"):
+        # Horizon glissant : les affectations figées font partie des entrées
+        out["frozen"] = data["FROZEN"]
+    return out
+
+def frame_digest(df: pd.DataFrame) -> str:
+    """Empreinte du contenu d'un tableau (colonnes comprises), indépendante de l'index."""
+    h = hashlib.sha256(json.dumps(list(map(str, df.columns))).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+def data_digest(data: dict, frozen_rows: Optional[pd.DataFrame] = None) -> str:
+    """Empreinte des données lues et des lignes figées du planning (recopiées telles quelles
+    dans l'export) ; conservée avec le modèle en cache (cf. cache_modele) pour retrouver
+    le résultat sans relire les fichiers."""
+    canon = json.dumps(_canonical(data), sort_keys=True, separators=(",", ":"))
+    h = hashlib.sha256(canon.encode("utf-8"))
+    if frozen_rows is not None:
+        h.update(frame_digest(frozen_rows).encode("utf-8"))
+    return h.hexdigest()
+
+def input_hash(digest: str, params: dict) -> str:
+    h = hashlib.sha256(digest.encode("utf-8"))
+    h.update(json.dumps(params, sort_keys=True, default=str).encode("utf-8"))
+    return h.hexdigest()
+
+def _paths(key: str):
+    return os.path.join(CACHE_DIR, f"{key}.csv"), os.path.join(CACHE_DIR, f"{key}.json")
+
+def lookup(key: str) -> Optional[Tuple[str, dict]]:
+    """(chemin du planning en cache, stats), ou None. Le planning n'est pas copié :
+    l'appelant le republie (cf. planning_store.publish)."""
+    csv_path, json_path = _paths(key)
+    if not (os.path.exists(csv_path) and os.path.exists(json_path)):
+        STATS["miss"] += 1
+        return None
+    STATS["hit"] += 1
+    with open(json_path, encoding="utf-8") as f:
+        stats = json.load(f)
+    os.utime(csv_path)
+    os.utime(json_path)
+    return csv_path, stats
+
+def store(key: str, planning_path: str, stats: dict) -> None:
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    csv_path, json_path = _paths(key)
+    shutil.copyfile(planning_path, f"{csv_path}.tmp")
+    os.replace(f"{csv_path}.tmp", csv_path)
+    with open(f"{json_path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(stats, f, ensure_ascii=False, default=str)
+    os.replace(f"{json_path}.tmp", json_path)
+    _evict()
+
+def _evict(max_entries: int = CACHE_MAX_ENTRIES) -> None:
+    entries = [os.path.join(CACHE_DIR, f) for f in os.listdir(CACHE_DIR) if f.endswith(".json")]
+    entries.sort(key=os.path.getmtime, reverse=True)
+    for json_path in entries[max_entries:]:
+        for p in (json_path, json_path[:-5] + ".csv"):
+            if os.path.exists(p):
+                os.remove(p)
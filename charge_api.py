@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+# charge_api.py
+# ============================================================
+# Test de charge de l'API planning (Flask) : des clients concurrents rejouent les parcours
+# du frontend — navigation mois par mois (PlanningCalendrier.tsx), suivi des heures
+# (SuiviHeures.tsx), détail d'un créneau, rafales de relectures après saisie de disponibilités.
+# Rapport p50 / p95 / p99 et débit par route et par niveau de concurrence -> charge_resultats.csv
+# (dimensionnement du serveur de caserne pour la pointe du soir).
+#
+#   python charge_api.py                                   # serveur Flask local lancé à part
+#   python charge_api.py --clients 1 8 32 --duree 30 --pause 0.5
+#   python charge_api.py --url http://caserne:5000 --mix calendrier=5,heures=3,edition=2
+#   python charge_api.py --ecrire-dispos 10                # + CSV des dispos réécrit toutes les 10 s
+# ============================================================
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+ROOT         = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR  = os.path.join(ROOT, "backend")
+DISPOS_CSV   = os.path.join(ROOT, "disponibilites_2026.csv")
+RESULTS_CSV  = "charge_resultats.csv"
+CHARGE_YEAR  = 2025          # année couverte par les disponibilités et le planning publiés
+CHARGE_SEED  = 0
+TIMEOUT_S    = 60.0
+
+# Part de chaque parcours dans le trafic (pointe du soir : surtout consultation)
+DEFAULT_MIX = {"calendrier": 5, "heures": 3, "creneau": 3, "edition": 1}
+
+Step = Tuple[str, str, str, Optional[dict]]          # (route, méthode, chemin, corps JSON)
+
+# ---------- Parcours (mêmes appels que le frontend) ----------
+def parcours_calendrier(rng: random.Random, ctx: dict) -> List[Step]:
+    """Ouverture du calendrier, puis 1 à 4 changements de mois (PlanningCalendrier.tsx)."""
+    month = rng.randint(1, 12)
+    pompier = rng.choice(ctx["pompiers"])
+    steps = [("/planning/pompiers", "GET", "/api/planning/pompiers", None),
+             ("/planning/disponibilites", "GET", "/api/planning/disponibilites", None),
+             ("/planning/optimise", "GET", "/api/planning/optimise", None)]
+    for _ in range(rng.randint(1, 4)):
+        steps += [("/planning/calendar/<year>/<month>", "GET",
+                   f"/api/planning/calendar/{CHARGE_YEAR}/{month}", None),
+                  ("/planning/disponibilites?pompier", "GET",
+                   f"/api/planning/disponibilites?pompier={_q(pompier)}&mois={month}&annee={CHARGE_YEAR}",
+                   None)]
+        month = month % 12 + 1
+    return steps
+
+def parcours_heures(rng: random.Random, ctx: dict) -> List[Step]:
+    """Page de suivi des heures : liste des pompiers puis planning complet (SuiviHeures.tsx)."""
+    steps = [("/planning/pompiers", "GET", "/api/planning/pompiers", None)]
+    # Chaque changement de pompier recharge le planning complet
+    steps += [("/planning/optimise", "GET", "/api/planning/optimise", None)] * rng.randint(1, 3)
+    return steps
+
+def parcours_creneau(rng: random.Random, ctx: dict) -> List[Step]:
+    """Détail de quelques créneaux d'un même mois."""
+    month = rng.randint(1, 12)
+    steps = []
+    for _ in range(rng.randint(2, 6)):
+        day = f"{CHARGE_YEAR}-{month:02d}-{rng.randint(1, 28):02d}"
+        steps.append(("/planning/optimise/<date>/<creneau>", "GET",
+                      f"/api/planning/optimise/{day}/{rng.randint(1, 4)}", None))
+    return steps
+
+def parcours_edition(rng: random.Random, ctx: dict) -> List[Step]:
+    """Rafale après saisie de disponibilités : relecture de la personne mois par mois
+    puis rechargement global des disponibilités."""
+    pompier = rng.choice(ctx["pompiers"])
+    month = rng.randint(1, 12)
+    steps = [("/planning/disponibilites?pompier", "GET",
+              f"/api/planning/disponibilites?pompier={_q(pompier)}&mois={(month + k - 1) % 12 + 1}"
+              f"&annee={CHARGE_YEAR}", None) for k in range(rng.randint(3, 8))]
+    steps.append(("/planning/disponibilites", "GET", "/api/planning/disponibilites", None))
+    return steps
+
+PARCOURS: Dict[str, Callable[[random.Random, dict], List[Step]]] = {
+    "calendrier": parcours_calendrier,
+    "heures": parcours_heures,
+    "creneau": parcours_creneau,
+    "edition": parcours_edition,
+}
+
+def _q(s: str) -> str:
+    return urllib.request.quote(s, safe="")
+
+# ---------- Client HTTP ----------
+def request(base_url: str, method: str, path: str, body: Optional[dict]) -> Tuple[int, int]:
+    """(code HTTP, octets reçus) ; code 0 si la connexion a échoué."""
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(base_url + path, data=data, method=method,
+                                 headers={"Content-Type": "application/json"} if data else {})
+    try:
+        with urllib.request.urlopen(req, timeout=TIMEOUT_S) as resp:
+            return resp.status, len(resp.read())
+    except urllib.error.HTTPError as e:
+        return e.code, len(e.read())
+    except (urllib.error.URLError, OSError):
+        return 0, 0
+
+def run_level(base_url: str, clients: int, duree: float, mix: Dict[str, float],
+              pause: float, ctx: dict, seed: int) -> pd.DataFrame:
+    """`clients` utilisateurs en boucle fermée pendant `duree` s ; une ligne par requête."""
+    names = [n for n in mix if mix[n] > 0]
+    weights = [mix[n] for n in names]
+    rows: List[tuple] = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duree
+
+    def client(k: int) -> None:
+        rng = random.Random(seed * 1000 + k)
+        local = []
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            for route, method, path, body in PARCOURS[name](rng, ctx):
+                if time.perf_counter() >= deadline:
+                    break
+                t0 = time.perf_counter()
+                status, size = request(base_url, method, path, body)
+                local.append((name, f"{method} {route}", status, size, time.perf_counter() - t0, t0))
+                if pause:
+                    time.sleep(rng.expovariate(1 / pause))
+        with lock:
+            rows.extend(local)
+
+    threads = [threading.Thread(target=client, args=(k,), daemon=True) for k in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return pd.DataFrame(rows, columns=["parcours", "route", "status", "octets", "latence_s", "t0"])
+
+def summarize(df: pd.DataFrame, clients: int, duree: float) -> pd.DataFrame:
+    """p50 / p95 / p99 / max (ms), erreurs et débit par route, plus une ligne « TOTAL »."""
+    out = []
+    groups = list(df.groupby("route", sort=True)) + [("TOTAL", df)]
+    for route, g in groups:
+        lat = g["latence_s"].to_numpy() * 1000
+        p50, p95, p99 = np.percentile(lat, [50, 95, 99]) if len(lat) else (np.nan,) * 3
+        out.append({"clients": clients, "route": route, "requetes": len(g),
+                    "erreurs": int((~g["status"].between(200, 399)).sum()),
+                    "p50_ms": round(p50, 1), "p95_ms": round(p95, 1), "p99_ms": round(p99, 1),
+                    "max_ms": round(lat.max(), 1) if len(lat) else np.nan,
+                    "debit_rps": round(len(g) / duree, 2),
+                    "ko_moyen": round(g["octets"].mean() / 1024, 1) if len(g) else np.nan})
+    return pd.DataFrame(out)
+
+# ---------- Serveur local ----------
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def serve(port: int) -> None:
+    """Application Flask servie par werkzeug en multi-thread (comme run.py, sans debug)."""
+    sys.path.insert(0, BACKEND_DIR)
+    os.chdir(BACKEND_DIR)
+    from werkzeug.serving import make_server
+    from app import create_app
+    make_server("127.0.0.1", port, create_app(), threaded=True).serve_forever()
+
+def start_server() -> Tuple[subprocess.Popen, str]:
+    """Serveur dans un processus séparé : les clients ne partagent pas son GIL."""
+    port = _free_port()
+    proc = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--serveur", str(port)],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(300):
+        if request(url, "GET", "/health", None)[0] == 200:
+            return proc, url
+        if proc.poll() is not None:
+            break
+        time.sleep(0.1)
+    proc.kill()
+    raise SystemExit("❌ Le serveur Flask local n'a pas démarré.")
+
+# ---------- Écritures de disponibilités ----------
+class DisposWriter(threading.Thread):
+    """Réécrit le CSV des disponibilités toutes les `every` s (une case basculée) pour mesurer
+    la réingestion sous charge ; le fichier d'origine est restauré par restore()."""
+
+    def __init__(self, every: float, seed: int):
+        super().__init__(daemon=True)
+        self.every = every
+        self.rng = random.Random(seed)
+        self.stop = threading.Event()
+        self.writes = 0
+        self.backup = f"{DISPOS_CSV}.charge.bak"
+        shutil.copy2(DISPOS_CSV, self.backup)
+
+    def run(self) -> None:
+        df = pd.read_csv(self.backup, dtype=str, keep_default_na=False, encoding="utf-8-sig")
+        while not self.stop.wait(self.every):
+            col = self.rng.choice(list(df.columns[1:]))
+            row = self.rng.randrange(len(df))
+            df.iat[row, df.columns.get_loc(col)] = "non" if df.iat[row, df.columns.get_loc(col)] == "oui" else "oui"
+            df.to_csv(f"{DISPOS_CSV}.tmp", index=False, encoding="utf-8-sig")
+            os.replace(f"{DISPOS_CSV}.tmp", DISPOS_CSV)
+            self.writes += 1
+
+    def restore(self) -> None:
+        self.stop.set()
+        self.join()
+        os.replace(self.backup, DISPOS_CSV)
+
+def parse_mix(text: Optional[str]) -> Dict[str, float]:
+    if not text:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in PARCOURS:
+            raise SystemExit(f"Parcours inconnu: {name} (choix: {', '.join(PARCOURS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+def run(base_url: str, levels: List[int], duree: float, mix: Dict[str, float], pause: float,
+        seed: int, warmup: float) -> pd.DataFrame:
+    status, _ = request(base_url, "GET", "/api/planning/pompiers", None)
+    if status != 200:
+        raise SystemExit(f"❌ /api/planning/pompiers indisponible (code {status}).")
+    with urllib.request.urlopen(base_url + "/api/planning/pompiers", timeout=TIMEOUT_S) as resp:
+        ctx = {"pompiers": json.load(resp)["pompiers"]}
+    if warmup > 0:
+        # Caches froids (Excel, disponibilités, partitions du planning) exclus des mesures
+        run_level(base_url, 1, warmup, mix, 0, ctx, seed)
+    reports = []
+    for clients in levels:
+        print(f"🚦 {clients} client(s) pendant {duree:.0f}s …", flush=True)
+        df = run_level(base_url, clients, duree, mix, pause, ctx, seed)
+        rep = summarize(df, clients, duree)
+        tot = rep.iloc[-1]
+        print(f"   {tot['requetes']} requêtes, {tot['debit_rps']} req/s | p50 {tot['p50_ms']} ms, "
+              f"p95 {tot['p95_ms']} ms, p99 {tot['p99_ms']} ms | erreurs {tot['erreurs']}")
+        reports.append(rep)
+    out = pd.concat(reports, ignore_index=True)
+    out["duree_s"] = duree
+    out["pause_s"] = pause
+    out["mix"] = json.dumps(mix, sort_keys=True)
+    out["date"] = datetime.now().isoformat(timespec="seconds")
+    return out
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Test de charge de l'API planning")
+    ap.add_argument("--url", help="serveur existant (défaut : serveur Flask local lancé pour le test)")
+    ap.add_argument("--clients", type=int, nargs="+", default=[1, 4, 16], help="niveaux de concurrence")
+    ap.add_argument("--duree", type=float, default=20.0, help="durée par niveau (s)")
+    ap.add_argument("--pause", type=float, default=0.0,
+                    help="temps de réflexion moyen entre deux requêtes d'un client (s, 0 = saturation)")
+    ap.add_argument("--mix", help="poids des parcours, ex. calendrier=5,heures=3,creneau=3,edition=1")
+    ap.add_argument("--warmup", type=float, default=3.0, help="préchauffage des caches (s)")
+    ap.add_argument("--ecrire-dispos", type=float, default=0.0, metavar="S",
+                    help="serveur local : réécrire le CSV des disponibilités toutes les S s")
+    ap.add_argument("--seed", type=int, default=CHARGE_SEED)
+    ap.add_argument("--out", default=RESULTS_CSV)
+    ap.add_argument("--serveur", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.serveur:
+        serve(args.serveur)
+        sys.exit(0)
+
+    proc, writer = None, None
+    base_url = args.url
+    if base_url is None:
+        proc, base_url = start_server()
+        print(f"🔧 Serveur local: {base_url}")
+    elif args.ecrire_dispos:
+        raise SystemExit("--ecrire-dispos ne s'utilise qu'avec le serveur local.")
+    try:
+        if args.ecrire_dispos:
+            writer = DisposWriter(args.ecrire_dispos, args.seed)
+            writer.start()
+        df = run(base_url.rstrip("/"), args.clients, args.duree, parse_mix(args.mix), args.pause,
+                 args.seed, args.warmup)
+    finally:
+        if writer is not None:
+            writer.restore()
+            print(f"✏️  {writer.writes} réécriture(s) du CSV des disponibilités (fichier restauré)")
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+    with pd.option_context("display.width", 200, "display.max_columns", 20):
+        print(df[["clients", "route", "requetes", "erreurs", "p50_ms", "p95_ms", "p99_ms",
+                  "max_ms", "debit_rps"]].to_string(index=False))
+    df.to_csv(args.out, index=False, encoding="utf-8")
+    print(f"📄 Résultats: {args.out}")
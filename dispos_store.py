@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# dispos_store.py
+# ============================================================
+# Ingestion par blocs du CSV large des disponibilités (personne, YYYY-MM-DD_creneauN...)
+# vers un stockage compact par année : dispos_store/dispos_<année>_<génération>.npz
+#   persons (clés), days (dates), dispo (uint8 [personne, jour, créneau]), present (colonnes lues)
+# Le fichier est lu année par année (colonnes) et par paquets de lignes : la mémoire de pointe
+# dépend de DISPO_CHUNK_ROWS x DISPO_CHUNK_COLS, pas de la largeur totale du fichier.
+# Le stockage est reconstruit dès que le CSV source change (taille / date de modification),
+# par un seul processus à la fois (verrou dispos_store/.lock, plusieurs workers WSGI) : nouveaux
+# fichiers écrits d'abord, manifeste basculé en dernier ; les fichiers de la génération précédente
+# restent lisibles pour les lecteurs qui tiennent encore l'ancien manifeste.
+# Les tableaux d'une année restent en mémoire tant que leur fichier ne change pas.
+# Personnes identifiées par leur clé (homonymes : nom#1, nom#2…, cf. personnes.py) ;
+# main.load_data les rattache aux ids entiers de l'effectif.
+#
+#   python dispos_store.py disponibilites_2026.csv        (ingestion)
+#   python dispos_store.py --bench --years 5 --persons 500
+# ============================================================
+
+from __future__ import annotations
+import argparse
+import fcntl
+import glob
+import json
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+import personnes
+
+STORE_DIR        = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dispos_store")
+DISPO_CHUNK_ROWS = 200         # lignes (personnes) par paquet
+DISPO_CHUNK_COLS = 366 * 4     # colonnes par passe (au plus une année)
+OUI_TOKENS       = {"oui", "yes", "1", "x", "true"}
+MANIFEST         = "manifest.json"
+STORE_FORMAT     = 2           # 2 : homonymes distingués (nom#1…) au lieu d'être fusionnés
+STATS            = {"hit": 0, "miss": 0}    # consultations depuis le démarrage (métriques API)
+
+_years: Dict[str, tuple] = {}    # chemin .npz -> ((taille, mtime_ns), tableaux en lecture seule)
+
+def _signature(csv_path: str) -> dict:
+    st = os.stat(csv_path)
+    return {"source": os.path.abspath(csv_path), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+def _normalise(values: np.ndarray) -> np.ndarray:
+    """Jetons oui/non -> 0/1 ; chaque valeur distincte n'est normalisée qu'une fois."""
+    codes, uniq = pd.factorize(values.ravel())
+    ok = np.array([str(u).strip().lower() in OUI_TOKENS for u in uniq] + [False], dtype=np.uint8)
+    return ok[codes].reshape(values.shape)       # code -1 (cellule vide) -> False
+
+def ingest_csv(csv_path: str, store_dir: str = STORE_DIR,
+               chunk_rows: int = DISPO_CHUNK_ROWS, chunk_cols: int = DISPO_CHUNK_COLS) -> dict:
+    """Lit le CSV large par blocs et écrit un fichier .npz par année ; renvoie le manifeste."""
+    t0 = time.time()
+    header = pd.read_csv(csv_path, nrows=0).columns
+    cols_by_year = defaultdict(list)
+    for c in header[1:]:
+        try:
+            day, slot = c.split("_creneau")
+            cols_by_year[day[:4]].append((c, day, int(slot)))
+        except ValueError:
+            continue
+
+    # Identifiants (première colonne seule) ; lignes sans identifiant ignorées
+    ids = np.concatenate([
+        chunk.iloc[:, 0].fillna("").astype(str).str.strip().to_numpy()
+        for chunk in pd.read_csv(csv_path, usecols=[0], dtype=str, chunksize=chunk_rows)
+    ]) if len(header) else np.array([], dtype=str)
+    keep = ids != ""
+    # Une personne par ligne : les homonymes sont numérotés comme dans l'effectif
+    persons = personnes.cles(ids[keep].tolist())
+    row_person = np.full(len(ids), -1, dtype=np.int64)
+    row_person[keep] = np.arange(len(persons))
+
+    os.makedirs(store_dir, exist_ok=True)
+    previous = _read_manifest(store_dir)
+    generation = f"{time.time_ns():x}"
+    years = {}
+    n_cells = 0
+    for year, cols in sorted(cols_by_year.items()):
+        days = sorted({d for _, d, _ in cols})
+        dpos = {d: i for i, d in enumerate(days)}
+        n_slots = max(s for _, _, s in cols)
+        dispo = np.zeros((len(persons), len(days), n_slots), dtype=np.uint8)
+        present = np.zeros((len(days), n_slots), dtype=bool)
+        for j in range(0, len(cols), chunk_cols):
+            part = cols[j:j + chunk_cols]
+            names = [c for c, _, _ in part]
+            di = np.array([dpos[d] for _, d, _ in part])
+            si = np.array([s - 1 for _, _, s in part])
+            present[di, si] = True
+            r0 = 0
+            for chunk in pd.read_csv(csv_path, usecols=names, dtype=str, chunksize=chunk_rows):
+                rows = row_person[r0:r0 + len(chunk)]
+                r0 += len(chunk)
+                m = rows >= 0
+                dispo[rows[m][:, None], di[None, :], si[None, :]] = _normalise(chunk[names].to_numpy())[m]
+                n_cells += chunk.size
+        path = os.path.join(store_dir, f"dispos_{year}_{generation}.npz")
+        np.savez_compressed(f"{path}.tmp.npz", persons=np.array(persons, dtype=str),
+                            days=np.array(days, dtype=str), dispo=dispo, present=present)
+        os.replace(f"{path}.tmp.npz", path)
+        years[year] = os.path.basename(path)
+
+    manifest = dict(_signature(csv_path), format=STORE_FORMAT, years=years, persons=persons,
+                    ingest_s=round(time.time() - t0, 3), cells=int(n_cells))
+    with open(os.path.join(store_dir, f"{MANIFEST}.tmp"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(os.path.join(store_dir, f"{MANIFEST}.tmp"), os.path.join(store_dir, MANIFEST))
+    # Après la bascule : seuls les fichiers des deux dernières générations sont gardés
+    keep = set(years.values()) | set((previous or {}).get("years", {}).values())
+    for old in glob.glob(os.path.join(store_dir, "dispos_*.npz")):
+        if os.path.basename(old) not in keep:
+            os.remove(old)
+    print(f"📥 Disponibilités ingérées: {len(persons)} personnes, {len(years)} année(s), "
+          f"{n_cells} cellules en {manifest['ingest_s']:.2f}s -> {store_dir}")
+    return manifest
+
+def _read_manifest(store_dir: str) -> Optional[dict]:
+    try:
+        with open(os.path.join(store_dir, MANIFEST), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _current(csv_path: str, store_dir: str) -> Optional[dict]:
+    manifest = _read_manifest(store_dir)
+    try:
+        if (manifest is not None and manifest.get("format") == STORE_FORMAT
+                and all(manifest.get(k) == v for k, v in _signature(csv_path).items())):
+            return manifest
+    except OSError:
+        pass
+    return None
+
+@contextmanager
+def _ingest_lock(store_dir: str):
+    """Une seule ingestion à la fois (processus et threads)."""
+    os.makedirs(store_dir, exist_ok=True)
+    with open(os.path.join(store_dir, ".lock"), "w") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def ensure_store(csv_path: str, store_dir: str = STORE_DIR) -> dict:
+    """Manifeste du stockage, ré-ingéré si le CSV source a changé."""
+    manifest = _current(csv_path, store_dir)
+    if manifest is not None:
+        STATS["hit"] += 1
+        return manifest
+    with _ingest_lock(store_dir):
+        # Re-vérifié sous verrou : un autre worker vient peut-être de ré-ingérer
+        manifest = _current(csv_path, store_dir)
+        if manifest is not None:
+            STATS["hit"] += 1
+            return manifest
+        STATS["miss"] += 1
+        return ingest_csv(csv_path, store_dir)
+
+def load_year(manifest: dict, year: str, store_dir: str = STORE_DIR) -> Optional[dict]:
+    """Tableaux d'une année (lecture seule), relus seulement si leur fichier a changé."""
+    name = manifest["years"].get(str(year))
+    if name is None:
+        return None
+    path = os.path.abspath(os.path.join(store_dir, name))
+    st = os.stat(path)
+    known = _years.get(path)
+    if known and known[0] == (st.st_size, st.st_mtime_ns):
+        return known[1]
+    with np.load(path) as z:
+        Y = {k: z[k] for k in z.files}
+    for a in Y.values():
+        a.setflags(write=False)
+    # Générations précédentes de la même année : plus référencées par le manifeste courant
+    prefix = os.path.join(os.path.dirname(path), f"dispos_{year}_")
+    for old in [p for p in _years if p.startswith(prefix) and p != path]:
+        del _years[old]
+    _years[path] = ((st.st_size, st.st_mtime_ns), Y)
+    return Y
+
+def iter_dispos(manifest: dict, store_dir: str = STORE_DIR) -> Iterator[dict]:
+    """Mêmes enregistrements que main.read_dispos_csv_with_slots, année par année."""
+    for year in sorted(manifest["years"]):
+        Y = load_year(manifest, year, store_dir)
+        day_idx, slot_idx = np.nonzero(Y["present"])
+        for p, person in enumerate(Y["persons"].tolist()):
+            vals = Y["dispo"][p, day_idx, slot_idx].tolist()
+            for d, s, ok in zip(day_idx.tolist(), slot_idx.tolist(), vals):
+                yield {"id": person, "jour": str(Y["days"][d]), "slot": s + 1,
+                       "dispo": bool(ok), "pref": 1.0}
+
+def person_dispos(manifest: dict, person: str, month: Optional[int] = None,
+                  store_dir: str = STORE_DIR) -> Optional[Dict[str, Dict[str, bool]]]:
+    """{jour: {"creneauN": bool}} pour une personne (None si inconnue)."""
+    if person not in manifest["persons"]:
+        return None
+    out = {}
+    for year in sorted(manifest["years"]):
+        Y = load_year(manifest, year, store_dir)
+        p = Y["persons"].tolist().index(person)
+        for d, day in enumerate(Y["days"].tolist()):
+            if month and int(day[5:7]) != int(month):
+                continue
+            slots = np.nonzero(Y["present"][d])[0]
+            if len(slots):
+                out[day] = {f"creneau{s + 1}": bool(Y["dispo"][p, d, s]) for s in slots}
+    return out
+
+# ---------- Banc d'ingestion ----------
+def write_synthetic_csv(path: str, years: int, persons: int, start_year: int = 2025,
+                        seed: int = 0, chunk_rows: int = 50) -> int:
+    """CSV large synthétique (365/366 jours x 4 créneaux par an), écrit par paquets de lignes."""
+    rng = np.random.default_rng(seed)
+    days = pd.date_range(f"{start_year}-01-01", f"{start_year + years - 1}-12-31").strftime("%Y-%m-%d")
+    cols = [f"{d}_creneau{s}" for d in days for s in (1, 2, 3, 4)]
+    tokens = np.array(["oui", "non", "", "Oui ", "x"])
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(",".join(["personne"] + cols) + "\n")
+        for r0 in range(0, persons, chunk_rows):
+            n = min(chunk_rows, persons - r0)
+            vals = tokens[rng.choice(len(tokens), size=(n, len(cols)), p=[.35, .45, .1, .05, .05])]
+            for i in range(n):
+                f.write(f"P{r0 + i}," + ",".join(vals[i]) + "\n")
+    return len(cols)
+
+def bench(years: int, persons: int, workdir: str = "bench_dispos") -> dict:
+    import resource
+    os.makedirs(workdir, exist_ok=True)
+    csv_path = os.path.join(workdir, f"dispos_{years}ans_{persons}p.csv")
+    if not os.path.exists(csv_path):
+        print(f"🧪 Génération {csv_path}…")
+        write_synthetic_csv(csv_path, years, persons)
+    size_mb = os.path.getsize(csv_path) / 1e6
+    rss0 = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    t0 = time.time()
+    manifest = ingest_csv(csv_path, os.path.join(workdir, "store"))
+    dt = time.time() - t0
+    rss1 = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    res = {"fichier_mo": round(size_mb, 1), "cellules": manifest["cells"], "temps_s": round(dt, 2),
+           "mo_par_s": round(size_mb / dt, 1), "cellules_par_s": int(manifest["cells"] / dt),
+           "rss_max_mo": round(rss1, 1), "rss_avant_mo": round(rss0, 1)}
+    print(json.dumps(res, indent=2, ensure_ascii=False))
+    return res
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Ingestion par blocs des disponibilités")
+    ap.add_argument("csv", nargs="?", help="CSV large des disponibilités à ingérer")
+    ap.add_argument("--store", default=STORE_DIR, help="dossier de stockage")
+    ap.add_argument("--bench", action="store_true", help="banc d'ingestion sur un fichier synthétique")
+    ap.add_argument("--years", type=int, default=5)
+    ap.add_argument("--persons", type=int, default=500)
+    args = ap.parse_args()
+
+    if args.bench:
+        bench(args.years, args.persons)
+    elif args.csv:
+        ingest_csv(args.csv, args.store)
+    else:
+        ap.error("fichier CSV ou --bench requis")
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# eligibilite.py
+# ============================================================
+# Éligibilité aux rôles C3, déclarée dans eligibilite.json et compilée en masques NumPy
+# Règle d'un rôle (toutes les clés sont facultatives sauf besoin) :
+#   besoin                 postes par nuit (-> main.NEEDS_C3)
+#   priorite               extraits d'intitulé des lignes du classeur des priorités dont les
+#                          scores s'appliquent au rôle (-> main.read_priorites_feuil1)
+#   grade_min / grade_max  niveaux 1 (sapeur) à 6 (capitaine), cf. roster.grade_level
+#   toutes                 habilitations exigées
+#   une_de                 au moins une de ces habilitations
+#   description            texte libre
+# Les habilitations d'un volontaire forment un mot de bits (un bit par roster.HABS) ; chaque
+# règle devient deux masques et un intervalle de grades, évalués sur tout l'effectif en une
+# expression vectorielle -> matrice booléenne (volontaires x rôles).
+# Un nouveau rôle ou véhicule = une entrée de plus dans le fichier, sans code. Le préfixe
+# du rôle (AMB_, FPT_…) désigne son engin : famille de voisinage de la LNS (lns.py).
+# La matrice est gardée dans cache_excel : recalculée seulement si l'effectif ou les règles changent.
+#
+#   python eligibilite.py        (matrice de l'effectif courant)
+# ============================================================
+
+from __future__ import annotations
+import json
+import os
+from typing import Dict, List
+
+import numpy as np
+
+import cache_excel
+from roster import HABS, Roster
+
+REGLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "eligibilite.json")
+CLES_REGLE = {"besoin", "priorite", "grade_min", "grade_max", "toutes", "une_de", "description"}
+GRADE_MIN, GRADE_MAX = 1, 6
+
+_memo: Dict[str, tuple] = {}    # chemin -> ((taille, mtime_ns), règles validées)
+
+def _valider(role: str, regle: dict) -> dict:
+    inconnues = set(regle) - CLES_REGLE
+    if inconnues:
+        raise ValueError(f"Règle {role}: clé(s) inconnue(s) {', '.join(sorted(inconnues))} "
+                         f"(attendu : {', '.join(sorted(CLES_REGLE))})")
+    if not isinstance(regle.get("besoin"), int) or regle["besoin"] < 0:
+        raise ValueError(f"Règle {role}: 'besoin' doit être un entier >= 0")
+    priorite = regle.get("priorite", [])
+    if not isinstance(priorite, list) or not all(isinstance(p, str) and p.strip() for p in priorite):
+        raise ValueError(f"Règle {role}: 'priorite' doit être une liste de libellés")
+    for cle in ("toutes", "une_de"):
+        habs = set(regle.get(cle, [])) - set(HABS)
+        if habs:
+            raise ValueError(f"Règle {role}: habilitation(s) inconnue(s) {', '.join(sorted(habs))} "
+                             f"(connues : {', '.join(HABS)})")
+    return regle
+
+def charger_regles(path: str = REGLES) -> Dict[str, dict]:
+    """{rôle: règle} dans l'ordre du fichier ; relu seulement si le fichier a changé."""
+    st = os.stat(path)
+    stamp = (st.st_size, st.st_mtime_ns)
+    known = _memo.get(path)
+    if known and known[0] == stamp:
+        return known[1]
+    with open(path, encoding="utf-8") as f:
+        regles = {role: _valider(role, r) for role, r in json.load(f).items()}
+    if not regles:
+        raise ValueError(f"Aucun rôle déclaré dans {path}")
+    _memo[path] = (stamp, regles)
+    return regles
+
+def besoins(path: str = REGLES) -> Dict[str, int]:
+    return {role: r["besoin"] for role, r in charger_regles(path).items()}
+
+def libelles_priorite(path: str = REGLES) -> Dict[str, List[str]]:
+    """{rôle: libellés des lignes du classeur des priorités} (rôles sans libellé : pas de malus)."""
+    return {role: r.get("priorite", []) for role, r in charger_regles(path).items()}
+
+def _masque(habs: List[str]) -> int:
+    return sum(1 << HABS.index(h) for h in habs)
+
+def compiler(regles: Dict[str, dict]) -> Dict[str, np.ndarray]:
+    """Une colonne par rôle : masques toutes / une_de (0 = sans condition) et intervalle de grades."""
+    R = list(regles.values())
+    return {
+        "roles": np.array(list(regles), dtype=str),
+        "toutes": np.array([_masque(r.get("toutes", [])) for r in R], dtype=np.uint32),
+        "une_de": np.array([_masque(r.get("une_de", [])) for r in R], dtype=np.uint32),
+        "grade_min": np.array([r.get("grade_min", GRADE_MIN) for r in R], dtype=np.int8),
+        "grade_max": np.array([r.get("grade_max", GRADE_MAX) for r in R], dtype=np.int8),
+    }
+
+def bits_habilitations(habs: np.ndarray) -> np.ndarray:
+    """bool [volontaire, HABS] -> mot de bits uint32 par volontaire."""
+    return (habs.astype(np.uint32) << np.arange(habs.shape[1], dtype=np.uint32)).sum(axis=1, dtype=np.uint32)
+
+def matrice(levels: np.ndarray, habs: np.ndarray, C: Dict[str, np.ndarray]) -> np.ndarray:
+    """bool [volontaire, rôle] pour des règles compilées (cf. compiler)."""
+    bits = bits_habilitations(habs)[:, None]
+    lvl = levels.astype(np.int8)[:, None]
+    return (((bits & C["toutes"]) == C["toutes"])
+            & (((bits & C["une_de"]) != 0) | (C["une_de"] == 0))
+            & (lvl >= C["grade_min"]) & (lvl <= C["grade_max"]))
+
+def matrice_effectif(xlsx_path: str, roster: Roster,
+                     regles_path: str = REGLES) -> Dict[str, np.ndarray]:
+    """{"roles", "elig"} de l'effectif `roster` (lu depuis xlsx_path), lignes dans son ordre ;
+    en cache par contenu du classeur et des règles."""
+    C = compiler(charger_regles(regles_path))
+    kind = f"elig_{cache_excel.file_digest(regles_path)[:12]}"
+    return cache_excel.cached(xlsx_path, kind,
+                              lambda _: {"roles": C["roles"], "elig": matrice(roster.levels, roster.habs, C)})
+
+if __name__ == "__main__":
+    import main
+    from roster import load_roster
+    roster = load_roster(main.XLSX_VOLONTAIRES)
+    E = matrice_effectif(main.XLSX_VOLONTAIRES, roster)
+    roles = E["roles"].tolist()
+    print(f"{'id':>4}  {'nom':<16}" + "".join(f"{r:>15}" for r in roles))
+    for i, (pid, nom) in enumerate(zip(roster.ids.tolist(), roster.noms)):
+        print(f"{pid:>4}  {nom:<16}" + "".join(f"{'x' if ok else '.':>15}" for ok in E["elig"][i]))
+    print("Éligibles par rôle : " + ", ".join(f"{r}={n}" for r, n in zip(roles, E["elig"].sum(axis=0))))
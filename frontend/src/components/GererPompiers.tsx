@@ -186,14 +186,31 @@ const GererPompiers: React.FC = () => {
   const [loading, setLoading] = useState(true);
   const [editingPompier, setEditingPompier] = useState<Pompier | null>(null);
   const [searchTerm, setSearchTerm] = useState('');
+  // Pagination côté serveur : curseur de la page suivante, compteurs de la première page
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [total, setTotal] = useState(0);
+  const [admins, setAdmins] = useState(0);
+  const [loadingMore, setLoadingMore] = useState(false);
 
-  useEffect(() => {
-    loadPompiers();
-  }, []);
+  // Filtre du planning : clé du CSV des disponibilités, homonymes suffixés (nom#1…)
+  const nomFiltre = filters.selectedPompier.replace(/#\d+$/, '');
+
+  // Recherche côté serveur (préfixe), relancée après une pause de frappe
+  const query = [searchTerm, nomFiltre].join(' ').trim();
 
-  const loadPompiers = async () => {
+  useEffect(() => {
+    const timer = setTimeout(() => loadPompiers(), 300);
+    return () => clearTimeout(timer);
+  }, [query]);
+
+  const loadPompiers = async (after: string | null = null) => {
+    const params = new URLSearchParams({ q: query, limit: '50' });
+    if (after) {
+      params.set('after', after);
+      setLoadingMore(true);
+    }
     try {
-      const response = await fetch('http://localhost:5000/api/admin/pompiers', {
+      const response = await fetch(`http://localhost:5000/api/admin/pompiers?${params}`, {
         credentials: 'include',
       });
 
@@ -205,7 +222,12 @@ const GererPompiers: React.FC = () => {
 
       const data = await response.json();
       if (response.ok) {
-        setPompiers(data.pompiers);
+        setPompiers(after ? [...pompiers, ...data.pompiers] : data.pompiers);
+        setNextCursor(data.next);
+        if (!after) {
+          setTotal(data.total);
+          setAdmins(data.admins);
+        }
       } else {
         console.error('Erreur:', data.error);
       }
@@ -213,6 +235,7 @@ const GererPompiers: React.FC = () => {
       console.error('Erreur lors du chargement:', error);
     } finally {
       setLoading(false);
+      setLoadingMore(false);
     }
   };
 
@@ -230,6 +253,7 @@ const GererPompiers: React.FC = () => {
       const data = await response.json();
       if (response.ok) {
         setPompiers(pompiers.filter(p => p.id !== pompier.id));
+        setTotal(total - 1);
       } else {
         alert(data.error || 'Erreur lors de la suppression');
       }
@@ -248,18 +272,12 @@ const GererPompiers: React.FC = () => {
   };
 
   const filteredPompiers = pompiers.filter(pompier => {
-    // Filtre de base par recherche
-    const matchesSearch = pompier.nom.toLowerCase().includes(searchTerm.toLowerCase()) ||
-      pompier.grade.toLowerCase().includes(searchTerm.toLowerCase()) ||
-      pompier.email.toLowerCase().includes(searchTerm.toLowerCase());
-    
-    // Filtre par pompier spécifique depuis le planning
-    if (filters.selectedPompier && filters.selectedPompier !== '') {
-      const matchesPlanningFilter = pompier.nom === filters.selectedPompier;
-      return matchesSearch && matchesPlanningFilter;
+    // La recherche est faite par le serveur ; le filtre du planning exige le nom exact
+    if (nomFiltre !== '') {
+      return pompier.nom === nomFiltre;
     }
     
-    return matchesSearch;
+    return true;
   });
 
   const hasActiveFilters = filters.selectedPompier !== '' || filters.selectedSlot !== 0;
@@ -314,7 +332,7 @@ const GererPompiers: React.FC = () => {
           <div className="search-box">
             <input
               type="text"
-              placeholder="Rechercher par identifiant (A, B, C...) ou grade..."
+              placeholder="Rechercher par début d'identifiant (A, B, C...), grade ou email..."
               value={searchTerm}
               onChange={(e) => setSearchTerm(e.target.value)}
               className="search-input"
@@ -322,7 +340,7 @@ const GererPompiers: React.FC = () => {
           </div>
           <div className="stats">
             <span className="stat-item">
-              👥 Total: <strong>{pompiers.length}</strong>
+              👥 Total: <strong>{total}</strong>
               {hasActiveFilters && (
                 <span style={{ color: '#6366f1', marginLeft: '0.5rem' }}>
                   (Affichés: <strong>{filteredPompiers.length}</strong>)
@@ -330,7 +348,7 @@ const GererPompiers: React.FC = () => {
               )}
             </span>
             <span className="stat-item">
-              👑 Admins: <strong>{pompiers.filter(p => p.role === 'admin').length}</strong>
+              👑 Admins: <strong>{admins}</strong>
             </span>
           </div>
         </div>
@@ -392,6 +410,18 @@ const GererPompiers: React.FC = () => {
           ))}
         </div>
 
+        {nextCursor && (
+          <div style={{ textAlign: 'center', marginTop: '1.5rem' }}>
+            <button
+              onClick={() => loadPompiers(nextCursor)}
+              className="btn btn-primary"
+              disabled={loadingMore}
+            >
+              {loadingMore ? 'Chargement...' : `Charger plus (${pompiers.length} / ${total})`}
+            </button>
+          </div>
+        )}
+
         {filteredPompiers.length === 0 && (
           <div className="no-results">
             {hasActiveFilters ? (
@@ -409,7 +439,7 @@ const GererPompiers: React.FC = () => {
               </div>
             ) : searchTerm ? (
               <p>Aucun pompier trouvé pour "{searchTerm}"</p>
-            ) : pompiers.length === 1 ? (
+            ) : total === 1 ? (
               <p>Utilisez la fonction "Import Pompiers" pour ajouter les pompiers depuis Excel</p>
             ) : (
               <p>Aucun pompier trouvé</p>
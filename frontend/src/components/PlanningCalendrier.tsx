@@ -11,9 +11,15 @@ interface Disponibilite {
 
 interface PompierDisponibilites {
   pompier_id: string;
+  person_id: number | null;
   disponibilites: Disponibilite[];
 }
 
+interface PompierListe {
+  id: number | null;  // id entier du registre (person_id du planning)
+  cle: string;        // clé du CSV des disponibilités (homonymes : nom#1…)
+}
+
 interface DisponibilitesIndividuelles {
   [date: string]: {
     [creneau: string]: boolean;
@@ -21,7 +27,7 @@ interface DisponibilitesIndividuelles {
 }
 
 interface PompierPlanifie {
-  id: string;
+  id: number;
   name: string;
   role: string | null;
   category: string;
@@ -54,7 +60,7 @@ interface CalendarDate {
 const PlanningCalendrier: React.FC = () => {
   const navigate = useNavigate();
   const { filters, setFilters } = usePlanningContext();
-  const [listePompiers, setListePompiers] = useState<string[]>([]);
+  const [listePompiers, setListePompiers] = useState<PompierListe[]>([]);
   const [disponibilites, setDisponibilites] = useState<PompierDisponibilites[]>([]);
   const [disponibilitesIndividuelles, setDisponibilitesIndividuelles] = useState<DisponibilitesIndividuelles>({});
   const [planningOptimise, setPlanningOptimise] = useState<PlanningCalendar>({});
@@ -92,7 +98,7 @@ const PlanningCalendrier: React.FC = () => {
 
   useEffect(() => {
     loadPlanningOptimise();
-  }, []);
+  }, [currentMonth, currentYear]);
 
   useEffect(() => {
     if (selectedPompier) {
@@ -133,7 +139,7 @@ const PlanningCalendrier: React.FC = () => {
   const loadDisponibilitesIndividuelles = async (pompier: string) => {
     try {
       const response = await fetch(
-        `http://localhost:5000/api/planning/disponibilites?pompier=${pompier}&mois=${currentMonth}&annee=${currentYear}`
+        `http://localhost:5000/api/planning/disponibilites?pompier=${encodeURIComponent(pompier)}&mois=${currentMonth}&annee=${currentYear}`
       );
       const data = await response.json();
       if (response.ok) {
@@ -162,7 +168,9 @@ const PlanningCalendrier: React.FC = () => {
 
   const loadPlanningOptimise = async () => {
     try {
-      const response = await fetch('http://localhost:5000/api/planning/optimise');
+      // Seule la partition du mois affiché est chargée (?mois=AAAA-MM)
+      const mois = `${currentYear}-${String(currentMonth).padStart(2, '0')}`;
+      const response = await fetch(`http://localhost:5000/api/planning/optimise?mois=${mois}`);
       const data = await response.json();
       if (response.ok) {
         setPlanningOptimise(data.calendar || {});
@@ -412,9 +420,9 @@ const PlanningCalendrier: React.FC = () => {
                 className="pompier-select"
               >
                 <option value="">Tous les pompiers</option>
-                {listePompiers.map(pompierId => (
-                  <option key={pompierId} value={pompierId}>
-                    {pompierId}
+                {listePompiers.map(p => (
+                  <option key={p.cle} value={p.cle}>
+                    {p.cle}
                   </option>
                 ))}
               </select>
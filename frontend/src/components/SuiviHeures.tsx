@@ -1,8 +1,13 @@
 import React, { useState, useEffect } from 'react';
 import './SuiviHeures.css';
 
+interface PompierListe {
+  id: number | null;  // id entier du registre (person_id du planning)
+  cle: string;        // clé du CSV des disponibilités (homonymes : nom#1…)
+}
+
 interface StatsPompier {
-  pompier_id: string;
+  pompier_id: number;
   nom: string;
   heures_realisees: number;
   heures_objectif: number;
@@ -20,7 +25,7 @@ interface StatsPompier {
 }
 
 const SuiviHeures: React.FC = () => {
-  const [listePompiers, setListePompiers] = useState<string[]>([]);
+  const [listePompiers, setListePompiers] = useState<PompierListe[]>([]);
   const [selectedPompier, setSelectedPompier] = useState<string>('');
   const [statsHeures, setStatsHeures] = useState<StatsPompier | null>(null);
   const [loading, setLoading] = useState(false);
@@ -44,30 +49,36 @@ const SuiviHeures: React.FC = () => {
       const response = await fetch('http://localhost:5000/api/planning/pompiers');
       const data = await response.json();
       if (response.ok) {
-        setListePompiers(data.pompiers || []);
+        // Seuls les pompiers de l'effectif (id entier) peuvent figurer au planning
+        setListePompiers((data.pompiers || []).filter((p: PompierListe) => p.id !== null));
       }
     } catch (err) {
       setError('Erreur lors du chargement de la liste des pompiers');
     }
   };
 
-  const calculerStatsPompier = async (pompierNom: string) => {
-    if (!pompierNom) return;
+  const calculerStatsPompier = async (pompierId: string) => {
+    const pompier = listePompiers.find(p => String(p.id) === pompierId);
+    if (!pompier) return;
     
     setLoading(true);
     setError('');
     
     try {
-      // Récupérer le planning optimisé
-      const response = await fetch('http://localhost:5000/api/planning/optimise');
-      const data = await response.json();
-      
-      if (!response.ok || !data.calendar) {
+      // Récupérer le planning optimisé de l'année affichée, une partition mensuelle par requête
+      const reponses = await Promise.all(
+        Array.from({ length: 12 }, (_, i) =>
+          fetch(`http://localhost:5000/api/planning/optimise?mois=${annee}-${String(i + 1).padStart(2, '0')}`)
+            .then(async response => ({ ok: response.ok, data: await response.json() }))
+        )
+      );
+
+      if (reponses.some(r => !r.ok || !r.data.calendar)) {
         setError('Erreur lors du chargement du planning optimisé');
         return;
       }
 
-      const calendar = data.calendar;
+      const calendar = Object.assign({}, ...reponses.map(r => r.data.calendar));
       let heuresTotal = 0;
       const repartitionCreneaux = {
         creneau1: 0,
@@ -85,10 +96,8 @@ const SuiviHeures: React.FC = () => {
         [1, 2, 3, 4].forEach(numCreneau => {
           const creneau = creneaux[`creneau${numCreneau}`];
           if (creneau && creneau.pompiers) {
-            // Chercher si le pompier est assigné à ce créneau
-            const pompierAssgne = creneau.pompiers.find((p: any) => 
-              p.name === pompierNom || p.id === pompierNom
-            );
+            // Chercher si le pompier est assigné à ce créneau (par id : les homonymes restent distincts)
+            const pompierAssgne = creneau.pompiers.find((p: any) => p.id === pompier.id);
             
             if (pompierAssgne) {
               const dureeHeure = DUREE_CRENEAUX[numCreneau as keyof typeof DUREE_CRENEAUX];
@@ -108,8 +117,8 @@ const SuiviHeures: React.FC = () => {
       const pourcentageAccompli = Math.min(100, (heuresTotal / HEURES_OBJECTIF) * 100);
 
       const stats: StatsPompier = {
-        pompier_id: pompierNom,
-        nom: pompierNom,
+        pompier_id: pompier.id as number,
+        nom: pompier.cle,
         heures_realisees: heuresTotal,
         heures_objectif: HEURES_OBJECTIF,
         heures_manquantes: Math.abs(heuresManquantes),
@@ -127,6 +136,12 @@ const SuiviHeures: React.FC = () => {
     }
   };
 
+  useEffect(() => {
+    if (selectedPompier) {
+      calculerStatsPompier(selectedPompier);
+    }
+  }, [annee]);
+
   const handlePompierChange = (event: React.ChangeEvent<HTMLSelectElement>) => {
     const pompier = event.target.value;
     setSelectedPompier(pompier);
@@ -161,7 +176,7 @@ const SuiviHeures: React.FC = () => {
           >
             <option value="">-- Sélectionner un pompier --</option>
             {listePompiers.map(pompier => (
-              <option key={pompier} value={pompier}>{pompier}</option>
+              <option key={pompier.cle} value={String(pompier.id)}>{pompier.cle}</option>
             ))}
           </select>
         </div>
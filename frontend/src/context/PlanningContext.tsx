@@ -2,7 +2,7 @@ import React, { createContext, useContext, useState } from 'react';
 import type { ReactNode } from 'react';
 
 interface PlanningFilters {
-  selectedPompier: string;
+  selectedPompier: string;  // clé du CSV des disponibilités (nom, nom#1… pour les homonymes)
   selectedSlot: number;
   currentMonth: number;
   currentYear: number;
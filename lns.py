@@ -0,0 +1,154 @@
+# lns.py
+# ============================================================
+# Recherche à grand voisinage (LNS) autour du modèle de main.build_model
+# Voisinages : une semaine | une famille de rôles | les volontaires les plus chargés
+# Tout le reste est figé sur la solution courante, puis re-résolu brièvement.
+# ============================================================
+
+from __future__ import annotations
+import random
+import time
+from typing import Callable, Dict, List, Optional
+from ortools.sat.python import cp_model
+
+# ---------- PARAMS LNS ----------
+LNS_SUB_TIME    = 5.0      # budget d'une sous-résolution (s)
+LNS_TOP_CHARGES = 3        # nb de volontaires les plus (et les moins) chargés libérés
+LNS_SEED        = 42
+VOISINAGES      = ("semaine", "famille", "charges")
+# Familles : engin du rôle C3 (préfixe AMB_, FPT_… cf. eligibilite.json) et SIMPLE (C1,C2,C4)
+
+def _decision_vars(M: dict) -> List[tuple]:
+    """(volontaire, jour, famille, index proto) pour chaque variable z/x."""
+    out = []
+    for (v, d, _s), var in M["z"].items():
+        out.append((v, d, "SIMPLE", var.Index()))
+    for (v, d, r), var in M["x"].items():
+        out.append((v, d, r.split("_")[0], var.Index()))
+    return out
+
+def _familles(dec: List[tuple]) -> List[str]:
+    return sorted({f for _v, _d, f, _idx in dec})
+
+def _pick_voisinage(kind: str, rng: random.Random, DAYS: List[str], V: List[int],
+                    loads: Dict[int, int], familles: List[str]):
+    if kind == "semaine":
+        i = rng.randrange(0, len(DAYS), 7)
+        days = set(DAYS[i:i + 7])
+        return f"semaine {DAYS[i]}", (lambda v, d, f: d in days)
+    if kind == "famille":
+        fam = rng.choice(familles)
+        return f"famille {fam}", (lambda v, d, f: f == fam)
+    # Les plus chargés seuls ne peuvent que perdre des nuits : on libère aussi les moins chargés
+    order = sorted(V, key=lambda v: (-loads[v], rng.random()))
+    free = set(order[:LNS_TOP_CHARGES]) | set(order[-LNS_TOP_CHARGES:])
+    return f"charges {','.join(map(str, order[:LNS_TOP_CHARGES]))}", (lambda v, d, f: v in free)
+
+def _sub_solve(mdl: cp_model.CpModel, dec: List[tuple], sol: Optional[List[int]],
+               is_free, solver: cp_model.CpSolver):
+    """Clone le modèle, fige les variables hors voisinage sur `sol` (0 si pas de solution)
+    et le résout avec un hint complet, avec `solver` déjà paramétré."""
+    sub = mdl.Clone()
+    pvars = sub.Proto().variables
+    for v, d, f, idx in dec:
+        if not is_free(v, d, f):
+            val = sol[idx] if sol is not None else 0
+            dom = pvars[idx].domain
+            dom[0] = val
+            dom[1] = val
+    sub.ClearHints()
+    if sol is not None:
+        hint = sub.Proto().solution_hint
+        hint.vars.extend(range(len(sol)))
+        hint.values.extend(sol)
+
+    status = solver.Solve(sub)
+    return solver, status
+
+def run_lns(M: dict, DAYS: List[str], V: List[int],
+            init_solver: Optional[cp_model.CpSolver] = None,
+            time_budget: float = 60.0, max_iters: Optional[int] = None,
+            sub_time: float = LNS_SUB_TIME, num_workers: int = 8, seed: int = LNS_SEED,
+            criteria: Optional[dict] = None,
+            new_solver: Optional[Callable[[float], cp_model.CpSolver]] = None):
+    """Boucle LNS sur l'objectif complet (manques + qualité).
+
+    Part de la solution de `init_solver` (ou de l'affectation vide, toujours réalisable
+    en mode contraintes souples) et accepte toute amélioration stricte.
+    `criteria` (cf. arret_solveur) : annulation, stagnation et seuil d'objectif sont
+    vérifiés entre deux itérations ; les écarts à la borne n'ont pas de sens ici.
+    `new_solver(max_time)` (main._new_solver) fournit les sous-solveurs : profil, graine et
+    plafond de workers de l'appelant ; à défaut, `num_workers` et `seed` seuls.
+    Renvoie (solver de la meilleure solution, status, stats avec la trajectoire)."""
+    c = criteria or {}
+    mdl = M["mdl"]
+    mdl.Minimize(M["quality"] + M["shortage"])
+    dec = _decision_vars(M)
+    familles = _familles(dec)
+    rng = random.Random(seed)
+    t0 = time.time()
+
+    def sub_solver(max_time: float, it: int) -> cp_model.CpSolver:
+        if new_solver is None:
+            solver = cp_model.CpSolver()
+            solver.parameters.max_time_in_seconds = max_time
+            solver.parameters.num_search_workers = num_workers
+            solver.parameters.random_seed = seed + it
+            return solver
+        solver = new_solver(max_time)
+        # Graine décalée à chaque itération : voisinages résolus différemment
+        solver.parameters.random_seed += seed + it
+        return solver
+
+    # Évaluation de la solution de départ : tout est figé
+    sol = list(init_solver.ResponseProto().solution) if init_solver is not None else None
+    best, status = _sub_solve(mdl, dec, sol, lambda v, d, f: False, sub_solver(sub_time, 0))
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        print("❌ LNS : solution de départ non réalisable.")
+        return best, status, {"phase": "lns", "status": best.StatusName(status), "trajectory": []}
+    sol = list(best.ResponseProto().solution)
+    obj = best.ObjectiveValue()
+    trajectory = [{"iter": 0, "t": round(time.time() - t0, 3), "voisinage": "départ",
+                   "objective": obj, "accepted": True}]
+    print(f"🔁 LNS départ: objectif {obj:.0f}")
+
+    it = 0
+    last_improve = time.time()
+    reason = "time_limit"
+    while True:
+        if time.time() - t0 >= time_budget:
+            break
+        if max_iters is not None and it >= max_iters:
+            reason = "iterations"
+            break
+        if c.get("cancel") is not None and c["cancel"].is_set():
+            reason = "cancel"
+            break
+        if c.get("objective") is not None and obj <= c["objective"]:
+            reason = "objective"
+            break
+        if c.get("stall") is not None and time.time() - last_improve > c["stall"]:
+            reason = "stall"
+            break
+        it += 1
+        loads = {v: sol[M["h"][v].Index()] for v in V}
+        name, is_free = _pick_voisinage(rng.choice(VOISINAGES), rng, DAYS, V, loads, familles)
+        left = time_budget - (time.time() - t0)
+        solver, st = _sub_solve(mdl, dec, sol, is_free, sub_solver(max(0.1, min(sub_time, left)), it))
+        accepted = (st in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+                    and solver.ObjectiveValue() < obj - 1e-6)
+        if accepted:
+            print(f"🔁 LNS it {it:<4} [{name}] {obj:.0f} → {solver.ObjectiveValue():.0f}")
+            best, obj = solver, solver.ObjectiveValue()
+            sol = list(best.ResponseProto().solution)
+            last_improve = time.time()
+        trajectory.append({"iter": it, "t": round(time.time() - t0, 3), "voisinage": name,
+                           "objective": obj, "accepted": accepted})
+
+    n_acc = sum(1 for p in trajectory[1:] if p["accepted"])
+    print(f"[lns] Itérations: {it} | Améliorations: {n_acc} | Objective: {obj} "
+          f"| Temps: {time.time() - t0:.1f}s | Arrêt: {reason}")
+    stats = {"phase": "lns", "status": "FEASIBLE", "stop_reason": reason,
+             "wall_time": round(time.time() - t0, 3),
+             "objective": obj, "iterations": it, "trajectory": trajectory}
+    return best, cp_model.FEASIBLE, stats
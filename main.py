@@ -5,27 +5,43 @@
 # ============================================================
 
 from __future__ import annotations
-import re
+import json
+import os
+import signal
+import threading
+import time
 from collections import defaultdict
-from typing import Dict, Tuple, List
+from typing import Callable, Dict, Tuple, List, Optional
+import numpy as np
 import pandas as pd
 from ortools.sat.python import cp_model
 
+from arret_solveur import (StopCallback, default_criteria, STOP_REL_GAP, STOP_ABS_GAP,
+                           STOP_STALL_S, STOP_OBJECTIVE)
+import cache_excel
+import cache_modele
+import cache_planning
+import dispos_store
+import eligibilite
+import personnes
+import planning_store
+import roster
+import trace_run
+from lns import run_lns
+from roster import Roster, canon as _canon, load_roster
+
 # ---------- FICHIERS ----------
-XLSX_VOLONTAIRES = "SPV Pibrac Hackathon.xlsx"                # feuille: 2026
-XLSX_PRIORITES   = "Priorité dans les recherches de fonctions opérationnelles.xlsx"  # Feuil1
-CSV_DISPOS       = "disponibilites_2026.csv"                   # personne,YYYY-MM-DD_creneau1..4
+# Chemins relatifs au dossier du projet (main.py est aussi appelé depuis backend/)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+XLSX_VOLONTAIRES = os.path.join(BASE_DIR, "SPV Pibrac Hackathon.xlsx")                # feuille: 2026
+XLSX_PRIORITES   = os.path.join(BASE_DIR, "Priorité dans les recherches de fonctions opérationnelles.xlsx")  # Feuil1
+CSV_DISPOS       = os.path.join(BASE_DIR, "disponibilites_2026.csv")                   # personne,YYYY-MM-DD_creneau1..4
+CSV_PLANNING     = os.path.join(BASE_DIR, "planning_optimise.csv")
 
 # ---------- PARAMS MODELE ----------
 NEEDS_SIMPLE = {1: 3, 2: 8, 4: 8}       # C1,C2,C4
-NEEDS_C3 = {                             
-    "AMB_CHEF": 2,
-    "AMB_COND": 2,
-    "AMB_EQUI_SUAP": 2,
-    "FPT_CHEF": 1,
-    "FPT_COND": 1,
-    "FPT_EQUI_INC": 1,   # augmenté de 1 à 2 pour atteindre 9 rôles au total
-}
+# Rôles C3 et besoins par nuit, déclarés avec leurs règles d'éligibilité (eligibilite.json)
+NEEDS_C3 = eligibilite.besoins()
 ROLE_KEYS = list(NEEDS_C3.keys())
 
 # Poids objectif
@@ -41,124 +57,118 @@ SOFT_CONSTRAINTS = True
 PENALITY_SIMPLE  = 1000
 PENALITY_C3      = 5000
 
-# ---------- Utils ----------
-def _canon(s: str) -> str:
-    if s is None:
-        return ""
-    t = str(s).strip().upper().replace("’", "'")
-    return re.sub(r"\s+", " ", t)
-
-GRADE_MAP = {
-    "1CL": 1, "2CL": 1, "SAP": 1, "SAPEUR": 1, "SAPEUR 1CL": 1, "SAPEUR 2CL": 1,
-    "CPL": 2, "CCH": 2, "CAPORAL": 2, "CAPORAL CHEF": 2, "CAPORAL-CHEF": 2,
-    "SGT": 3, "SCH": 3, "SERGENT": 3, "SERGENT CHEF": 3, "SERGENT-CHEF": 3,
-    "ADJ": 4, "ADC": 4, "ADJUDANT": 4, "ADJUDANT CHEF": 4, "ADJUDANT-CHEF": 4,
-    "LTN": 5, "LIEUTENANT": 5,
-    "CNE": 6, "CAPITAINE": 6,
-}
-
-# ---------- Export CSV ----------
-def export_planning_csv(out_path: str, solver: cp_model.CpSolver,
-                        vols: Dict[str, dict], DAYS: List[str], V: List[str],
-                        z: dict, x: dict, ROLE_KEYS: List[str],
-                        SOFT_CONSTRAINTS: bool,
-                        short_simple: dict, short_c3: dict) -> None:
-    rows = []
-
-    # C1, C2, C4
-    for d in DAYS:
-        for s in (1, 2, 4):
-            for v in V:
-                if (v, d, s) in z and solver.Value(z[(v, d, s)]) == 1:
-                    rows.append({
-                        "day": d, "slot": s, "category": "SIMPLE", "role": "-",
-                        "person_id": v, "person_name": vols[v]["nom"], "shortage_count": ""
-                    })
-            if SOFT_CONSTRAINTS and (d, s) in short_simple:
-                miss = solver.Value(short_simple[(d, s)])
-                if miss > 0:
-                    rows.append({
-                        "day": d, "slot": s, "category": "SHORTAGE", "role": "-",
-                        "person_id": "", "person_name": "", "shortage_count": int(miss)
-                    })
-
-    # C3 (rôles)
-    for d in DAYS:
-        for r in ROLE_KEYS:
-            for v in V:
-                if (v, d, r) in x and solver.Value(x[(v, d, r)]) == 1:
-                    rows.append({
-                        "day": d, "slot": 3, "category": "C3", "role": r,
-                        "person_id": v, "person_name": vols[v]["nom"], "shortage_count": ""
-                    })
-            if SOFT_CONSTRAINTS and (d, r) in short_c3:
-                miss = solver.Value(short_c3[(d, r)])
-                if miss > 0:
-                    rows.append({
-                        "day": d, "slot": 3, "category": "SHORTAGE", "role": r,
-                        "person_id": "", "person_name": "", "shortage_count": int(miss)
-                    })
-
-    df_out = pd.DataFrame(rows, columns=[
-        "day", "slot", "category", "role", "person_id", "person_name", "shortage_count"
-    ])
-    df_out.sort_values(["day", "slot", "category", "role", "person_name"], inplace=True)
-    df_out.to_csv(out_path, index=False, encoding="utf-8")
-    print(f"\n📄 Planning exporté: {out_path}  (lignes: {len(df_out)})")
+# ---------- PARAMS SOLVEUR ----------
+MAX_TIME_S  = 60.0
+NUM_WORKERS = 8
+# Plafond de workers CP-SAT imposé par un appelant qui résout en parallèle (scenarios.py) :
+# prime sur le profil solveur, sinon les processus se partagent mal les cœurs
+WORKERS_CAP = None
+# Mode lexicographique : phase 1 = manques seuls (budget court), phase 2 = qualité à manques figés
+LEXICO = False
+LEXICO_PHASE1_TIME = 15.0
+# Paramètres CP-SAT retenus par tuning_solveur.py (chargés s'il existe)
+SOLVER_PROFILE = os.path.join(BASE_DIR, "solver_profile.json")
+# Graine figée : mêmes entrées => même planning (et résultat réutilisable depuis le cache)
+SOLVER_SEED = 0
+USE_CACHE   = True
+# Horizon glissant : "YYYY-MM-DD" -> les jours antérieurs sont relus depuis le planning existant et figés
+FREEZE_BEFORE = None
+
+# ---------- Extraction / export ----------
+PLANNING_COLUMNS = ["day", "slot", "category", "role", "person_id", "person_name", "shortage_count"]
+# Export binaire colonne en plus du CSV (.parquet -> pyarrow requis, .npz -> numpy seul)
+PLANNING_COLUMNAR = None
+
+def _var_tables(M: dict) -> Dict[str, pd.DataFrame]:
+    """Clés + index proto des variables existantes, une table par famille (calculé une fois par modèle)."""
+    if "tables" not in M:
+        def table(d: dict, cols: List[str]) -> pd.DataFrame:
+            keys = [k if isinstance(k, tuple) else (k,) for k in d]
+            t = pd.DataFrame(keys, columns=cols)
+            t["idx"] = np.fromiter((var.Index() for var in d.values()), dtype=np.int64, count=len(d))
+            return t
+        M["tables"] = {
+            "z": table(M["z"], ["person_id", "day", "slot"]),
+            "x": table(M["x"], ["person_id", "day", "role"]),
+            "h": table(M["h"], ["person_id"]),
+            "short_simple": table(M["short_simple"], ["day", "slot"]),
+            "short_c3": table(M["short_c3"], ["day", "role"]),
+        }
+    return M["tables"]
+
+def extract_solution(solver: cp_model.CpSolver, M: dict) -> Dict[str, pd.DataFrame]:
+    """Lit tout le vecteur solution en un appel puis l'indexe par famille (colonne `val`)."""
+    sol = np.asarray(solver.ResponseProto().solution, dtype=np.int64)
+    return {name: t.assign(val=sol[t["idx"].to_numpy()]) for name, t in _var_tables(M).items()}
+
+def planning_frame(S: Dict[str, pd.DataFrame], vols: Dict[int, dict],
+                   SOFT_CONSTRAINTS: bool) -> pd.DataFrame:
+    """Planning au format du CSV, construit colonne par colonne depuis extract_solution.
+    person_id = id entier (cf. personnes.py) ; le nom n'est résolu qu'ici, pour l'affichage."""
+    z = S["z"][S["z"]["val"] == 1]
+    x = S["x"][S["x"]["val"] == 1]
+    parts = [
+        pd.DataFrame({"day": z["day"], "slot": z["slot"], "category": "SIMPLE", "role": "-",
+                      "person_id": z["person_id"], "shortage_count": ""}),
+        pd.DataFrame({"day": x["day"], "slot": 3, "category": "C3", "role": x["role"],
+                      "person_id": x["person_id"], "shortage_count": ""}),
+    ]
+    if SOFT_CONSTRAINTS:
+        ss = S["short_simple"][S["short_simple"]["val"] > 0]
+        sc = S["short_c3"][S["short_c3"]["val"] > 0]
+        parts += [
+            pd.DataFrame({"day": ss["day"], "slot": ss["slot"], "category": "SHORTAGE", "role": "-",
+                          "person_id": "", "shortage_count": ss["val"]}),
+            pd.DataFrame({"day": sc["day"], "slot": 3, "category": "SHORTAGE", "role": sc["role"],
+                          "person_id": "", "shortage_count": sc["val"]}),
+        ]
+    df = pd.concat(parts, ignore_index=True)
+    df["person_name"] = df["person_id"].map({v: p["nom"] for v, p in vols.items()}).fillna("")
+    df = df[PLANNING_COLUMNS].sort_values(["day", "slot", "category", "role", "person_name"])
+    return df.reset_index(drop=True)
+
+def export_columnar(df: pd.DataFrame, path: str) -> None:
+    """Copie binaire colonne du planning (types homogènes : manque = 0 sur les affectations)."""
+    df = df.assign(shortage_count=pd.to_numeric(df["shortage_count"], errors="coerce")
+                   .fillna(0).astype(np.int32))
+    if path.endswith(".npz"):
+        np.savez_compressed(path, **{c: (df[c].to_numpy() if pd.api.types.is_numeric_dtype(df[c])
+                                         else df[c].to_numpy(dtype=str)) for c in df.columns})
+    else:
+        try:
+            df.to_parquet(path, index=False)
+        except ImportError:
+            print("⚠️  Export parquet impossible (pyarrow absent) : utilisez une extension .npz")
+            return
+    print(f"📦 Planning colonne exporté: {path}")
+
+def export_planning(out_path: str, df: pd.DataFrame, columnar_path: Optional[str] = None,
+                    months: Optional[List[str]] = None) -> int:
+    """Publie une nouvelle version : CSV complet + partitions mensuelles (toutes, ou seulement
+    `months` après un re-calcul partiel). Renvoie le numéro de version."""
+    manifest = planning_store.publish(df, out_path, months)
+    print(f"\n📄 Planning exporté: {out_path}  (lignes: {len(df)}, version {manifest['version']})")
+    if columnar_path:
+        export_columnar(df, columnar_path)
+    return manifest["version"]
 
 # ---------- Lectures ----------
-def read_volontaires_spv_pibrac(xlsx_path: str) -> Dict[str, dict]:
-    xl = pd.ExcelFile(xlsx_path)
-    df_raw = xl.parse("2026", header=None)
-
-    top = df_raw.iloc[2].fillna('')
-    sub = df_raw.iloc[3].fillna('')
-    cols = [ (str(a).strip() if str(b).strip()=="" else f"{str(a).strip()} - {str(b).strip()}") for a,b in zip(top,sub) ]
-
-    df = df_raw.iloc[4:].copy()
-    df.columns = cols
-    df = df.reset_index(drop=True)
-
-    col_grade = "Grade"
-    col_nom   = "Nom"
-
-    def map_grade(g):
-        gg = _canon(g)
-        return GRADE_MAP.get(gg, GRADE_MAP.get(gg.split()[0], 1))
-
-    suap_cols = [c for c in df.columns if "SUAP" in _canon(c)]
-    inc_col   = next((c for c in df.columns if _canon(c) in ("- INC", "INC")), None)
-    cod0_col  = next((c for c in df.columns if "COD 0" in _canon(c) or "COD0" in _canon(c)), None)
-    cod1_col  = next((c for c in df.columns if "COD1" in _canon(c) or "COD 1" in _canon(c)), None)
-    pl_col    = next((c for c in df.columns if "PERMIS C" in _canon(c) or "PERMIS PL" in _canon(c)), None)
-    b_col     = next((c for c in df.columns if "PERMIS B" in _canon(c) or _canon(c) == "B"), None)
-
-    vols, seen = {}, {}
-    for _, r in df.iterrows():
-        nom = str(r.get(col_nom, "")).strip()
-        if not nom or nom.lower() == "nan":
-            continue
-        idx = seen.get(nom, 0)
-        vid = nom if idx == 0 else f"{nom}#{idx}"
-        seen[nom] = idx + 1
-
-        grade = map_grade(r.get(col_grade, ""))
-
-        habs = set()
-        if suap_cols and any(str(r[c]).strip().upper() == "X" for c in suap_cols): habs.add("SUAP")
-        if inc_col and str(r[inc_col]).strip().upper() == "X": habs.add("INC")
-        if cod0_col and str(r[cod0_col]).strip().upper() == "X": habs.add("COD0")
-        if cod1_col and str(r[cod1_col]).strip().upper() == "X": habs.add("COD1")
-        if pl_col and str(r[pl_col]).strip().upper() == "X": habs.add("PL")
-        if b_col and str(r[b_col]).strip().upper() == "X": habs.add("B")
-
-        vols[vid] = {"nom": nom, "grade": grade, "habs": habs, "equipe": None}
-
+def read_volontaires_spv_pibrac(roster: Roster) -> Dict[int, dict]:
+    vols = roster.to_vols()
     if not vols:
         raise ValueError("Aucun volontaire détecté dans la feuille '2026'.")
     return vols
 
 def read_priorites_feuil1(xlsx_path: str) -> Dict[Tuple[int, str], int]:
+    # Matrice relue depuis cache_excel tant que le classeur et les libellés des rôles ne changent pas
+    libelles = eligibilite.libelles_priorite()
+    kind = f"priorites_Feuil1_{cache_excel.file_digest(eligibilite.REGLES)[:12]}"
+    A = cache_excel.cached(xlsx_path, kind, lambda p: _parse_priorites_feuil1(p, libelles))
+    return {(int(g), r): int(v) for g, r, v in zip(A["grade"], A["role"].tolist(), A["score"])}
+
+def _parse_priorites_feuil1(xlsx_path: str, libelles: Dict[str, List[str]]) -> Dict[str, np.ndarray]:
+    """Scores (grade, rôle) de Feuil1 ; une ligne s'applique aux rôles dont un extrait
+    d'intitulé (eligibilite.json, clé priorite) figure dans la sienne."""
     xl = pd.ExcelFile(xlsx_path)
     df = xl.parse("Feuil1", header=None).fillna("")
 
@@ -180,16 +190,7 @@ def read_priorites_feuil1(xlsx_path: str) -> Dict[Tuple[int, str], int]:
     for i, f in enumerate(func_rows):
         fkey = _canon(f)
         if not fkey: continue
-        if "CONDUCTEUR AMBULANCE" in fkey:
-            roles = ["AMB_COND"]
-        elif "CONDUCTEUR FOURGON" in fkey:
-            roles = ["FPT_COND"]
-        elif "EQUIPIER" in fkey:
-            roles = ["AMB_EQUI_SUAP","FPT_EQUI_INC"]
-        elif "CHEF D'AGR" in fkey or "CHEF D’AGR" in fkey:
-            roles = ["AMB_CHEF","FPT_CHEF"]
-        else:
-            roles = []
+        roles = [r for r, labels in libelles.items() if any(_canon(l) in fkey for l in labels)]
         for j, gh in enumerate(grade_headers):
             g = map_grade_label(gh)
             val = str(mat.iat[i, j]).strip()
@@ -200,63 +201,48 @@ def read_priorites_feuil1(xlsx_path: str) -> Dict[Tuple[int, str], int]:
                 continue
             for rkey in roles:
                 prio[(g, rkey)] = s
-    return prio
-
-def read_dispos_csv_with_slots(csv_path: str) -> List[dict]:
-    df = pd.read_csv(csv_path, sep=",", dtype=str).fillna("")
-    id_col = df.columns[0]
-    date_cols = df.columns[1:]
-    out = []
-    for _, row in df.iterrows():
-        pid = str(row[id_col]).strip()
-        if not pid: continue
-        for c in date_cols:
-            try:
-                day, slot = c.split("_creneau")
-                slot = int(slot)
-            except Exception:
-                continue
-            val = str(row[c]).strip().lower()
-            is_dispo = val in {"oui", "yes", "1", "x", "true"}
-            out.append({"id": pid, "jour": day, "slot": slot, "dispo": is_dispo, "pref": 1.0})
+    return {"grade": np.array([g for g, _ in prio], dtype=np.int8),
+            "role": np.array([r for _, r in prio], dtype=str),
+            "score": np.array(list(prio.values()), dtype=np.int64)}
+
+def read_dispos_csv_with_slots(csv_path: str, store_dir: str = dispos_store.STORE_DIR) -> List[dict]:
+    # Lecture depuis le stockage compact par année (cf. dispos_store), ré-ingéré par blocs
+    # seulement si le CSV a changé
+    out = list(dispos_store.iter_dispos(dispos_store.ensure_store(csv_path, store_dir), store_dir))
     if not out:
         raise ValueError("Aucune donnée lue depuis le CSV de disponibilités.")
     return out
 
-def build_elig(vols: Dict[str, dict]) -> Dict[Tuple[str, str], int]:
-    E = {}
-    for v, p in vols.items():
-        g = p["grade"]; H = p["habs"]
-
-        # Ambulance: chef = grade >= Sergent (3) ; conducteur = (COD0 or COD1) AND Permis B
-        E[(v, "AMB_CHEF")]      = int(g >= 3)                                 # Sergent min (pas INC obligatoire)
-        E[(v, "AMB_COND")]      = int(("COD0" in H or "COD1" in H) and ("B" in H))
-        E[(v, "AMB_EQUI_SUAP")] = int("SUAP" in H)
-
-        # Fourgon
-        E[(v, "FPT_CHEF")]      = int(g >= 4 and "INC" in H)
-        E[(v, "FPT_COND")]      = int("PL" in H and "COD1" in H)
-        E[(v, "FPT_EQUI_INC")]  = int("INC" in H)
-    return E
+def build_elig(xlsx_path: str, roster: Roster) -> np.ndarray:
+    """Matrice bool [volontaire, rôle] : lignes dans l'ordre de l'effectif (= V), colonnes = ROLE_KEYS.
+    Règles déclarées dans eligibilite.json, compilées en masques (cf. eligibilite.py)."""
+    E = eligibilite.matrice_effectif(xlsx_path, roster)
+    if E["roles"].tolist() != ROLE_KEYS:
+        raise ValueError(f"Rôles de {eligibilite.REGLES} modifiés depuis le démarrage : relancer")
+    return E["elig"]
 
 # ---------- Diagnostic ----------
 def count_dispo(DISPO, V, d, s):
     return sum(1 for v in V if DISPO.get((v, d, s), (False, 0.0))[0])
 
-def count_role_eligible_avail(DISPO, ELIG, V, d, role):
-    return sum(1 for v in V if DISPO.get((v, d, 3), (False, 0.0))[0] and ELIG.get((v, role), 0) == 1)
+def count_role_eligible_avail(DISPO, ELIG, V, d):
+    """Volontaires disponibles en C3 le jour d, par rôle (vecteur aligné sur ROLE_KEYS)."""
+    avail = np.fromiter((DISPO.get((v, d, 3), (False, 0.0))[0] for v in V), dtype=bool, count=len(V))
+    return ELIG[avail].sum(axis=0)
 
 def diagnose(vols, DISPO, ELIG, DAYS, NEEDS_SIMPLE, NEEDS_C3):
     print("\n=== Diagnostic faisabilité ===")
     ok = True
+    V = list(vols.keys())
     for d in DAYS:
         for s, need in NEEDS_SIMPLE.items():
             c = count_dispo(DISPO, vols.keys(), d, s)
             if c < need:
                 ok = False
                 print(f"⚠️  {d} C{s}: dispo={c} < besoin={need}")
+        per_role = count_role_eligible_avail(DISPO, ELIG, V, d)
         for r, need in NEEDS_C3.items():
-            c = count_role_eligible_avail(DISPO, ELIG, vols.keys(), d, r)
+            c = int(per_role[ROLE_KEYS.index(r)])
             if c < need:
                 ok = False
                 print(f"⚠️  {d} C3 rôle {r}: elig+dispo={c} < besoin={need}")
@@ -266,24 +252,134 @@ def diagnose(vols, DISPO, ELIG, DAYS, NEEDS_SIMPLE, NEEDS_C3):
         print("❌ Des manques sont détectés (voir ⚠️ ci-dessus).")
 
 # ===================== SOLVEUR ===============================
-def solve():
+def model_params(overrides: Optional[dict] = None) -> dict:
+    """Constantes du modèle (besoins, poids, pénalités) : entrent dans la clé du cache.
+    `overrides` remplace certaines valeurs (scénarios) ; les besoins sont fusionnés clé par clé."""
+    P = {
+        "NEEDS_SIMPLE": dict(NEEDS_SIMPLE), "NEEDS_C3": dict(NEEDS_C3),
+        "MAX_CONSEC_NUITS": MAX_CONSEC_NUITS,
+        "L_EQUI": L_EQUI, "L_REPOS": L_REPOS, "L_PRIOS": L_PRIOS, "L_PREF": L_PREF,
+        "SOFT_CONSTRAINTS": SOFT_CONSTRAINTS,
+        "PENALITY_SIMPLE": PENALITY_SIMPLE, "PENALITY_C3": PENALITY_C3,
+    }
+    for k, val in (overrides or {}).items():
+        if k not in P:
+            raise ValueError(f"Paramètre de modèle inconnu: {k}")
+        if k == "NEEDS_SIMPLE":
+            # Clés JSON -> numéros de créneau (C1, C2, C4 seulement : C3 passe par NEEDS_C3)
+            needs = {}
+            for s, n in _dict_param(k, val).items():
+                slot = int(s) if str(s).isdigit() else None
+                if slot not in NEEDS_SIMPLE:
+                    raise ValueError(f"{k}: créneau {s} invalide (attendu : {', '.join(map(str, NEEDS_SIMPLE))})")
+                needs[slot] = _entier_param(f"{k}[{s}]", n)
+            P[k].update(needs)
+        elif k == "NEEDS_C3":
+            val = _dict_param(k, val)
+            unknown = set(val) - set(ROLE_KEYS)
+            if unknown:
+                raise ValueError(f"Rôles inconnus: {', '.join(sorted(unknown))}")
+            P[k].update({r: _entier_param(f"{k}[{r}]", n) for r, n in val.items()})
+        elif k == "SOFT_CONSTRAINTS":
+            if not isinstance(val, bool):
+                raise ValueError(f"{k}: booléen attendu")
+            P[k] = val
+        elif k in ("MAX_CONSEC_NUITS", "PENALITY_SIMPLE", "PENALITY_C3"):
+            # Entiers : fenêtre glissante, et borne des manques figée en mode lexicographique
+            P[k] = _entier_param(k, val, minimum=1 if k == "MAX_CONSEC_NUITS" else 0)
+        else:
+            if isinstance(val, bool) or not isinstance(val, (int, float)) or not 0 <= val < np.inf:
+                raise ValueError(f"{k}: nombre >= 0 attendu")
+            P[k] = val
+    return P
+
+def _dict_param(k: str, val) -> dict:
+    if not isinstance(val, dict):
+        raise ValueError(f"{k}: objet {{clé: valeur}} attendu")
+    return val
+
+def _entier_param(k: str, val, minimum: int = 0) -> int:
+    """Entier >= minimum (2.0 accepté, pas 2.5 ni True) ; ValueError sinon."""
+    if (isinstance(val, bool) or not isinstance(val, (int, float)) or not np.isfinite(val)
+            or val != int(val) or val < minimum):
+        raise ValueError(f"{k}: entier >= {minimum} attendu")
+    return int(val)
+
+def load_data(xlsx_volontaires: str = XLSX_VOLONTAIRES, xlsx_priorites: str = XLSX_PRIORITES,
+              csv_dispos: str = CSV_DISPOS, dispos_dir: str = dispos_store.STORE_DIR,
+              registre: str = personnes.REGISTRE) -> dict:
     print("Lecture données…")
-    vols = read_volontaires_spv_pibrac(XLSX_VOLONTAIRES)
-    priorites = read_priorites_feuil1(XLSX_PRIORITES)
-    dispos = read_dispos_csv_with_slots(CSV_DISPOS)
-    ELIG = build_elig(vols)
+    roster = load_roster(xlsx_volontaires, registre=registre)
+    vols = read_volontaires_spv_pibrac(roster)
+    priorites = read_priorites_feuil1(xlsx_priorites)
+    dispos = read_dispos_csv_with_slots(csv_dispos, dispos_dir)
+    ELIG = build_elig(xlsx_volontaires, roster)
 
     DAYS = sorted({d["jour"] for d in dispos})
     if not DAYS:
         raise ValueError("Aucun jour détecté dans le CSV des disponibilités.")
     V = list(vols.keys())
 
-    DISPO = {(d["id"], d["jour"], d["slot"]): (bool(d["dispo"]), float(d["pref"])) for d in dispos}
-
-    # Diagnostic avant modélisation
-    diagnose(vols, DISPO, ELIG, DAYS, NEEDS_SIMPLE, NEEDS_C3)
+    # Clé du CSV -> id de l'effectif ; personnes absentes de l'effectif ignorées
+    par_cle = {p["cle"]: v for v, p in vols.items()}
+    inconnus = sorted({d["id"] for d in dispos} - par_cle.keys())
+    if inconnus:
+        print(f"⚠️  {len(inconnus)} personne(s) du CSV absente(s) de l'effectif, ignorée(s): "
+              f"{', '.join(inconnus[:10])}")
+    DISPO = {(par_cle[d["id"]], d["jour"], d["slot"]): (bool(d["dispo"]), float(d["pref"]))
+             for d in dispos if d["id"] in par_cle}
+    return {"vols": vols, "priorites": priorites, "ELIG": ELIG, "DAYS": DAYS, "V": V, "DISPO": DISPO}
+
+def read_frozen_rows(cutoff: str, planning_path: str = CSV_PLANNING) -> Optional[pd.DataFrame]:
+    """Lignes du planning existant antérieures à cutoff (None si pas de planning)."""
+    # Lecture via les partitions (resynchronisées avec le CSV si besoin) : l'export qui suit
+    # peut alors ne réécrire que les mois re-planifiés
+    old = planning_store.read_planning(planning_path, keep_default_na=False, dtype={"person_id": str})
+    return None if old is None else old[old["day"] < cutoff]
+
+def freeze_past(data: dict, cutoff: str, planning_path: str = CSV_PLANNING,
+                frozen_rows: Optional[pd.DataFrame] = None):
+    """Restreint `data` aux jours >= cutoff ; les affectations antérieures du planning existant
+    (`frozen_rows` si déjà lues, cf. read_frozen_rows) deviennent des constantes (data["FROZEN"]).
+    Renvoie (données restreintes, lignes figées)."""
+    past_days = [d for d in data["DAYS"] if d < cutoff]
+    if not past_days:
+        return data, None
+    if frozen_rows is None:
+        frozen_rows = read_frozen_rows(cutoff, planning_path)
+    if frozen_rows is None:
+        raise FileNotFoundError(f"Planning existant introuvable pour figer les jours passés: {planning_path}")
+    # person_id entier ('' sur les lignes de manque)
+    pid = pd.to_numeric(frozen_rows["person_id"], errors="coerce")
+    nights = frozen_rows.assign(person_id=pid)[(frozen_rows["category"] == "C3") & pid.isin(data["V"])]
+    DAYS = [d for d in data["DAYS"] if d >= cutoff]
+    frozen = dict(data, DAYS=DAYS,
+                  DISPO={k: val for k, val in data["DISPO"].items() if k[1] >= cutoff},
+                  FROZEN={"cutoff": cutoff, "days": past_days,
+                          "nights": sorted(zip(nights["person_id"].astype(int).tolist(), nights["day"]))})
+    print(f"🧊 {len(past_days)} jours figés avant {cutoff} ({len(nights)} nuits C3) | "
+          f"{len(DAYS)} jours à optimiser")
+    return frozen, frozen_rows
+
+def build_model(data: dict, params: Optional[dict] = None) -> dict:
+    vols, priorites, ELIG = data["vols"], data["priorites"], data["ELIG"]
+    DAYS, V, DISPO = data["DAYS"], data["V"], data["DISPO"]
+    # Constantes du module, ou variante de scénario (cf. model_params)
+    P = params or model_params()
+    NEEDS_SIMPLE, NEEDS_C3 = P["NEEDS_SIMPLE"], P["NEEDS_C3"]
+    MAX_CONSEC_NUITS, SOFT_CONSTRAINTS = P["MAX_CONSEC_NUITS"], P["SOFT_CONSTRAINTS"]
+    L_EQUI, L_REPOS, L_PRIOS, L_PREF = P["L_EQUI"], P["L_REPOS"], P["L_PRIOS"], P["L_PREF"]
+    PENALITY_SIMPLE, PENALITY_C3 = P["PENALITY_SIMPLE"], P["PENALITY_C3"]
+    # Jours figés (cf. freeze_past) : pas de variables, seulement leurs nuits C3 comme constantes
+    FROZEN = data.get("FROZEN") or {"days": [], "nights": []}
+    past_nights = {(v, d) for v, d in FROZEN["nights"]}
+    n_days = len(FROZEN["days"]) + len(DAYS)
 
     mdl = cp_model.CpModel()
+    # Contraintes ajoutées par section (instrumentation, cf. trace_run)
+    n_cons = {}
+    def section(name: str) -> None:
+        n_cons[name] = len(mdl.Proto().constraints) - sum(n_cons.values())
 
     # --- Variables C1,C2,C4 ---
     z = {(v, d, s): mdl.NewBoolVar(f"z_{v}_{d}_{s}") for v in V for d in DAYS for s in (1, 2, 4)}
@@ -301,6 +397,7 @@ def solve():
                 ok, _ = DISPO.get((v, d, s), (False, 0.0))
                 if not ok:
                     mdl.Add(z[(v, d, s)] == 0)
+    section("c1_c2_c4")
 
     # --- Variables C3 (rôles) ---
     x = {(v, d, r): mdl.NewBoolVar(f"x_{v}_{d}_{r}") for v in V for d in DAYS for r in ROLE_KEYS}
@@ -308,10 +405,10 @@ def solve():
 
     # D'abord, forcer à 0 les variables pour personnes non éligibles ou non disponibles
     for d in DAYS:
-        for v in V:
+        for i, v in enumerate(V):
             ok, _ = DISPO.get((v, d, 3), (False, 0.0))
-            for r in ROLE_KEYS:
-                if (not ok) or (ELIG.get((v, r), 0) == 0):
+            for j, r in enumerate(ROLE_KEYS):
+                if (not ok) or not ELIG[i, j]:
                     mdl.Add(x[(v, d, r)] == 0)
     
     # Ensuite, contraintes de besoins par rôle (en incluant toutes les variables)
@@ -328,35 +425,44 @@ def solve():
         # Contrainte : une personne ne peut avoir qu'un rôle maximum par jour
         for v in V:
             mdl.Add(sum(x[(v, d, r)] for r in ROLE_KEYS) <= 1)
+    section("c3")
 
     # --- y/h/spread ---
     y = {(v, d): mdl.NewBoolVar(f"y_{v}_{d}") for v in V for d in DAYS}
     for v in V:
         for d in DAYS:
             mdl.Add(y[(v, d)] == sum(x[(v, d, r)] for r in ROLE_KEYS))
-    h = {v: mdl.NewIntVar(0, len(DAYS), f"h_{v}") for v in V}
+    h = {v: mdl.NewIntVar(0, n_days, f"h_{v}") for v in V}
+    past_count = defaultdict(int)
+    for v, _d in past_nights:
+        past_count[v] += 1
     for v in V:
-        mdl.Add(h[v] == sum(y[(v, d)] for d in DAYS))
-    h_min = mdl.NewIntVar(0, len(DAYS), "h_min")
-    h_max = mdl.NewIntVar(0, len(DAYS), "h_max")
+        mdl.Add(h[v] == past_count[v] + sum(y[(v, d)] for d in DAYS))
+    h_min = mdl.NewIntVar(0, n_days, "h_min")
+    h_max = mdl.NewIntVar(0, n_days, "h_max")
     mdl.AddMinEquality(h_min, list(h.values()))
     mdl.AddMaxEquality(h_max, list(h.values()))
-    spread = mdl.NewIntVar(0, len(DAYS), "spread")
+    spread = mdl.NewIntVar(0, n_days, "spread")
     mdl.Add(spread == h_max - h_min)
+    section("charges")
 
     # --- Nuits consécutives (> K) ---
     over_terms = []
     K = MAX_CONSEC_NUITS
     W = K + 1
-    if len(DAYS) >= W:
+    # Les K dernières nuits figées comptent dans les fenêtres qui chevauchent la date de gel
+    WDAYS = (FROZEN["days"][-K:] if K else []) + DAYS
+    if len(WDAYS) >= W:
         for v in V:
-            for i in range(0, len(DAYS) - K):
+            for i in range(0, len(WDAYS) - K):
                 ssum = mdl.NewIntVar(0, W, f"suite_{v}_{i}")
-                mdl.Add(ssum == sum(y[(v, DAYS[t])] for t in range(i, i + W)))
+                mdl.Add(ssum == sum(y.get((v, WDAYS[t]), int((v, WDAYS[t]) in past_nights))
+                                    for t in range(i, i + W)))
                 over = mdl.NewIntVar(0, W, f"over_{v}_{i}")
                 mdl.Add(over >= 0)
                 mdl.Add(over >= ssum - K)
                 over_terms.append(over)
+    section("fenetres")
 
     # --- Priorités grade↔rôle (C3): malus = score-1 ---
     prio_terms = []
@@ -367,84 +473,390 @@ def solve():
                 score = priorites.get((g, r), 3)
                 malus = max(0, score - 1)
                 if malus:
-                    prio_terms.append(malus * x[(v, d, r)])
+                    prio_terms.append((x[(v, d, r)], malus))
 
     # --- Préférences (C1,C2,C4): bonus ---
     pref_terms = []
     for (v, d, s), (_, pref) in DISPO.items():
         if s in (1, 2, 4) and pref > 0:
-            pref_terms.append(pref * z[(v, d, s)])
+            pref_terms.append((z[(v, d, s)], pref))
 
     # --- Objectif ---
-    mdl.Minimize(
-        1 * (L_EQUI * spread) +
-        1 * (L_REPOS * sum(over_terms) if over_terms else 0) +
-        1 * (L_PRIOS * sum(prio_terms) if prio_terms else 0) -
-        1 * (L_PREF * sum(pref_terms) if pref_terms else 0) +
-        (PENALITY_SIMPLE * sum(short_simple.values()) if SOFT_CONSTRAINTS else 0) +
-        (PENALITY_C3     * sum(short_c3.values())     if SOFT_CONSTRAINTS else 0)
+    # Deux blocs : les manques (pénalités big-M) et la qualité (équité, repos, priorités, préférences).
+    # Le mode lexicographique les optimise séparément au lieu de les sommer.
+    # Gardés sous forme (variable, coefficient) : set_objectives reconstruit les expressions.
+    shortage_terms = (
+        [(var, PENALITY_SIMPLE) for var in short_simple.values()] +
+        [(var, PENALITY_C3) for var in short_c3.values()]
+    ) if SOFT_CONSTRAINTS else []
+    quality_terms = (
+        [(spread, L_EQUI)] +
+        [(over, L_REPOS) for over in over_terms] +
+        [(var, L_PRIOS * malus) for var, malus in prio_terms] +
+        [(var, -L_PREF * pref) for var, pref in pref_terms]
     )
+    M = {"mdl": mdl, "z": z, "x": x, "y": y, "h": h, "spread": spread,
+         "short_simple": short_simple, "short_c3": short_c3,
+         "shortage_terms": shortage_terms, "quality_terms": quality_terms,
+         "stats": {
+             "variables": {"z": len(z), "x": len(x), "y": len(y), "h": len(h) + 3,
+                           "fenetres": 2 * len(over_terms),
+                           "manques": len(short_simple) + len(short_c3),
+                           "total": len(mdl.Proto().variables)},
+             "constraints": dict(n_cons, total=len(mdl.Proto().constraints)),
+         }}
+    set_objectives(M)
+    return M
+
+def model_stats(M: dict) -> dict:
+    """Tailles du modèle par famille (variables, contraintes)."""
+    return M["stats"]
+
+def _weighted_sum(terms: List[tuple]) -> cp_model.LinearExpr:
+    # Une seule expression (et non une somme Python terme à terme) : ~6x plus rapide sur
+    # ~100k termes ; poids entiers convertis pour garder un objectif entier
+    return cp_model.LinearExpr.weighted_sum(
+        [var for var, _ in terms], [int(c) if float(c).is_integer() else c for _, c in terms])
+
+def objective_exprs(M: dict) -> None:
+    """(Re)construit les expressions manques/qualité, sans toucher à l'objectif du modèle."""
+    M["shortage"] = _weighted_sum(M["shortage_terms"])
+    # Bonus soustraits (et non coefficients négatifs) : 1.0 * var reste une expression entière
+    M["quality"] = (_weighted_sum([(var, c) for var, c in M["quality_terms"] if c > 0])
+                    - _weighted_sum([(var, -c) for var, c in M["quality_terms"] if c < 0]))
+
+def set_objectives(M: dict) -> None:
+    """(Re)construit les expressions manques/qualité et l'objectif complet du modèle."""
+    objective_exprs(M)
+    M["mdl"].Minimize(M["quality"] + M["shortage"])
+
+# ---------- Profil solveur (écrit par tuning_solveur.py) ----------
+_profile_cache = {"mtime": None, "params": {}}
+
+def apply_params(params, values: dict) -> None:
+    """Applique un dict de paramètres CP-SAT ; les énumérations sont données par leur nom."""
+    for k, v in values.items():
+        if isinstance(v, str):
+            v = getattr(params, v)
+        setattr(params, k, v)
+
+def load_solver_profile(path: str = SOLVER_PROFILE) -> dict:
+    if not os.path.exists(path):
+        return {}
+    mtime = os.path.getmtime(path)
+    if _profile_cache["mtime"] != mtime:
+        with open(path, encoding="utf-8") as f:
+            prof = json.load(f)
+        _profile_cache.update(mtime=mtime, params=prof.get("params", {}))
+        print(f"⚙️  Profil solveur chargé ({path}): {prof.get('name', '?')} {_profile_cache['params']}")
+    return _profile_cache["params"]
+
+def _new_solver(max_time: float) -> cp_model.CpSolver:
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = max_time
+    solver.parameters.num_search_workers = NUM_WORKERS
+    solver.parameters.random_seed = SOLVER_SEED
+    apply_params(solver.parameters, load_solver_profile())
+    if WORKERS_CAP is not None:
+        # 0 = tous les cœurs pour CP-SAT
+        n = solver.parameters.num_search_workers
+        solver.parameters.num_search_workers = min(n or WORKERS_CAP, WORKERS_CAP)
+    return solver
+
+def hint_from_response(mdl: cp_model.CpModel, solver: cp_model.CpSolver) -> None:
+    """Hint complet (toutes les variables, y compris y/h/fenêtres) depuis la dernière solution."""
+    mdl.ClearHints()
+    sol = list(solver.ResponseProto().solution)
+    hint = mdl.Proto().solution_hint
+    hint.vars.extend(range(len(sol)))
+    hint.values.extend(sol)
+
+def run_solver(mdl: cp_model.CpModel, max_time: float, name: str,
+               criteria: Optional[dict] = None):
+    """Résout sous critères d'arrêt adaptatifs (max_time = plafond dur) et trace la phase."""
+    solver = _new_solver(max_time)
+    # Journal CP-SAT capturé (plus sur stdout) : sa ligne « Presolved ... » date la fin du presolve
+    verbose = solver.parameters.log_search_progress
+    solver.parameters.log_search_progress = True
+    solver.parameters.log_to_stdout = False
+    t_presolved = []
+    def on_log(line: str) -> None:
+        if not t_presolved and line.startswith("Presolved "):
+            t_presolved.append(time.time())
+        if verbose:
+            print(line)
+    solver.log_callback = on_log
+    cb = StopCallback(solver, criteria)
+    t0 = time.time()
+    status = cb.solve(mdl)
+    ok = status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+    resp = solver.ResponseProto()
+    st = {
+        "phase": name,
+        "status": solver.StatusName(status),
+        "stop_reason": cb.reason,
+        "wall_time": round(time.time() - t0, 3),
+        "first_solution_time": cb.first_solution_time,
+        "objective": solver.ObjectiveValue() if ok else None,
+        "best_bound": solver.BestObjectiveBound() if ok else None,
+        "gap": (round(abs(solver.ObjectiveValue() - solver.BestObjectiveBound())
+                      / max(1.0, abs(solver.ObjectiveValue())), 6) if ok else None),
+        "presolve_time": round(t_presolved[0] - t0, 3) if t_presolved else None,
+        "conflicts": resp.num_conflicts,
+        "branches": resp.num_branches,
+        "booleans": resp.num_booleans,
+        "deterministic_time": round(resp.deterministic_time, 3),
+    }
+    print(f"[{name}] Status: {st['status']} | Objective: {st['objective']} "
+          f"| Bound: {st['best_bound']} | Temps: {st['wall_time']}s | Arrêt: {cb.reason}")
+    return solver, status, st
+
+def solve_shortage(M: dict, max_time: float, criteria: Optional[dict] = None):
+    """Minimise les manques seuls (phase 1 du mode lexicographique, point de départ du LNS)."""
+    M["mdl"].Minimize(M["shortage"])
+    return run_solver(M["mdl"], max_time, "phase1_manques", criteria)
+
+def solve_lexico(M: dict, max_time: float = MAX_TIME_S, phase1_time: float = LEXICO_PHASE1_TIME,
+                 criteria: Optional[dict] = None):
+    """Phase 1: minimise les manques seuls. Phase 2: manques figés à l'optimum trouvé,
+    minimise équité/repos/priorités en partant de la solution de phase 1."""
+    mdl = M["mdl"]
+
+    # --- Phase 1 : couverture ---
+    solver, status, st1 = solve_shortage(M, min(phase1_time, max_time), criteria)
+    stats = [st1]
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return solver, status, stats
+    best_shortage = int(round(solver.ObjectiveValue()))
+
+    # --- Phase 2 : équité + priorités, manques bornés par la phase 1 ---
+    # OPTIMAL => égalité ; FEASIBLE => on ne peut garantir mieux que l'incumbent
+    if status == cp_model.OPTIMAL:
+        mdl.Add(M["shortage"] == best_shortage)
+    else:
+        mdl.Add(M["shortage"] <= best_shortage)
+    hint_from_response(mdl, solver)
+    mdl.Minimize(M["quality"])
+
+    # Le seuil d'objectif porte sur les manques : il ne s'applique pas à la phase 2
+    crit2 = dict(criteria, objective=None) if criteria else None
+    if criteria is not None and criteria.get("cancel") is not None and criteria["cancel"].is_set():
+        return solver, status, stats
+    solver2, status2, st2 = run_solver(mdl, max(1.0, max_time - st1["wall_time"]),
+                                       "phase2_qualite", crit2)
+    stats.append(st2)
+    if status2 not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        # Le hint de phase 1 est réalisable : ne devrait arriver qu'en cas de temps trop court
+        print("⚠️  Phase 2 sans solution dans le temps imparti, solution de phase 1 conservée.")
+        return solver, status, stats
+    return solver2, status2, stats
+
+def solve_model(M: dict, DAYS: List[str], V: List[int], lexico: bool, lns: bool,
+                max_time: float, lns_iters: Optional[int], criteria: dict):
+    """Choix de la stratégie (mono / lexicographique / LNS) ; renvoie (solver, status, phases)."""
+    if lns:
+        # Départ : couverture optimale (phase 1), puis voisinages successifs sur l'objectif complet
+        t_start = time.time()
+        init_solver, init_status, st1 = solve_shortage(M, min(LEXICO_PHASE1_TIME, max_time),
+                                                       dict(criteria, objective=None))
+        ok = init_status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+        remaining = max(1.0, max_time - (time.time() - t_start))
+        solver, status, st_lns = run_lns(M, DAYS, V, init_solver if ok else None,
+                                         time_budget=remaining, max_iters=lns_iters,
+                                         criteria=criteria, new_solver=_new_solver)
+        return solver, status, [st1, st_lns]
+    if lexico:
+        return solve_lexico(M, max_time, criteria=criteria)
+    solver, status, st = run_solver(M["mdl"], max_time, "mono", criteria)
+    return solver, status, [st]
+
+def solve(lexico: bool = LEXICO, lns: bool = False, max_time: float = MAX_TIME_S,
+          lns_iters: Optional[int] = None, criteria: Optional[dict] = None,
+          use_cache: bool = USE_CACHE, out_path: str = CSV_PLANNING,
+          columnar_path: Optional[str] = PLANNING_COLUMNAR,
+          freeze_before: Optional[str] = FREEZE_BEFORE,
+          listener: Optional[Callable[[dict], None]] = None, status_path: Optional[str] = None):
+    """Lecture -> modèle -> résolution -> export, instrumenté (cf. trace_run) ;
+    `listener` reçoit l'enregistrement du run à chaque début / fin de phase, également écrit
+    dans `status_path` s'il est donné (suivi entre processus)."""
+    trace = trace_run.RunTrace(listener, status_path)
+    trace.set(params={"lexico": lexico, "lns": lns, "max_time": max_time, "lns_iters": lns_iters,
+                      "workers": NUM_WORKERS, "seed": SOLVER_SEED, "freeze_before": freeze_before})
+    try:
+        result = _solve(trace, lexico, lns, max_time, lns_iters, criteria, use_cache,
+                        out_path, columnar_path, freeze_before)
+    except BaseException as e:
+        trace.set(error=repr(e))
+        trace.finish("error")
+        raise
+    trace.set(**{k: v for k, v in result.items() if k != "phases"}, solver=result.get("phases", []))
+    return dict(result, run=trace.finish())
+
+def _model_cache_key(freeze_before: Optional[str], past_rows: Optional[pd.DataFrame]) -> str:
+    """Clé de cache_modele : fichiers lus par load_data, code du modèle, constantes, jours figés."""
+    paths = [XLSX_VOLONTAIRES, XLSX_PRIORITES, CSV_DISPOS, eligibilite.REGLES, personnes.REGISTRE,
+             __file__, roster.__file__, eligibilite.__file__, personnes.__file__]
+    return cache_modele.model_key(paths, {
+        "model": model_params(), "freeze_before": freeze_before,
+        "frozen": cache_planning.frame_digest(past_rows) if past_rows is not None else None})
+
+def _solve(trace: trace_run.RunTrace, lexico: bool, lns: bool, max_time: float,
+           lns_iters: Optional[int], criteria: Optional[dict], use_cache: bool, out_path: str,
+           columnar_path: Optional[str], freeze_before: Optional[str]):
+    with trace.phase("lecture"):
+        past_rows = read_frozen_rows(freeze_before, out_path) if freeze_before else None
+        model_key = _model_cache_key(freeze_before, past_rows) if use_cache else None
+        cached_model = cache_modele.lookup(model_key) if model_key is not None else None
+        if cached_model is not None:
+            # Mêmes fichiers : effectif et jours relus avec le modèle, sans parser les données
+            print(f"📦 Modèle en cache ({model_key[:12]}) : lecture des données évitée")
+            data = cached_model
+            frozen_rows = past_rows if cached_model["frozen"] else None
+            data_stats = cached_model["data"]
+        else:
+            data = load_data()
+            frozen_rows = None
+            if freeze_before:
+                data, frozen_rows = freeze_past(data, freeze_before, out_path, past_rows)
+            data_stats = {"volontaires": len(data["V"]), "jours": len(data["DAYS"]),
+                          "dispos": len(data["DISPO"])}
+    trace.set(data=data_stats)
+    if freeze_before and not data["DAYS"]:
+        print(f"🧊 Tous les jours sont antérieurs au {freeze_before} : rien à optimiser.")
+        return {"status": "FROZEN", "phases": []}
+    vols, DAYS, V = data["vols"], data["DAYS"], data["V"]
+    if criteria is None:
+        criteria = default_criteria()
+
+    # --- Cache : mêmes données + mêmes paramètres => même planning ---
+    key = None
+    if use_cache:
+        run_params = {
+            "model": model_params(),
+            "solver": {"lexico": lexico, "lns": lns, "max_time": max_time, "lns_iters": lns_iters,
+                       "seed": SOLVER_SEED, "workers": NUM_WORKERS,
+                       "profile": load_solver_profile(),
+                       "criteria": {k: v for k, v in criteria.items() if k != "cancel"}},
+        }
+        with trace.phase("cache"):
+            digest = cached_model["digest"] if cached_model else cache_planning.data_digest(data, frozen_rows)
+            key = cache_planning.input_hash(digest, run_params)
+            hit = cache_planning.lookup(key)
+        if hit is not None:
+            cached_csv, cached = hit
+            print(f"⚡ Résultat en cache ({key[:12]}) : {cached['status']} | "
+                  f"manques={cached.get('shortage')} -> {out_path}")
+            with trace.phase("export"):
+                version = export_planning(out_path, pd.read_csv(cached_csv, keep_default_na=False),
+                                          columnar_path)
+            return dict(cached, cache="hit", version=version)
+
+    if cached_model is not None:
+        with trace.phase("modele"):
+            M = cache_modele.load(model_key)
+            # Le modèle a été exporté avec son objectif complet (cf. build_model)
+            objective_exprs(M)
+    else:
+        # Diagnostic avant modélisation (déjà affiché au run qui a mis le modèle en cache)
+        with trace.phase("diagnostic"):
+            diagnose(vols, data["DISPO"], data["ELIG"], DAYS, NEEDS_SIMPLE, NEEDS_C3)
+
+        with trace.phase("modele"):
+            M = build_model(data)
+        if use_cache:
+            # Enregistré avant résolution (le mode lexicographique ajoute une contrainte) ;
+            # clé recalculée : load_data a pu attribuer de nouveaux ids dans le registre
+            with trace.phase("cache_modele"):
+                cache_modele.save(_model_cache_key(freeze_before, past_rows), M, {
+                    "vols": vols, "DAYS": DAYS, "V": V, "data": data_stats, "digest": digest,
+                    "frozen": frozen_rows is not None})
+    trace.set(model=model_stats(M))
 
     # --- Solve ---
-    solver = cp_model.CpSolver()
-    solver.parameters.max_time_in_seconds = 60.0
-    solver.parameters.num_search_workers = 8
-    status = solver.Solve(mdl)
+    with trace.phase("resolution"):
+        solver, status, phases = solve_model(M, DAYS, V, lexico, lns, max_time, lns_iters, criteria)
     print("Status:", solver.StatusName(status), "| Objective:", solver.ObjectiveValue())
     if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
         print("❌ Pas de solution.")
-        return
+        return {"status": solver.StatusName(status), "phases": phases}
+
+    with trace.phase("extraction"):
+        S = extract_solution(solver, M)
+        planning = planning_frame(S, vols, SOFT_CONSTRAINTS)
 
     # --- Affichage court ---
     print("\n=== Charges (nuits C3) ===")
-    hv = {v: solver.Value(h[v]) for v in V}
-    for v, val in sorted(hv.items(), key=lambda kv: -kv[1])[:20]:
+    top = S["h"].sort_values("val", ascending=False, kind="stable")[:20]
+    for v, val in top[["person_id", "val"]].itertuples(index=False):
         print(f"- {vols[v]['nom']:<24} {val}")
 
+    first_days = planning[planning["day"].isin(DAYS[:7]) & (planning["category"] != "SHORTAGE")]
+    names = first_days.groupby(["day", "slot", "role"], sort=False)["person_name"].agg(", ".join)
     for d in DAYS[:7]:
         print(f"\n=== Jour {d} ===")
         for s in (1, 2, 4):
-            names = [vols[v]["nom"] for v in V if solver.Value(z[(v, d, s)]) == 1]
-            print(f" C{s} ({NEEDS_SIMPLE[s]}): {', '.join(names)}")
-        print(" C3 (astreinte, 9 rôles) :")
-        assigned = defaultdict(list)
-        for r in ROLE_KEYS:
-            for v in V:
-                if solver.Value(x[(v, d, r)]) == 1:
-                    assigned[r].append(vols[v]["nom"])
+            print(f" C{s} ({NEEDS_SIMPLE[s]}): {names.get((d, s, '-'), '')}")
+        print(f" C3 (astreinte, {len(ROLE_KEYS)} rôles) :")
         for r in ROLE_KEYS:
-            print(f"  - {r:<13}: {', '.join(assigned[r])}")
+            print(f"  - {r:<13}: {names.get((d, 3, r), '')}")
 
     if SOFT_CONSTRAINTS:
         print("\n=== Manques (pénalisés) ===")
-        any_short = False
-        for (d, s), var in short_simple.items():
-            val = solver.Value(var)
-            if val > 0:
-                any_short = True
-                print(f"- {d} C{s}: {val} manquant(s)")
-        for (d, r), var in short_c3.items():
-            val = solver.Value(var)
-            if val > 0:
-                any_short = True
-                print(f"- {d} C3 {r}: {val} manquant(s)")
-        if not any_short:
+        shortages = planning[planning["category"] == "SHORTAGE"]
+        for d, slot, r, n in shortages[["day", "slot", "role", "shortage_count"]].itertuples(index=False):
+            label = f"C{slot}" if r == "-" else f"C3 {r}"
+            print(f"- {d} {label}: {n} manquant(s)")
+        if shortages.empty:
             print("Aucun manque.")
 
-    # --- Export CSV ---
-    export_planning_csv(
-        out_path="planning_optimise.csv",
-        solver=solver,
-        vols=vols,
-        DAYS=DAYS,
-        V=V,
-        z=z,
-        x=x,
-        ROLE_KEYS=ROLE_KEYS,
-        SOFT_CONSTRAINTS=SOFT_CONSTRAINTS,
-        short_simple=short_simple,
-        short_c3=short_c3
-    )
+    # --- Export CSV (+ copie colonne) ---
+    months = None
+    if frozen_rows is not None:
+        planning = pd.concat([frozen_rows, planning], ignore_index=True)
+        # Seuls les mois re-planifiés changent de partition
+        months = sorted({d[:7] for d in DAYS})
+    with trace.phase("export"):
+        version = export_planning(out_path, planning, columnar_path, months)
+    result = {
+        "status": solver.StatusName(status),
+        "shortage": int(round(solver.Value(M["shortage"]))) if SOFT_CONSTRAINTS else 0,
+        "quality": solver.Value(M["quality"]),
+        "phases": phases,
+    }
+    # Un run annulé n'est pas le résultat « normal » de ces entrées : pas de mise en cache
+    if key is not None and not any(p.get("stop_reason") == "cancel" for p in phases):
+        cache_planning.store(key, out_path, result)
+    return dict(result, cache="miss" if key is not None else "off", version=version)
 
 if __name__ == "__main__":
-    solve()
+    import argparse
+    ap = argparse.ArgumentParser(description="Planning SPV optimisé (CP-SAT)")
+    ap.add_argument("--lexico", action="store_true", default=LEXICO,
+                    help="résolution en 2 phases : manques d'abord, puis équité/priorités")
+    ap.add_argument("--lns", action="store_true",
+                    help="recherche à grand voisinage (semaine / famille de rôles / plus chargés), "
+                         "budget --max-time")
+    ap.add_argument("--lns-iters", type=int, default=None, help="nombre max d'itérations LNS")
+    ap.add_argument("--max-time", type=float, default=MAX_TIME_S,
+                    help="plafond de temps de résolution (s)")
+    ap.add_argument("--rel-gap", type=float, default=STOP_REL_GAP, help="arrêt à cet écart relatif")
+    ap.add_argument("--abs-gap", type=float, default=STOP_ABS_GAP, help="arrêt à cet écart absolu")
+    ap.add_argument("--stall", type=float, default=STOP_STALL_S,
+                    help="arrêt après N s sans amélioration")
+    ap.add_argument("--target", type=float, default=STOP_OBJECTIVE,
+                    help="arrêt dès que l'objectif passe sous ce seuil")
+    ap.add_argument("--no-cache", action="store_true", help="ignorer le cache de résultats")
+    ap.add_argument("--freeze-before", default=FREEZE_BEFORE, metavar="AAAA-MM-JJ",
+                    help="figer les jours antérieurs (relus depuis le planning existant)")
+    ap.add_argument("--columnar", default=PLANNING_COLUMNAR, metavar="CHEMIN",
+                    help="copie binaire colonne du planning (.parquet ou .npz)")
+    args = ap.parse_args()
+
+    # Ctrl+C : arrêt propre avec la meilleure solution trouvée
+    cancel = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: cancel.set())
+    criteria = {"rel_gap": args.rel_gap, "abs_gap": args.abs_gap, "stall": args.stall,
+                "objective": args.target, "cancel": cancel}
+    solve(lexico=args.lexico, lns=args.lns, max_time=args.max_time,
+          lns_iters=args.lns_iters, criteria=criteria, use_cache=not args.no_cache,
+          columnar_path=args.columnar, freeze_before=args.freeze_before)
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# personnes.py
+# ============================================================
+# Identifiants entiers stables des volontaires
+# Registre personnes.json partagé par l'effectif (roster), les disponibilités
+# (main.load_data), les variables du modèle et les exports du planning (person_id).
+# Clé d'une personne = nom du fichier, puis nom#1, nom#2… pour les homonymes, dans l'ordre
+# d'apparition (même règle pour le classeur et pour le CSV des disponibilités).
+# Un id attribué n'est jamais renuméroté ni réutilisé : un planning exporté reste valable
+# après l'arrivée ou le départ d'un volontaire. Les noms ne sont résolus qu'à l'affichage.
+#
+#   python personnes.py                                 (afficher le registre)
+#   python personnes.py --migrer planning_optimise.csv  (person_id : nom -> id entier)
+# ============================================================
+
+from __future__ import annotations
+import argparse
+import fcntl
+import json
+import os
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+REGISTRE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "personnes.json")
+
+_memo: Dict[str, tuple] = {}    # chemin -> ((taille, mtime_ns), {clé: id})
+
+def cles(noms: Iterable[str]) -> List[str]:
+    """Clés uniques dans l'ordre : nom, puis nom#1, nom#2… pour les homonymes."""
+    out, seen = [], {}
+    for nom in noms:
+        n = seen.get(nom, 0)
+        out.append(nom if n == 0 else f"{nom}#{n}")
+        seen[nom] = n + 1
+    return out
+
+def _lire(registre: str) -> dict:
+    try:
+        with open(registre, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"suivant": 1, "ids": {}}
+
+def charger(registre: str = REGISTRE) -> Dict[str, int]:
+    """{clé: id} ; relu seulement si le fichier a changé."""
+    try:
+        st = os.stat(registre)
+    except FileNotFoundError:
+        return {}
+    stamp = (st.st_size, st.st_mtime_ns)
+    known = _memo.get(registre)
+    if known and known[0] == stamp:
+        return known[1]
+    ids = _lire(registre)["ids"]
+    _memo[registre] = (stamp, ids)
+    return ids
+
+def attribuer(keys: Iterable[str], registre: str = REGISTRE) -> np.ndarray:
+    """Ids (int32) des clés, dans l'ordre ; les clés nouvelles reçoivent les ids suivants."""
+    keys = list(keys)
+    ids = charger(registre)
+    if any(k not in ids for k in keys):
+        os.makedirs(os.path.dirname(os.path.abspath(registre)), exist_ok=True)
+        with open(f"{registre}.lock", "w") as verrou:
+            fcntl.flock(verrou, fcntl.LOCK_EX)
+            # Relu sous verrou : un autre processus vient peut-être d'attribuer ces clés
+            reg = _lire(registre)
+            for k in keys:
+                if k not in reg["ids"]:
+                    reg["ids"][k] = reg["suivant"]
+                    reg["suivant"] += 1
+            with open(f"{registre}.tmp", "w", encoding="utf-8") as f:
+                json.dump(reg, f, ensure_ascii=False, indent=1)
+            os.replace(f"{registre}.tmp", registre)
+        ids = charger(registre)
+    return np.array([ids[k] for k in keys], dtype=np.int32)
+
+def migrer_planning(csv_path: str, registre: str = REGISTRE) -> int:
+    """Réécrit un planning exporté avant les ids entiers (person_id = nom) ; renvoie le nombre
+    de lignes converties. Le planning publié est resynchronisé à la lecture (planning_store)."""
+    df = pd.read_csv(csv_path, keep_default_na=False, dtype=str)
+    noms = (df["person_id"] != "") & ~df["person_id"].str.isdigit()
+    if not noms.any():
+        return 0
+    uniques = list(dict.fromkeys(df.loc[noms, "person_id"]))
+    ids = dict(zip(uniques, attribuer(uniques, registre).tolist()))
+    df.loc[noms, "person_id"] = df.loc[noms, "person_id"].map(ids).astype(str)
+    df.to_csv(f"{csv_path}.tmp", index=False)
+    os.replace(f"{csv_path}.tmp", csv_path)
+    return int(noms.sum())
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Registre des identifiants de volontaires")
+    ap.add_argument("--registre", default=REGISTRE)
+    ap.add_argument("--migrer", metavar="CSV", help="planning à convertir (person_id nom -> id)")
+    args = ap.parse_args()
+    if args.migrer:
+        n = migrer_planning(args.migrer, args.registre)
+        print(f"🔁 {n} ligne(s) converties dans {args.migrer}")
+    else:
+        for cle, pid in sorted(charger(args.registre).items(), key=lambda kv: kv[1]):
+            print(f"{pid:>5}  {cle}")
@@ -0,0 +1,160 @@
+# planning_store.py
+# ============================================================
+# Planning partitionné par mois et publié par versions :
+#   <planning>_mois/v<N>/planning_AAAA-MM.csv   partitions (jamais réécrites une fois publiées)
+#   <planning>_mois/manifest.json               pointeur vers la version courante
+# Publication : nouvelles partitions dans v<N+1>/, CSV complet par renommage atomique, puis
+# bascule du manifeste (os.replace). Un lecteur lit le manifeste une fois puis des fichiers
+# immuables : il sert l'instantané précédent, sans verrou, tant que le nouveau n'est pas publié.
+# Un re-calcul partiel (horizon glissant) ne réécrit que les mois concernés ; les autres
+# partitions sont reprises de la version précédente.
+# Les partitions étant immuables, celles de la version courante restent en mémoire
+# (préchargées avant le fork des workers en production, cf. backend/wsgi.py).
+# ============================================================
+
+from __future__ import annotations
+import fcntl
+import glob
+import json
+import os
+import shutil
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+import pandas as pd
+
+MANIFEST      = "manifest.json"
+KEEP_VERSIONS = 3          # versions conservées pour les lecteurs encore en cours
+# Options de lecture de l'API (person_id entier, vide sur les manques) : partagées avec le
+# préchargement pour que les workers réutilisent les partitions lues avant le fork
+API_READ_KW   = {"dtype": {"person_id": "Int64"}}
+
+_parts: Dict[tuple, tuple] = {}    # (chemin de partition, options de lecture) -> (mtime_ns, partition)
+
+def partition_dir(planning_csv: str) -> str:
+    """Dossier des partitions associé à un planning (planning_optimise.csv -> planning_optimise_mois/)."""
+    return f"{os.path.splitext(planning_csv)[0]}_mois"
+
+def _read_manifest(store_dir: str) -> Optional[dict]:
+    try:
+        with open(os.path.join(store_dir, MANIFEST), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _signature(path: str) -> dict:
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+@contextmanager
+def _publish_lock(store_dir: str):
+    """Un seul publieur à la fois (processus et threads) ; les lecteurs ne le prennent jamais."""
+    os.makedirs(store_dir, exist_ok=True)
+    with open(os.path.join(store_dir, ".lock"), "w") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def _stale(planning_csv: str, manifest: Optional[dict]) -> bool:
+    return os.path.exists(planning_csv) and (manifest is None
+                                             or manifest.get("source") != _signature(planning_csv))
+
+def current(planning_csv: str) -> Optional[dict]:
+    """Manifeste de la version publiée (version, published_at, months), ou None."""
+    return _read_manifest(partition_dir(planning_csv))
+
+def publish(df: pd.DataFrame, planning_csv: str, months: Optional[Iterable[str]] = None) -> dict:
+    """Publie `df` comme nouvelle version (toutes les partitions, ou seulement `months`)."""
+    with _publish_lock(partition_dir(planning_csv)):
+        return _publish(df, planning_csv, months)
+
+def _publish(df: pd.DataFrame, planning_csv: str, months: Optional[Iterable[str]]) -> dict:
+    store_dir = partition_dir(planning_csv)
+    old = _read_manifest(store_dir)
+    version = (old or {}).get("version", 0) + 1
+    vdir = f"v{version}"
+    os.makedirs(os.path.join(store_dir, vdir), exist_ok=True)
+
+    wanted = set(months) if months is not None and old and old.get("months") else None
+    entries = dict(old["months"]) if wanted is not None else {}
+    for month, part in df.groupby(df["day"].astype(str).str[:7], sort=True):
+        if wanted is not None and month not in wanted:
+            continue
+        rel = f"{vdir}/planning_{month}.csv"
+        part.to_csv(os.path.join(store_dir, rel), index=False, encoding="utf-8")
+        entries[month] = {"file": rel, "rows": int(len(part)),
+                          "first_day": str(part["day"].min()), "last_day": str(part["day"].max())}
+
+    # CSV complet : renommage atomique (un lecteur déjà ouvert garde l'ancien fichier)
+    df.to_csv(f"{planning_csv}.tmp", index=False, encoding="utf-8")
+    os.replace(f"{planning_csv}.tmp", planning_csv)
+
+    manifest = {"version": version, "published_at": datetime.now().isoformat(timespec="seconds"),
+                "months": entries, "source": _signature(planning_csv)}
+    with open(os.path.join(store_dir, f"{MANIFEST}.tmp"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(os.path.join(store_dir, f"{MANIFEST}.tmp"), os.path.join(store_dir, MANIFEST))
+    _gc(store_dir, manifest)
+    return manifest
+
+def _gc(store_dir: str, manifest: dict) -> None:
+    """Supprime les versions qui ne sont ni récentes ni référencées par le manifeste courant."""
+    used = {e["file"].split("/")[0] for e in manifest["months"].values()}
+    recent = {f"v{n}" for n in range(manifest["version"] - KEEP_VERSIONS + 1, manifest["version"] + 1)}
+    for path in glob.glob(os.path.join(store_dir, "v*")):
+        name = os.path.basename(path)
+        if os.path.isdir(path) and name not in used | recent:
+            shutil.rmtree(path, ignore_errors=True)
+
+def read_planning(planning_csv: str, month: Optional[str] = None,
+                  day: Optional[str] = None, **read_csv_kw) -> Optional[pd.DataFrame]:
+    """Planning limité à un jour ("AAAA-MM-JJ") ou un mois ("AAAA-MM"), ou complet.
+    Mêmes types que pd.read_csv(planning_csv, **read_csv_kw) ; None si aucun planning n'existe.
+    La version lue est dans df.attrs["version"]. Un planning sans partitions (ou remplacé
+    par ailleurs, ex. édition manuelle) est publié comme nouvelle version à la lecture."""
+    store_dir = partition_dir(planning_csv)
+    manifest = _read_manifest(store_dir)
+    if _stale(planning_csv, manifest):
+        # Re-vérifié sous verrou : une publication en cours (CSV déjà renommé, manifeste
+        # pas encore basculé) ne doit pas déclencher une seconde publication
+        with _publish_lock(store_dir):
+            manifest = _read_manifest(store_dir)
+            if _stale(planning_csv, manifest):
+                manifest = _publish(pd.read_csv(planning_csv, keep_default_na=False, dtype=str),
+                                    planning_csv, None)
+    if manifest is None:
+        return None
+    if day:
+        month = day[:7]
+    months = [month] if month else sorted(manifest["months"])
+    parts = [_read_part(os.path.join(store_dir, manifest["months"][m]["file"]), read_csv_kw)
+             for m in months if m in manifest["months"]]
+    _prune(store_dir, manifest)
+    if not parts:
+        df = pd.DataFrame(columns=["day", "slot", "category", "role", "person_id",
+                                   "person_name", "shortage_count"])
+    else:
+        df = pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0].copy()
+        if day:
+            df = df[df["day"] == day]
+    df.attrs["version"] = manifest["version"]
+    return df
+
+def _read_part(path: str, read_csv_kw: dict) -> pd.DataFrame:
+    """Partition publiée (immuable) : lue une fois par processus et par options de lecture."""
+    key = (os.path.abspath(path), json.dumps(read_csv_kw, sort_keys=True, default=str))
+    mtime = os.stat(path).st_mtime_ns        # v<N> recréé si le dossier a été supprimé
+    known = _parts.get(key)
+    if known is None or known[0] != mtime:
+        known = _parts[key] = (mtime, pd.read_csv(path, **read_csv_kw))
+    return known[1]
+
+def _prune(store_dir: str, manifest: dict) -> None:
+    """Oublie les partitions qui ne font plus partie de la version courante."""
+    live = {os.path.abspath(os.path.join(store_dir, e["file"])) for e in manifest["months"].values()}
+    root = os.path.abspath(store_dir)
+    for key in [k for k in _parts if os.path.dirname(os.path.dirname(k[0])) == root and k[0] not in live]:
+        _parts.pop(key, None)
@@ -0,0 +1,135 @@
+# roster.py
+# ============================================================
+# Lecture unique de l'effectif (SPV Pibrac Hackathon.xlsx, feuille 2026)
+# partagée par le solveur (main.read_volontaires_spv_pibrac) et l'API
+# (/planning/pompiers-details, /admin/import-pompiers).
+# Le schéma (colonnes Nom / Grade / habilitations) est résolu une fois sur l'en-tête,
+# puis grades et habilitations sont extraits colonne par colonne.
+# Le résultat est mis en cache par contenu du classeur (cf. cache_excel).
+# Chaque volontaire reçoit un id entier stable (cf. personnes.py).
+# ============================================================
+
+from __future__ import annotations
+import re
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+import cache_excel
+import personnes
+
+ROSTER_SHEET = "2026"
+HEADER_ROWS  = (2, 3)      # lignes d'en-tête (titre de groupe, sous-titre)
+FIRST_ROW    = 4           # première ligne de données (0-indexée)
+HABS         = ("SUAP", "INC", "COD0", "COD1", "PL", "B")
+
+GRADE_MAP = {
+    "1CL": 1, "2CL": 1, "SAP": 1, "SAPEUR": 1, "SAPEUR 1CL": 1, "SAPEUR 2CL": 1,
+    "CPL": 2, "CCH": 2, "CAPORAL": 2, "CAPORAL CHEF": 2, "CAPORAL-CHEF": 2,
+    "SGT": 3, "SCH": 3, "SERGENT": 3, "SERGENT CHEF": 3, "SERGENT-CHEF": 3,
+    "ADJ": 4, "ADC": 4, "ADJUDANT": 4, "ADJUDANT CHEF": 4, "ADJUDANT-CHEF": 4,
+    "LTN": 5, "LIEUTENANT": 5,
+    "CNE": 6, "CAPITAINE": 6,
+}
+
+def canon(s: str) -> str:
+    if s is None:
+        return ""
+    t = str(s).strip().upper().replace("’", "'")
+    return re.sub(r"\s+", " ", t)
+
+def grade_level(label: str) -> int:
+    """Libellé de grade -> niveau 1 (sapeur) à 6 (capitaine) ; 1 si inconnu."""
+    g = canon(label)
+    return GRADE_MAP.get(g, GRADE_MAP.get((g.split() or [""])[0], 1))
+
+# Règles de détection des colonnes d'habilitation (sur le libellé canonique)
+_HAB_RULES = {
+    "SUAP": lambda c: "SUAP" in c,
+    "INC":  lambda c: c in ("- INC", "INC"),
+    "COD0": lambda c: "COD 0" in c or "COD0" in c,
+    "COD1": lambda c: "COD1" in c or "COD 1" in c,
+    "PL":   lambda c: "PERMIS C" in c or "PERMIS PL" in c,
+    "B":    lambda c: "PERMIS B" in c or c == "B",
+}
+
+class Roster(NamedTuple):
+    """Effectif en colonnes : une entrée par volontaire, dans l'ordre du fichier."""
+    ids: np.ndarray         # int32, id stable du registre (cf. personnes.py)
+    cles: List[str]         # clé unique (nom, puis nom#1, nom#2… pour les homonymes)
+    noms: List[str]
+    grades: List[str]       # libellé brut ("" si absent)
+    levels: np.ndarray      # int8, niveau de grade (cf. grade_level)
+    habs: np.ndarray        # bool [volontaire, HABS]
+    rows: np.ndarray        # numéro de ligne Excel (messages d'erreur)
+
+    def habilitations(self, i: int) -> List[str]:
+        return [h for h, ok in zip(HABS, self.habs[i]) if ok]
+
+    def to_vols(self) -> Dict[int, dict]:
+        """Format attendu par main.build_model : {id: {nom, cle, grade, habs, equipe}}."""
+        return {int(pid): {"nom": nom, "cle": cle, "grade": int(lvl), "habs": set(self.habilitations(i)),
+                           "equipe": None}
+                for i, (pid, cle, nom, lvl) in enumerate(zip(self.ids, self.cles, self.noms, self.levels))}
+
+def _columns(df_raw: pd.DataFrame) -> List[str]:
+    top = df_raw.iloc[HEADER_ROWS[0]].fillna('')
+    sub = df_raw.iloc[HEADER_ROWS[1]].fillna('')
+    return [(str(a).strip() if str(b).strip() == "" else f"{str(a).strip()} - {str(b).strip()}")
+            for a, b in zip(top, sub)]
+
+def resolve_schema(columns: List[str]) -> Dict[str, Optional[List[int]]]:
+    """Positions des colonnes Nom / Grade et de chaque habilitation (SUAP : toutes ses colonnes)."""
+    cc = [canon(c) for c in columns]
+    schema = {"nom": [cc.index("NOM")] if "NOM" in cc else None,
+              "grade": [cc.index("GRADE")] if "GRADE" in cc else None}
+    for hab, rule in _HAB_RULES.items():
+        pos = [j for j, c in enumerate(cc) if rule(c)]
+        schema[hab] = (pos if hab == "SUAP" else pos[:1]) or None
+    return schema
+
+def _text(values: pd.DataFrame) -> pd.DataFrame:
+    return values.fillna("").astype(str).apply(lambda s: s.str.strip())
+
+def _parse_roster(xlsx_path: str, sheet: str) -> Dict[str, np.ndarray]:
+    df_raw = pd.ExcelFile(xlsx_path).parse(sheet, header=None)
+    schema = resolve_schema(_columns(df_raw))
+    if schema["nom"] is None:
+        raise ValueError(f"Colonne 'Nom' introuvable dans la feuille '{sheet}'.")
+    data = df_raw.iloc[FIRST_ROW:]
+
+    noms = _text(data.iloc[:, schema["nom"]]).iloc[:, 0]
+    keep = ((noms != "") & (noms.str.lower() != "nan")).to_numpy()
+    noms = noms[keep].tolist()
+    data = data[keep]
+
+    if schema["grade"] is not None:
+        grades = _text(data.iloc[:, schema["grade"]]).iloc[:, 0]
+        grades = grades.mask(grades.str.lower() == "nan", "").tolist()
+    else:
+        grades = [""] * len(noms)
+    # Niveau calculé une fois par libellé distinct
+    level_of = {g: grade_level(g) for g in set(grades)}
+    levels = np.array([level_of[g] for g in grades], dtype=np.int8)
+
+    habs = np.zeros((len(noms), len(HABS)), dtype=bool)
+    for k, hab in enumerate(HABS):
+        if schema[hab]:
+            habs[:, k] = _text(data.iloc[:, schema[hab]]).apply(lambda s: s.str.upper()).eq("X").any(axis=1)
+
+    return {"noms": np.array(noms, dtype=str), "grades": np.array(grades, dtype=str),
+            "levels": levels, "habs": habs, "rows": np.flatnonzero(keep) + FIRST_ROW + 1}
+
+def load_roster(xlsx_path: str, sheet: str = ROSTER_SHEET, use_cache: bool = True,
+                registre: str = personnes.REGISTRE) -> Roster:
+    """Effectif du classeur ; relu depuis cache_excel tant que le fichier ne change pas.
+    Les volontaires nouveaux reçoivent un id dans `registre`."""
+    if use_cache:
+        A = cache_excel.cached(xlsx_path, f"roster_{sheet}", lambda p: _parse_roster(p, sheet))
+    else:
+        A = _parse_roster(xlsx_path, sheet)
+    noms = A["noms"].tolist()
+    cles = personnes.cles(noms)
+    return Roster(ids=personnes.attribuer(cles, registre), cles=cles, noms=noms, grades=A["grades"].tolist(), levels=A["levels"],
+                  habs=A["habs"], rows=A["rows"])
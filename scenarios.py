@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# scenarios.py
+# ============================================================
+# Études « et si » : N variantes des besoins / poids du modèle, résolues en parallèle
+# Les données sont lues une seule fois puis partagées avec les processus de calcul.
+#
+#   python scenarios.py scenarios.json --time 60 --jobs 2
+#
+# scenarios.json :
+#   [{"nom": "reference"},
+#    {"nom": "C2 a 6", "params": {"NEEDS_SIMPLE": {"2": 6}}},
+#    {"nom": "equite forte", "params": {"L_EQUI": 40}, "lns": true}]
+# ============================================================
+
+from __future__ import annotations
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+import pandas as pd
+from ortools.sat.python import cp_model
+
+import main
+from arret_solveur import default_criteria
+
+SCENARIOS_JOBS = 2            # processus en parallèle (chaque solve garde ses propres workers)
+SCENARIOS_TOP  = 3            # volontaires les plus chargés rapportés par scénario
+RESULTS_CSV    = "scenarios_resultats.csv"
+
+_DATA = None                  # données partagées, une copie par processus
+
+def _init_worker(data: dict, num_workers: int) -> None:
+    global _DATA
+    _DATA = data
+    main.NUM_WORKERS = num_workers
+    main.WORKERS_CAP = num_workers
+
+def _max_time(sc: dict, default: float) -> float:
+    """Budget du scénario (son "max_time", sinon le budget global) ; ValueError si invalide"""
+    val = sc.get("max_time", default)
+    if isinstance(val, bool) or not isinstance(val, (int, float)) or not 0 < val < float("inf"):
+        raise ValueError(f"{sc['nom']}: max_time doit être un nombre de secondes > 0")
+    return float(val)
+
+def _run_scenario(sc: dict, max_time: float) -> dict:
+    t0 = time.time()
+    data = _DATA
+    params = main.model_params(sc.get("params"))
+    M = main.build_model(data, params)
+    solver, status, phases = main.solve_model(
+        M, data["DAYS"], data["V"], bool(sc.get("lexico", False)), bool(sc.get("lns", False)),
+        _max_time(sc, max_time), sc.get("lns_iters"), default_criteria())
+    row = {"scenario": sc["nom"], "status": solver.StatusName(status),
+           "arret": phases[-1].get("stop_reason")}
+    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        S = main.extract_solution(solver, M)
+        top = S["h"].sort_values("val", ascending=False, kind="stable")[:SCENARIOS_TOP]
+        row.update({
+            "objective": solver.ObjectiveValue(),
+            "manques_c1_c2_c4": int(S["short_simple"]["val"].sum()),
+            "manques_c3": int(S["short_c3"]["val"].sum()),
+            "ecart_equite": int(S["h"]["val"].max() - S["h"]["val"].min()),
+            "plus_charges": ", ".join(f"{data['vols'][v]['nom']} ({n})"
+                                      for v, n in top[["person_id", "val"]].itertuples(index=False)),
+        })
+    row["temps_s"] = round(time.time() - t0, 1)
+    row["params"] = json.dumps(sc.get("params") or {}, sort_keys=True, ensure_ascii=False)
+    return row
+
+def run_scenarios(scenarios: List[dict], max_time: float = main.MAX_TIME_S,
+                  jobs: int = SCENARIOS_JOBS, data: Optional[dict] = None) -> pd.DataFrame:
+    """Résout chaque scénario ({"nom", "params", ["lexico"|"lns"|"max_time"]}) et renvoie
+    le tableau comparatif (une ligne par scénario, dans l'ordre donné)."""
+    if not all(isinstance(sc, dict) for sc in scenarios):
+        raise ValueError('Chaque scénario doit être un objet {"nom", "params"}')
+    scenarios = [dict(sc, nom=sc.get("nom") or f"scenario_{i + 1}") for i, sc in enumerate(scenarios)]
+    for sc in scenarios:
+        # Validation avant de lancer les processus
+        main.model_params(sc.get("params"))
+        _max_time(sc, max_time)
+    data = data or main.load_data()
+    jobs = max(1, min(jobs, len(scenarios), os.cpu_count() or 1))
+    # Les cœurs sont répartis entre les processus au lieu d'être sur-souscrits
+    num_workers = max(1, min(main.NUM_WORKERS, (os.cpu_count() or 1) // jobs))
+    print(f"🧪 {len(scenarios)} scénarios | {jobs} processus x {num_workers} workers | {max_time:.0f}s")
+    # spawn : pas de fork d'un processus qui a déjà des threads (serveur Flask, CP-SAT)
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_worker, initargs=(data, num_workers)) as pool:
+        futures = [pool.submit(_run_scenario, sc, max_time) for sc in scenarios]
+        rows = [f.result() for f in futures]
+    return pd.DataFrame(rows)
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Comparaison de scénarios de besoins / poids")
+    ap.add_argument("fichier", help="JSON : liste de scénarios {nom, params}")
+    ap.add_argument("--time", type=float, default=main.MAX_TIME_S, help="budget par scénario (s)")
+    ap.add_argument("--jobs", type=int, default=SCENARIOS_JOBS, help="processus en parallèle")
+    ap.add_argument("--out", default=RESULTS_CSV, help="tableau comparatif (CSV)")
+    args = ap.parse_args()
+
+    with open(args.fichier, encoding="utf-8") as f:
+        scenarios = json.load(f)
+    df = run_scenarios(scenarios, args.time, args.jobs)
+    print(df.drop(columns=["params"]).to_string(index=False))
+    df.to_csv(args.out, index=False, encoding="utf-8")
+    print(f"📄 Résultats: {args.out}")
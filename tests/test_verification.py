@@ -0,0 +1,62 @@
+# tests/test_verification.py
+# ============================================================
+# Objectif de verification.verifier face à celui du solveur, sur une petite instance synthétique
+#   python -m pytest -q tests
+# ============================================================
+
+import os
+import sys
+
+import numpy as np
+from ortools.sat.python import cp_model
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+import verification
+
+def _donnees(n=4, jours=6):
+    V = list(range(1, n + 1))
+    DAYS = [f"2026-01-{d:02d}" for d in range(1, jours + 1)]
+    vols = {v: {"nom": f"Pompier {v}", "grade": 1 + v % 3} for v in V}
+    DISPO = {(v, d, s): (True, float((v + i + s) % 3))
+             for v in V for i, d in enumerate(DAYS) for s in (1, 2, 3, 4)}
+    ELIG = np.ones((n, len(main.ROLE_KEYS)), dtype=bool)
+    priorites = {(g, r): 1 + (g + j) % 3 for g in (1, 2, 3) for j, r in enumerate(main.ROLE_KEYS)}
+    return {"vols": vols, "priorites": priorites, "ELIG": ELIG, "DAYS": DAYS, "V": V, "DISPO": DISPO}
+
+def _params():
+    # Deux rôles C3 par nuit pour 4 volontaires : des fenêtres de nuits consécutives inévitables
+    needs_c3 = {r: 0 for r in main.ROLE_KEYS}
+    needs_c3.update({main.ROLE_KEYS[0]: 1, main.ROLE_KEYS[1]: 1})
+    return main.model_params({"NEEDS_SIMPLE": {"1": 1, "2": 1, "4": 2}, "NEEDS_C3": needs_c3})
+
+def _resoudre(M):
+    solver = cp_model.CpSolver()
+    solver.parameters.num_search_workers = 1
+    solver.parameters.max_time_in_seconds = 30
+    status = solver.Solve(M["mdl"])
+    assert status == cp_model.OPTIMAL
+    return solver
+
+def _verifier(solver, M, data, P):
+    planning = main.planning_frame(main.extract_solution(solver, M), data["vols"], P["SOFT_CONSTRAINTS"])
+    rapport = verification.verifier(planning, data, params=P)
+    assert rapport["valide"], rapport["violations"]
+    return rapport["objectif"]["total"]
+
+def test_objectif_egal_au_solveur_si_optimal():
+    data, P = _donnees(), _params()
+    M = main.build_model(data, P)
+    solver = _resoudre(M)
+    assert _verifier(solver, M, data, P) == solver.ObjectiveValue()
+
+def test_objectif_serre_sous_un_depassement_relache():
+    # over_* n'est borné qu'inférieurement : relevé au maximum, le solveur le compte en plus
+    data, P = _donnees(), _params()
+    M = main.build_model(data, P)
+    proto = M["mdl"].Proto()
+    over = next(v for v in proto.variables if v.name.startswith("over_"))
+    over.domain[0] = over.domain[1]
+    solver = _resoudre(M)
+    assert _verifier(solver, M, data, P) < solver.ObjectiveValue()
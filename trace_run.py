@@ -0,0 +1,112 @@
+# trace_run.py
+# ============================================================
+# Instrumentation d'un appel à main.solve() : temps mur / CPU et pic mémoire par phase
+# (lecture, diagnostic, modèle, résolution, extraction, export), tailles du modèle par
+# famille, statistiques CP-SAT par phase de résolution.
+# Enregistrement JSON : runs/run_<date>.json ; un « listener » optionnel reçoit l'état
+# à chaque début / fin de phase. Avec `status_path`, cet état est aussi écrit dans un fichier
+# (runs/dernier_run.json) lisible par tous les processus : suivi du calcul en cours côté API,
+# quel que soit le worker qui le fait tourner.
+# ============================================================
+
+from __future__ import annotations
+import glob
+import json
+import os
+import resource
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Optional
+
+RUNS_DIR  = os.path.join(os.path.dirname(os.path.abspath(__file__)), "runs")
+RUNS_KEEP = 50            # derniers enregistrements conservés
+STATUS_PATH = os.path.join(RUNS_DIR, "dernier_run.json")
+
+def peak_rss_mb() -> float:
+    """Pic de mémoire résidente du processus (Mo)."""
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+class RunTrace:
+    """Enregistrement d'un run ; `phase(nom)` chronomètre un bloc (mur + CPU de tous les threads)."""
+
+    def __init__(self, listener: Optional[Callable[[dict], None]] = None,
+                 status_path: Optional[str] = None):
+        self.listener = listener
+        self.status_path = status_path
+        self.t0 = time.perf_counter()
+        self.cpu0 = time.process_time()
+        self.record = {"started_at": datetime.now().isoformat(timespec="seconds"), "pid": os.getpid(),
+                       "state": "running", "current_phase": None, "phases": []}
+
+    def _notify(self) -> None:
+        if self.status_path is not None:
+            _write_json(self.status_path, self.record)
+        if self.listener is not None:
+            self.listener(json.loads(json.dumps(self.record, default=str)))
+
+    @contextmanager
+    def phase(self, name: str):
+        self.record["current_phase"] = name
+        self._notify()
+        t0, c0 = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.record["phases"].append({
+                "phase": name,
+                "wall_s": round(time.perf_counter() - t0, 3),
+                "cpu_s": round(time.process_time() - c0, 3),
+                "rss_max_mo": peak_rss_mb(),
+            })
+            self.record["current_phase"] = None
+            self._notify()
+
+    def set(self, **fields) -> None:
+        self.record.update(fields)
+
+    def finish(self, state: str = "done", path: Optional[str] = None) -> str:
+        """Clôt l'enregistrement, l'écrit en JSON et affiche le résumé par phase."""
+        self.record.update(state=state, wall_s=round(time.perf_counter() - self.t0, 3),
+                           cpu_s=round(time.process_time() - self.cpu0, 3), rss_max_mo=peak_rss_mb())
+        path = path or os.path.join(RUNS_DIR, f"run_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.json")
+        _write_json(path, self.record)
+        self.record["path"] = path
+        self._notify()
+        print("\n=== Temps par phase ===")
+        for p in self.record["phases"]:
+            print(f"- {p['phase']:<12} mur {p['wall_s']:>8.2f}s | CPU {p['cpu_s']:>8.2f}s | "
+                  f"pic {p['rss_max_mo']:.0f} Mo")
+        print(f"📊 Enregistrement du run: {path}")
+        _evict()
+        return path
+
+def _write_json(path: str, record: dict) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(record, f, indent=2, ensure_ascii=False, default=str)
+    os.replace(tmp, path)
+
+def read_status(path: str = STATUS_PATH) -> Optional[dict]:
+    """Dernier état écrit avec `status_path` (None si aucun) ; en_cours = run pas terminé et
+    processus encore vivant (un worker arrêté en plein calcul ne laisse pas un état « running »)."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            record = json.load(f)
+    except (OSError, ValueError):
+        return None
+    running = record.get("state") == "running"
+    if running:
+        try:
+            os.kill(record["pid"], 0)
+        except (KeyError, ProcessLookupError):
+            running = False
+        except PermissionError:
+            pass
+    return dict(record, en_cours=running)
+
+def _evict(keep: int = RUNS_KEEP) -> None:
+    runs = sorted(glob.glob(os.path.join(RUNS_DIR, "run_*.json")), key=os.path.getmtime, reverse=True)
+    for p in runs[keep:]:
+        os.remove(p)
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# tuning_solveur.py
+# ============================================================
+# Banc de réglage des paramètres CP-SAT sur des instances enregistrées
+# 1) python tuning_solveur.py --record annee2025     (modèle courant -> instances_planning/)
+# 2) python tuning_solveur.py --time 60 [--grid]      (portefeuille de configurations)
+# Écrit tuning_resultats.csv et le meilleur profil dans solver_profile.json (lu par main.solve)
+# ============================================================
+
+from __future__ import annotations
+import argparse
+import glob
+import itertools
+import json
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import pandas as pd
+from ortools.sat.python import cp_model
+
+import cache_modele
+import main
+from arret_solveur import StopCallback
+
+INSTANCES_DIR = "instances_planning"
+RESULTS_CSV   = "tuning_resultats.csv"
+TARGET_TOL    = 0.01      # cible = meilleur objectif connu + 1 %
+TUNING_SEED   = 0
+
+# Axes explorés ; la première valeur de chaque axe est la référence (défaut CP-SAT)
+PRESOLVE = {
+    "defaut": {},
+    "leger":  {"max_presolve_iterations": 1, "cp_model_probing_level": 0},
+    "off":    {"cp_model_presolve": False},
+}
+AXES = {
+    "num_search_workers":  [8, 1, 4, 16],
+    "linearization_level": [1, 0, 2],
+    "symmetry_level":      [2, 0, 4],
+    "presolve":            list(PRESOLVE.keys()),
+    "search_branching":    ["AUTOMATIC_SEARCH", "FIXED_SEARCH", "PORTFOLIO_SEARCH",
+                            "PSEUDO_COST_SEARCH"],
+}
+
+def _to_params(choice: Dict[str, object]) -> dict:
+    params = {}
+    for axis, val in choice.items():
+        if axis == "presolve":
+            params.update(PRESOLVE[val])
+        else:
+            params[axis] = val
+    return params
+
+def portfolio(grid: bool = False) -> List[dict]:
+    """Configurations à tester : une variation à la fois autour de la référence,
+    ou le produit cartésien complet des axes avec --grid."""
+    ref = {axis: vals[0] for axis, vals in AXES.items()}
+    if grid:
+        choices = [dict(zip(AXES, combo)) for combo in itertools.product(*AXES.values())]
+    else:
+        choices = [ref] + [dict(ref, **{axis: v}) for axis, vals in AXES.items() for v in vals[1:]]
+    out = []
+    for ch in choices:
+        name = "ref" if ch == ref else "+".join(f"{a}={v}" for a, v in ch.items() if v != ref[a])
+        out.append({"name": name, "params": _to_params(ch)})
+    return out
+
+def record_instance(name: str) -> str:
+    """Construit le modèle à partir des fichiers courants et l'enregistre comme instance."""
+    os.makedirs(INSTANCES_DIR, exist_ok=True)
+    M = main.build_model(main.load_data())
+    path = os.path.join(INSTANCES_DIR, f"{name}.pbtxt")
+    cache_modele.export_model(M["mdl"], path)
+    print(f"💾 Instance enregistrée: {path}")
+    return path
+
+def run_config(mdl: cp_model.CpModel, params: dict, max_time: float) -> dict:
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = max_time
+    solver.parameters.random_seed = TUNING_SEED
+    main.apply_params(solver.parameters, params)
+    cb = StopCallback(solver)
+    t0 = time.time()
+    status = cb.solve(mdl)
+    ok = status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+    return {
+        "status": solver.StatusName(status),
+        "wall_time": round(time.time() - t0, 3),
+        "first_solution_s": (round(cb.first_solution_time, 3)
+                             if cb.first_solution_time is not None else None),
+        "final_objective": solver.ObjectiveValue() if ok else None,
+        "best_bound": solver.BestObjectiveBound() if ok else None,
+        "trajectory": cb.trajectory,
+    }
+
+def _time_to_target(trajectory, target: float) -> Optional[float]:
+    return next((round(t, 3) for t, obj in trajectory if obj <= target), None)
+
+def tune(instances: List[str], configs: List[dict], max_time: float,
+         target: Optional[float] = None) -> pd.DataFrame:
+    rows = []
+    for path in instances:
+        inst = os.path.splitext(os.path.basename(path))[0]
+        mdl = cache_modele.load_model(path)
+        runs = []
+        for cfg in configs:
+            print(f"▶️  {inst} | {cfg['name']}")
+            res = run_config(mdl, cfg["params"], max_time)
+            print(f"   {res['status']} obj={res['final_objective']} "
+                  f"1ère sol={res['first_solution_s']} temps={res['wall_time']}s")
+            runs.append((cfg, res))
+
+        finals = [r["final_objective"] for _, r in runs if r["final_objective"] is not None]
+        best = min(finals) if finals else None
+        tgt = target if target is not None else (
+            best + TARGET_TOL * max(1.0, abs(best)) if best is not None else None)
+        for cfg, res in runs:
+            rows.append({
+                "instance": inst,
+                "config": cfg["name"],
+                "params": json.dumps(cfg["params"], sort_keys=True),
+                "status": res["status"],
+                "first_solution_s": res["first_solution_s"],
+                "time_to_target_s": _time_to_target(res["trajectory"], tgt) if tgt is not None else None,
+                "final_objective": res["final_objective"],
+                # objectif rapporté au meilleur de l'instance (1.0 = meilleur)
+                "rel_objective": (res["final_objective"] / best
+                                  if best and res["final_objective"] is not None else None),
+                "best_bound": res["best_bound"],
+                "wall_time": res["wall_time"],
+            })
+    return pd.DataFrame(rows)
+
+def pick_best(df: pd.DataFrame, max_time: float) -> pd.Series:
+    """Classement : objectif relatif moyen, puis temps moyen jusqu'à la cible
+    (une cible jamais atteinte compte pour le budget complet)."""
+    g = df.assign(
+        rel_objective=df["rel_objective"].fillna(float("inf")),
+        time_to_target_s=df["time_to_target_s"].fillna(max_time),
+    ).groupby(["config", "params"], as_index=False)[["rel_objective", "time_to_target_s"]].mean()
+    return g.sort_values(["rel_objective", "time_to_target_s"]).iloc[0]
+
+def write_profile(best: pd.Series, instances: List[str], path: str = main.SOLVER_PROFILE) -> None:
+    prof = {
+        "name": best["config"],
+        "params": json.loads(best["params"]),
+        "rel_objective": float(best["rel_objective"]),
+        "time_to_target_s": float(best["time_to_target_s"]),
+        "instances": [os.path.basename(p) for p in instances],
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(prof, f, indent=2, ensure_ascii=False)
+    print(f"🏆 Meilleure configuration: {prof['name']} -> {path}")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Réglage des paramètres CP-SAT")
+    ap.add_argument("--record", metavar="NOM", help="enregistrer le modèle courant comme instance")
+    ap.add_argument("--instances", nargs="*", help=f"fichiers .pbtxt (défaut: {INSTANCES_DIR}/*)")
+    ap.add_argument("--time", type=float, default=main.MAX_TIME_S, help="budget par run (s)")
+    ap.add_argument("--target", type=float, default=None,
+                    help=f"objectif cible (défaut: meilleur connu + {TARGET_TOL:.0%})")
+    ap.add_argument("--grid", action="store_true", help="produit cartésien complet des axes")
+    ap.add_argument("--no-profile", action="store_true", help="ne pas écrire solver_profile.json")
+    args = ap.parse_args()
+
+    if args.record:
+        record_instance(args.record)
+        raise SystemExit(0)
+
+    instances = args.instances or sorted(glob.glob(os.path.join(INSTANCES_DIR, "*.pbtxt")))
+    if not instances:
+        raise SystemExit(f"Aucune instance : lancez d'abord --record (dossier {INSTANCES_DIR}/).")
+    configs = portfolio(args.grid)
+    print(f"🔧 {len(configs)} configurations x {len(instances)} instances x {args.time:.0f}s")
+
+    df = tune(instances, configs, args.time, args.target)
+    df.to_csv(RESULTS_CSV, index=False, encoding="utf-8")
+    print(f"📄 Résultats: {RESULTS_CSV}")
+    if not args.no_profile and df["final_objective"].notna().any():
+        write_profile(pick_best(df, args.time), instances)
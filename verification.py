@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# verification.py
+# ============================================================
+# Vérification d'un planning sans solveur : contraintes du modèle + objectif serré
+# Entrées : un planning au format planning_optimise.csv et les données de main.load_data.
+# Contraintes dures (celles de main.build_model) :
+#   - personne / jour / rôle / créneau connus, pas de doublon
+#   - disponibilité (C1, C2, C4 et C3), éligibilité au rôle C3, un seul rôle C3 par nuit
+#   - pas de sureffectif (manque >= 0) ; sans SOFT_CONSTRAINTS, aucun manque
+#   - lignes SHORTAGE cohérentes avec les effectifs réels
+# Nuits consécutives > MAX_CONSEC_NUITS : pénalisées (L_REPOS), listées à part.
+# Objectif « serré » de ces affectations (manques + qualité, par composante) : chaque dépassement
+# de repos vaut l'excès réel. Dans le modèle, over_* n'est borné qu'inférieurement : une solution
+# arrêtée au temps limite peut le laisser au-dessus, d'où un objectif solveur >= celui-ci
+# (ex. 1636 rapporté par solve() pour 1516 ici). Les deux coïncident sur une solution OPTIMAL.
+# Tout est calculé sur des tableaux [personne, jour, créneau] : quelques ms pour une année.
+#
+#   python verification.py                      (planning publié)
+#   python verification.py planning.csv         (code retour 1 si une contrainte est violée)
+# ============================================================
+
+from __future__ import annotations
+import os
+import sys
+import time
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+import main
+
+MAX_DETAILS = 200       # violations détaillées renvoyées par type (le compte reste exact)
+
+_courant: Dict[str, tuple] = {}     # "data" -> (signature des fichiers d'entrée, données, tableaux)
+
+def tableaux(data: dict) -> Dict[str, np.ndarray]:
+    """Données de main.load_data en tableaux denses, indexés comme data["V"] x data["DAYS"]."""
+    V, DAYS = data["V"], data["DAYS"]
+    keys = list(data["DISPO"])
+    vals = list(data["DISPO"].values())
+    vi = pd.Index(V).get_indexer([k[0] for k in keys])
+    di = pd.Index(DAYS).get_indexer([k[1] for k in keys])
+    si = np.fromiter((k[2] for k in keys), dtype=np.int64, count=len(keys))
+    m = (vi >= 0) & (di >= 0)
+    avail = np.zeros((len(V), len(DAYS), 5), dtype=bool)          # créneaux 1..4 (0 inutilisé)
+    pref = np.zeros((len(V), len(DAYS), 5), dtype=np.float64)
+    avail[vi[m], di[m], si[m]] = np.fromiter((ok for ok, _ in vals), dtype=bool, count=len(vals))[m]
+    pref[vi[m], di[m], si[m]] = np.fromiter((p for _, p in vals), dtype=np.float64, count=len(vals))[m]
+    grades = [data["vols"][v]["grade"] for v in V]
+    malus = np.array([[max(0, data["priorites"].get((g, r), 3) - 1) for r in main.ROLE_KEYS]
+                      for g in grades], dtype=np.int64).reshape(len(V), len(main.ROLE_KEYS))
+    return {"avail": avail, "pref": pref, "malus": malus, "elig": np.asarray(data["ELIG"], dtype=bool)}
+
+def _signature() -> tuple:
+    import eligibilite, personnes
+    paths = (main.XLSX_VOLONTAIRES, main.XLSX_PRIORITES, main.CSV_DISPOS, eligibilite.REGLES,
+             personnes.REGISTRE)
+    return tuple((os.stat(p).st_size, os.stat(p).st_mtime_ns) if os.path.exists(p) else None
+                 for p in paths)
+
+def donnees_courantes():
+    """(data, tableaux) des fichiers du projet ; relus seulement si l'un d'eux a changé."""
+    sig = _signature()
+    known = _courant.get("data")
+    if known and known[0] == sig:
+        return known[1], known[2]
+    data = main.load_data()
+    T = tableaux(data)
+    _courant["data"] = (sig, data, T)
+    return data, T
+
+def _lignes(df: pd.DataFrame, types: str, masque: np.ndarray) -> pd.DataFrame:
+    return df.loc[masque, ["day", "slot", "role", "person_id"]].assign(type=types)
+
+def verifier(planning: pd.DataFrame, data: dict, T: Optional[Dict[str, np.ndarray]] = None,
+             params: Optional[dict] = None) -> dict:
+    """Violations et objectif serré (manques, qualité, composantes) du planning pour ces données.
+
+    L'objectif est le minimum atteignable avec ces affectations (over_* à l'excès réel) :
+    il minore ObjectiveValue() d'une résolution non optimale, cf. en-tête."""
+    t0 = time.perf_counter()
+    T = T or tableaux(data)
+    P = params or main.model_params()
+    V, DAYS, vols = data["V"], data["DAYS"], data["vols"]
+    ROLES = main.ROLE_KEYS
+    n, D, R = len(V), len(DAYS), len(ROLES)
+
+    df = planning.reset_index(drop=True)
+    df = df.assign(day=df["day"].astype(str),
+                   slot=pd.to_numeric(df["slot"], errors="coerce").fillna(0).astype(np.int64),
+                   category=df["category"].astype(str),
+                   role=df["role"].fillna("-").astype(str),
+                   person_id=pd.to_numeric(df["person_id"].replace("", np.nan), errors="coerce"))
+    pi = pd.Index(V).get_indexer(df["person_id"].fillna(-1).astype(np.int64))
+    di = pd.Index(DAYS).get_indexer(df["day"])
+    ri = pd.Index(ROLES).get_indexer(df["role"])
+    slot = df["slot"].to_numpy()
+    cat = df["category"].to_numpy()
+    simple, c3, short = cat == "SIMPLE", cat == "C3", cat == "SHORTAGE"
+    affect = simple | c3
+    violations = [_lignes(df, "categorie_inconnue", ~(affect | short))]
+
+    # --- Lignes invalides : écartées du calcul ---
+    bad_person = affect & (pi < 0)
+    bad_day = (affect | short) & (di < 0)
+    bad_slot = ((simple & ~np.isin(slot, list(P["NEEDS_SIMPLE"]))) | (c3 & (slot != 3))
+                | (short & ~np.isin(slot, list(P["NEEDS_SIMPLE"]) + [3])))
+    bad_role = (c3 | (short & (slot == 3))) & (ri < 0)
+    violations += [_lignes(df, "personne_inconnue", bad_person),
+                   _lignes(df, "jour_hors_horizon", bad_day),
+                   _lignes(df, "creneau_invalide", bad_slot),
+                   _lignes(df, "role_inconnu", bad_role)]
+    ok = ~(bad_person | bad_day | bad_slot | bad_role)
+
+    # --- Doublons (variables binaires) et un rôle par nuit ---
+    s_rows = np.flatnonzero(simple & ok)
+    c_rows = np.flatnonzero(c3 & ok)
+    s_key = (pi[s_rows] * D + di[s_rows]) * 5 + slot[s_rows]
+    c_key = (pi[c_rows] * D + di[c_rows]) * R + ri[c_rows]
+    dup_s = pd.Series(s_key).duplicated().to_numpy()
+    dup_c = pd.Series(c_key).duplicated().to_numpy()
+    violations += [_lignes(df, "doublon", np.isin(np.arange(len(df)), np.r_[s_rows[dup_s], c_rows[dup_c]]))]
+    s_rows, c_rows = s_rows[~dup_s], c_rows[~dup_c]
+    nuit = pi[c_rows] * D + di[c_rows]
+    multi = pd.Series(nuit).duplicated(keep=False).to_numpy()
+    violations += [_lignes(df, "plusieurs_roles", np.isin(np.arange(len(df)), c_rows[multi]))]
+
+    # --- Disponibilité, éligibilité ---
+    ps, ds, ss = pi[s_rows], di[s_rows], slot[s_rows]
+    pc, dc, rc = pi[c_rows], di[c_rows], ri[c_rows]
+    violations += [
+        _lignes(df, "indisponible", np.isin(np.arange(len(df)),
+                                            np.r_[s_rows[~T["avail"][ps, ds, ss]], c_rows[~T["avail"][pc, dc, 3]]])),
+        _lignes(df, "non_eligible", np.isin(np.arange(len(df)), c_rows[~T["elig"][pc, rc]])),
+    ]
+
+    # --- Couverture : manque = besoin - effectif, jamais négatif ---
+    need_s = np.zeros(5, dtype=np.int64)
+    for s, need in P["NEEDS_SIMPLE"].items():
+        need_s[s] = need
+    need_c = np.array([P["NEEDS_C3"].get(r, 0) for r in ROLES], dtype=np.int64)
+    cnt_s = np.zeros((D, 5), dtype=np.int64)
+    np.add.at(cnt_s, (ds, ss), 1)
+    cnt_c = np.zeros((D, R), dtype=np.int64)
+    np.add.at(cnt_c, (dc, rc), 1)
+    cnt_s[:, [s for s in range(5) if s not in P["NEEDS_SIMPLE"]]] = 0
+    gap_s = need_s[None, :] - cnt_s
+    gap_c = need_c[None, :] - cnt_c
+    short_s, short_c = np.maximum(gap_s, 0), np.maximum(gap_c, 0)
+    couverture = []
+    for (d, s) in zip(*np.nonzero(gap_s < 0)):
+        couverture.append({"type": "sureffectif", "day": DAYS[d], "slot": int(s), "role": "-",
+                           "detail": f"{cnt_s[d, s]} affectés pour {need_s[s]} postes"})
+    for (d, r) in zip(*np.nonzero(gap_c < 0)):
+        couverture.append({"type": "sureffectif", "day": DAYS[d], "slot": 3, "role": ROLES[r],
+                           "detail": f"{cnt_c[d, r]} affectés pour {need_c[r]} postes"})
+    if not P["SOFT_CONSTRAINTS"]:
+        for (d, s) in zip(*np.nonzero(short_s)):
+            couverture.append({"type": "manque", "day": DAYS[d], "slot": int(s), "role": "-",
+                               "detail": f"{short_s[d, s]} manquant(s)"})
+        for (d, r) in zip(*np.nonzero(short_c)):
+            couverture.append({"type": "manque", "day": DAYS[d], "slot": 3, "role": ROLES[r],
+                               "detail": f"{short_c[d, r]} manquant(s)"})
+
+    # --- Lignes SHORTAGE déclarées vs manques réels ---
+    decl_s = np.zeros((D, 5), dtype=np.int64)
+    decl_c = np.zeros((D, R), dtype=np.int64)
+    sh = np.flatnonzero(short & ok)
+    count = pd.to_numeric(df["shortage_count"].iloc[sh], errors="coerce").fillna(0).astype(np.int64).to_numpy()
+    on_c3 = slot[sh] == 3
+    np.add.at(decl_c, (di[sh][on_c3], ri[sh][on_c3]), count[on_c3])
+    in_simple = ~on_c3 & np.isin(slot[sh], list(P["NEEDS_SIMPLE"]))
+    np.add.at(decl_s, (di[sh][in_simple], slot[sh][in_simple]), count[in_simple])
+    for (d, s) in zip(*np.nonzero(decl_s != short_s)):
+        couverture.append({"type": "manque_incoherent", "day": DAYS[d], "slot": int(s), "role": "-",
+                           "detail": f"déclaré {decl_s[d, s]}, réel {short_s[d, s]}"})
+    for (d, r) in zip(*np.nonzero(decl_c != short_c)):
+        couverture.append({"type": "manque_incoherent", "day": DAYS[d], "slot": 3, "role": ROLES[r],
+                           "detail": f"déclaré {decl_c[d, r]}, réel {short_c[d, r]}"})
+
+    # --- Objectif (cf. main.build_model) ---
+    y = np.zeros((n, D), dtype=np.int64)
+    y[pc, dc] = 1
+    h = y.sum(axis=1)
+    spread = int(h.max() - h.min()) if n else 0
+    K = P["MAX_CONSEC_NUITS"]
+    W = K + 1
+    repos = []
+    over = 0
+    if D >= W:
+        cs = np.concatenate([np.zeros((n, 1), dtype=np.int64), y.cumsum(axis=1)], axis=1)
+        fen = cs[:, W:] - cs[:, :D + 1 - W]             # nuits par fenêtre de W jours
+        exces = np.maximum(fen - K, 0)
+        over = int(exces.sum())
+        for p, i in zip(*np.nonzero(exces)):
+            repos.append({"person_id": int(V[p]), "person_name": vols[V[p]]["nom"],
+                          "debut": DAYS[i], "nuits": int(fen[p, i])})
+    prio = int(T["malus"][pc, rc].sum())
+    pref = float(T["pref"][ps, ds, ss][np.isin(ss, (1, 2, 4))].sum())
+    shortage = (P["PENALITY_SIMPLE"] * int(short_s.sum()) + P["PENALITY_C3"] * int(short_c.sum())
+                if P["SOFT_CONSTRAINTS"] else 0)
+    quality = P["L_EQUI"] * spread + P["L_REPOS"] * over + P["L_PRIOS"] * prio - P["L_PREF"] * pref
+    if float(quality).is_integer():
+        quality = int(quality)
+
+    # --- Rapport ---
+    table = pd.concat([v for v in violations if len(v)] + [pd.DataFrame(couverture)], ignore_index=True)
+    if len(table):
+        pid = pd.to_numeric(table["person_id"] if "person_id" in table else pd.Series(np.nan, table.index),
+                            errors="coerce")
+        table["person_id"] = pid.astype("Int64")
+        table["person_name"] = pid.map({v: p["nom"] for v, p in vols.items()})
+        table = table.astype(object).where(table.notna(), None)
+    resume = table["type"].value_counts().to_dict() if len(table) else {}
+    details = (table.groupby("type", sort=False).head(MAX_DETAILS).to_dict("records")
+               if len(table) else [])
+    return {
+        "valide": not resume,
+        "violations": {k: int(v) for k, v in resume.items()},
+        "details": details,
+        "repos": repos[:MAX_DETAILS],
+        "objectif": {
+            "shortage": shortage,
+            "quality": quality,
+            "total": shortage + quality,
+            "composantes": {
+                "manques_simple": int(short_s.sum()),
+                "manques_c3": int(short_c.sum()),
+                "ecart_charges": spread,
+                "depassements_repos": over,
+                "malus_priorites": prio,
+                "bonus_preferences": pref,
+            },
+        },
+        "affectations": len(s_rows) + len(c_rows),
+        "duree_ms": round((time.perf_counter() - t0) * 1000, 2),
+    }
+
+def afficher(rapport: dict) -> None:
+    obj = rapport["objectif"]
+    print(f"\n=== Vérification ({rapport['affectations']} affectations, {rapport['duree_ms']} ms) ===")
+    if rapport["valide"]:
+        print("✅ Aucune contrainte dure violée.")
+    else:
+        print("❌ Contraintes violées : " + ", ".join(f"{k}={n}" for k, n in rapport["violations"].items()))
+        for v in rapport["details"][:20]:
+            qui = f" {v['person_name']} (id {v['person_id']})" if v.get("person_id") is not None else ""
+            print(f"- {v['type']:<18} {v['day']} C{v['slot']} {v['role']}{qui}"
+                  + (f" : {v['detail']}" if v.get("detail") else ""))
+    if rapport["repos"]:
+        print(f"⚠️  {len(rapport['repos'])} fenêtre(s) au-delà de {main.MAX_CONSEC_NUITS} nuits consécutives")
+    print(f"Objectif : manques={obj['shortage']} | qualité={obj['quality']} | total={obj['total']}")
+    print("  " + " | ".join(f"{k}={v}" for k, v in obj["composantes"].items()))
+
+if __name__ == "__main__":
+    import planning_store
+    path = sys.argv[1] if len(sys.argv) > 1 else main.CSV_PLANNING
+    data, T = donnees_courantes()
+    if path == main.CSV_PLANNING:
+        planning = planning_store.read_planning(path, keep_default_na=False, dtype=str)
+    else:
+        planning = pd.read_csv(path, keep_default_na=False, dtype=str)
+    rapport = verifier(planning, data, T)
+    afficher(rapport)
+    sys.exit(0 if rapport["valide"] else 1)